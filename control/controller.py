@@ -1,37 +1,54 @@
 from __future__ import annotations
 # from typing import override
-from view.ssis_gui import SSISWindow, AddStudentWindow, AddProgramWindow
+from view.ssis_gui import SSISWindow, AddStudentWindow, AddProgramWindow, ChangeProgramWindow, DuplicatesWindow
 from model.student import Student, Program
-from model.ssis import SSIS, DuplicateProgramError, DuplicateStudentError
-from tkinter import Event, Menu, StringVar, messagebox, END
+from model.promotion import PromotionRule
+from model.ssis import SSIS, ChangeEvent, DuplicateProgramError, DuplicateStudentError, OrphanedStudentError, StudentNotFoundError
+from tkinter import Event, Menu, StringVar, filedialog, messagebox, simpledialog, END
+from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator, Literal, TypeVar
 
 class AddProgramController:
     """Controller for adding a new program."""
     
+    WINDOW = AddProgramWindow
+    
     def __init__(
             self, 
             ssis: SSIS, 
             gui: AddProgramWindow,
-            parent_controller: SSISController,
-            add_student_controller: AddStudentController | None = None
+            parent_controller: SSISController
         ) -> None:
         """
-        Initialize the AddProgramController.
+        Initialize the AddProgramController. The window is kept and reused, see open.
 
         Args:
             ssis (SSIS): The SSIS model.
             gui (AddProgramWindow): The GUI window for adding a program.
             parent_controller (SSISController): The parent controller.
-            add_student_controller (AddStudentController | None, optional): The controller for adding a student. Defaults to None.
         """
         self.ssis = ssis
         self.gui = gui
         self.parent_controller = parent_controller
-        self.add_student_controller = add_student_controller
+        self.add_student_controller: AddStudentController | None = None
         
+        # Commands and validations are registered with Tk once, not every time the window opens
         self.set_actions()
         self.set_validations()
     
+    def open(self, add_student_controller: AddStudentController | None = None) -> None:
+        """
+        Show the window with empty fields.
+
+        Args:
+            add_student_controller (AddStudentController | None, optional): The controller for adding a student. Defaults to None.
+        """
+        self.add_student_controller = add_student_controller
+        
+        self.gui.clear()
+        self.gui.show()
+    
     def set_actions(self) -> None:
         """Set actions for GUI elements."""
         self.gui.add_program_button.config(command=self.add_program_button_pressed)
@@ -47,7 +64,7 @@ class AddProgramController:
         name = self.gui.program_name_entry.get()
         
         # Validate program code and name
-        if (pcv := Program.valid_program_code(code)) and (pnv := Program.valid_program_name(name)):
+        if (pcv := Program.valid_code(code)) and (pnv := Program.valid_name(name)):
             try:
                 # Attempt to add the program to the SSIS model
                 self.ssis.add_program(program := Program(
@@ -64,31 +81,22 @@ class AddProgramController:
                 
                 # Ask user if they want to edit the existing program
                 if messagebox.askyesno('Program Aleady Exists', f'Do you want to edit the existing program instead?'):
-                    # Initialize EditProgramController and destroy current window
-                    EditProgramController(
-                        self.ssis, 
-                        AddProgramWindow(self.gui.master), 
-                        self.parent_controller, 
-                        code, 
-                        self.add_student_controller
-                    )
-                    self.gui.destroy()
+                    # Hide the current window and open the program in the edit window
+                    self.gui.hide()
+                    self.parent_controller.dialog(EditProgramController).open(code, self.add_student_controller)
                 
                 return
             
-            # Show success message and update parent controller
+            # Show success message, the lists refresh through the model's change event
             messagebox.showinfo(
                 'Program Added Successfully!',
                 f'Program with:\n\tCode "{program.code}",\n\tName "{program.name}"\nadded successfully!'
             )
             
-            self.parent_controller.load_programs()
-            self.parent_controller.load_students()
-            
             if self.add_student_controller is not None:
-                self.add_student_controller.load_programs()
+                self.add_student_controller.update_program_matches()
                 
-            self.gui.destroy()
+            self.gui.hide()
         
         else:
             # Show error message for invalid input
@@ -119,37 +127,45 @@ class EditProgramController(AddProgramController):
         self, 
         ssis: SSIS, 
         gui: AddProgramWindow, 
-        parent_controller: SSISController, 
-        program_code: str, 
-        add_student_controller: AddStudentController | None = None
+        parent_controller: SSISController
     ) -> None:
         """
-        Initialize the EditProgramController.
+        Initialize the EditProgramController. The window is kept and reused, see open.
 
         Args:
             ssis (SSIS): The SSIS model.
             gui (AddProgramWindow): The GUI window for editing a program.
             parent_controller (SSISController): The parent controller.
-            program_code (str): The code of the program to edit.
-            add_student_controller (AddStudentController | None, optional): The controller for adding a student. Defaults to None.
         """
-        super().__init__(ssis, gui, parent_controller, add_student_controller)
-        
-        self.program = self.ssis.get_program_by_code(program_code)
-        
-        self.__load_data()
+        super().__init__(ssis, gui, parent_controller)
         
-    def __load_data(self) -> None:
-        """Load data for editing the program."""
         self.gui.title('Edit Program')
         self.gui.add_program_button.config(text='Edit Program')
         
-        self.code_var = StringVar()
-        self.name_var = StringVar()
+        self.code_var = StringVar(self.gui)
+        self.name_var = StringVar(self.gui)
         
         self.gui.program_code_entry.config(textvariable=self.code_var)
         self.gui.program_name_entry.config(textvariable=self.name_var)
+    
+    # @override
+    def open(self, program_code: str, add_student_controller: AddStudentController | None = None) -> None:  # type: ignore
+        """
+        Show the window with the data of a program.
+
+        Args:
+            program_code (str): The code of the program to edit.
+            add_student_controller (AddStudentController | None, optional): The controller for adding a student. Defaults to None.
+        """
+        self.add_student_controller = add_student_controller
+        self.program = self.ssis.get_program_by_code(program_code)
         
+        self.__load_data()
+        
+        self.gui.show()
+        
+    def __load_data(self) -> None:
+        """Load data for editing the program."""
         self.code_var.set(self.program.code)
         self.name_var.set(self.program.name)
     
@@ -159,23 +175,38 @@ class EditProgramController(AddProgramController):
         code = self.gui.program_code_entry.get().upper().strip()
         name = self.gui.program_name_entry.get().upper().strip()
         
-        if (pcv := Program.valid_program_code(code)) and (pnv := Program.valid_program_name(name)):
-            # Update program details
-            self.program.code = code
-            self.program.name = name
+        if (pcv := Program.valid_code(code)) and (pnv := Program.valid_name(name)):
+            # Rename the program and move its students in one transaction, so the lists refresh once
+            try:
+                with self.ssis.transaction():
+                    self.ssis.update_program(self.program.code, program := Program(code, name))
+                    
+                    if program.code != self.program.code:
+                        self.ssis.move_program_students(self.program.code, program.code)
+            
+            except DuplicateProgramError:
+                messagebox.showerror(
+                    'Program Aleady Exists',
+                    f'Program "{self.ssis.get_program_by_code(code)}" already exists.'
+                )
+                
+                return
+            
+            except OrphanedStudentError as error:
+                messagebox.showerror('Program Not Found', str(error))
+                return
+            
+            self.program = program
             
             messagebox.showinfo(
                 'Program Edited Successfully!',
                 f'Program with:\n\tCode "{self.program.code}",\n\tName {self.program.name}\nadded successfully!'
             )
             
-            self.parent_controller.load_programs()
-            self.parent_controller.load_students()
-            
             if self.add_student_controller is not None:
-                self.add_student_controller.load_programs()
+                self.add_student_controller.update_program_matches()
                 
-            self.gui.destroy()
+            self.gui.hide()
         
         else:
             # Show error message for invalid input
@@ -188,6 +219,10 @@ class EditProgramController(AddProgramController):
             )
 
 class AddStudentController:
+    PROGRAM_MATCH_LIMIT = 20    # Most programs listed by the program picker
+    
+    WINDOW = AddStudentWindow
+    
     def __init__(
         self, 
         ssis: SSIS, 
@@ -198,12 +233,32 @@ class AddStudentController:
         self.gui = gui
         self.parent_controller = parent_controller
         
+        # Commands and validations are registered with Tk once, not every time the window opens
         self.set_actions()
         self.set_validations()
         
         self.load_genders()
         self.load_programs()
     
+    def open(self) -> None:
+        self.gui.clear()
+        self.suggest_id()
+        
+        self.gui.show()
+    
+    def suggest_id(self) -> None:
+        # Offer the next free ID of the current admission year instead of making staff invent one
+        try:
+            student_id = self.ssis.next_student_id(str(date.today().year))
+        
+        except ValueError:
+            return
+        
+        # The key validation only accepts one character at a time
+        self.gui.id_entry.config(validate='none')
+        self.gui.id_entry.insert(0, student_id)
+        self.gui.id_entry.config(validate='key')
+    
     def load_genders(self) -> None:
         self.gui.gender_combobox.config(
             state='readonly',
@@ -211,9 +266,25 @@ class AddStudentController:
         )
     
     def load_programs(self) -> None:
+        # Only the programs matching what has been typed are listed, so opening the dialog
+        # does not depend on the size of the catalog
+        self.gui.program_combobox.config(
+            state='normal',
+            postcommand=self.update_program_matches
+        )
+        self.gui.program_combobox.bind('<KeyRelease>', self.program_typed)
+    
+    def program_typed(self, event: Event) -> None:
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        
+        self.update_program_matches()
+    
+    def update_program_matches(self) -> None:
+        typed = self.gui.program_combobox.get().split('|')[0]
+        
         self.gui.program_combobox.config(
-            state='readonly', 
-            values=sorted([program for program in self.ssis.programs.values()], key=lambda program: program.code) # type: ignore
+            values=[str(program) for program in self.ssis.search_programs(typed, AddStudentController.PROGRAM_MATCH_LIMIT)]
         )
     
     def set_actions(self) -> None:
@@ -237,7 +308,7 @@ class AddStudentController:
         valid_n = Student.valid_name(name := self.get_name())
         valid_y = Student.valid_year(year := self.get_year())
         valid_g = Student.valid_gender(gender := self.get_gender())
-        valid_p = Program.valid_program_code(program_code := self.get_program_code())
+        valid_p = (program_code := self.get_program_code()) in self.ssis.programs
         
         if valid_i and valid_n and valid_y and valid_g and valid_p:
             try:
@@ -256,31 +327,28 @@ class AddStudentController:
                 )
                 
                 if messagebox.askyesno('Student Aleady Exists', f'Do you want to edit the existing student instead?'):
-                    EditStudentController(
-                        self.ssis, 
-                        AddStudentWindow(self.gui.master), 
-                        self.parent_controller, 
-                        id
-                    )
-                    self.gui.destroy()
+                    self.gui.hide()
+                    self.parent_controller.dialog(EditStudentController).open(id)
                 
                 return
+            
+            except OrphanedStudentError as error:
+                messagebox.showerror('Program Not Found', str(error))
+                return
                 
             messagebox.showinfo(
                 'Student Added Successfully!',
                 f'Student "{student.id}" with:\n\tName "{student.name_formatted}",\n\tYear "{student.year}",\n\tGender "{student.gender}",\n\tProgram Code "{student.program_code}"\nadded successfully!'
             )
             
-            self.parent_controller.load_students()
-            
-            self.gui.destroy()
+            self.gui.hide()
         
         else:
             invalid_id_message = f'ID "{id}" is invalid.' * (not valid_i)
             invalid_name_message = f'Surname and First Name must not be blank.' * (not valid_n)
             invalid_year_message = f'Year "{year}" is invalid.' * (not valid_y)
             invalid_gender_message = f'Gender is invalid.' * (not valid_g)
-            invalid_program_message = f'Program cannot be blank.' * (not valid_p)
+            invalid_program_message = f'Program "{program_code}" not found.' * (not valid_p)
             
             messagebox.showerror(
                 'Invalid Student Input(s)',
@@ -309,7 +377,7 @@ class AddStudentController:
         return self.gui.gender_combobox.get()
     
     def get_program_code(self) -> str:
-        return self.gui.program_combobox.get().split('|')[0].strip()
+        return self.gui.program_combobox.get().split('|')[0].upper().strip()
     
     def id_validation(self) -> None:
         def id_val(text: str, change: str, new_text: str) -> bool:
@@ -369,25 +437,19 @@ class EditStudentController(AddStudentController):
         self, 
         ssis: SSIS, 
         gui: AddStudentWindow, 
-        parent_controller: SSISController,
-        student_id: str
+        parent_controller: SSISController
     ) -> None:
         super().__init__(ssis, gui, parent_controller)
         
-        self.student = self.ssis.get_student_by_id(student_id)
-        
-        self.__load_data()
-        
-    def __load_data(self):
         self.gui.title('Edit Student')
         self.gui.add_student_button.config(text='Edit Student')
         
-        self.id_var = StringVar()
-        self.year_var = StringVar()
-        self.surname_var = StringVar()
-        self.firstname_var = StringVar()
-        self.middlename_var = StringVar()
-        self.suffix_var = StringVar()
+        self.id_var = StringVar(self.gui)
+        self.year_var = StringVar(self.gui)
+        self.surname_var = StringVar(self.gui)
+        self.firstname_var = StringVar(self.gui)
+        self.middlename_var = StringVar(self.gui)
+        self.suffix_var = StringVar(self.gui)
         
         for entry, string_var in (
             (self.gui.id_entry, self.id_var), 
@@ -399,6 +461,17 @@ class EditStudentController(AddStudentController):
         ):
             entry.config(textvariable=string_var)
         
+        self.gui.id_entry.config(state='readonly')
+    
+    # @override
+    def open(self, student_id: str) -> None:  # type: ignore
+        self.student = self.ssis.get_student_by_id(student_id)
+        
+        self.__load_data()
+        
+        self.gui.show()
+        
+    def __load_data(self):
         self.id_var.set(self.student.id)
         self.year_var.set(str(self.student.year))
         self.surname_var.set(self.student.name[0])
@@ -406,11 +479,11 @@ class EditStudentController(AddStudentController):
         self.middlename_var.set(self.student.name[2])
         self.suffix_var.set(self.student.name[3])
         
-        self.gui.id_entry.config(state='readonly')
-        
         self.gui.gender_combobox.set(self.student.gender)
         
-        self.gui.program_combobox.set(self.ssis.get_program_by_code(self.student.program_code))
+        program = self.ssis.programs.get(self.student.program_code)  # type: ignore
+        
+        self.gui.program_combobox.set(str(program) if program else self.student.program_code or '')
     
     # @override
     def add_student_button_pressed(self) -> None:
@@ -418,45 +491,196 @@ class EditStudentController(AddStudentController):
         valid_n = Student.valid_name(name := super().get_name())
         valid_y = Student.valid_year(year := super().get_year())
         valid_g = Student.valid_gender(gender := super().get_gender())
-        valid_p = Program.valid_program_code(program_code := super().get_program_code())
+        valid_p = (program_code := super().get_program_code()) in self.ssis.programs
         
         if valid_i and valid_n and valid_y and valid_g and valid_p:
-            self.student.name = name
-            self.student.year = year
-            self.student.gender = gender
-            self.student.program_code = program_code
+            # Replace the record through the model so its sort indexes stay current
+            try:
+                self.ssis.update_student(student := Student(
+                    id=self.student.id,
+                    name=name,
+                    year=year,
+                    gender=gender,
+                    program_code=program_code
+                ))
+            
+            except OrphanedStudentError as error:
+                messagebox.showerror('Program Not Found', str(error))
+                return
+            
+            self.student = student
                 
             messagebox.showinfo(
                 'Student Edited Successfully!',
                 f'Student "{self.student.id}" with:\n\tName "{self.student.name_formatted}",\n\tYear "{self.student.year}",\n\tGender "{self.student.gender}",\n\tProgram Code "{self.student.program_code}"\nadded successfully!'
             )
             
-            self.parent_controller.load_students()
-            
-            self.gui.destroy()
+            self.gui.hide()
         
         else:
             invalid_id_message = f'ID "{id}" is invalid.' * (not valid_i)
             invalid_name_message = f'Surname and First Name must not be blank.' * (not valid_n)
             invalid_year_message = f'Year "{year}" is invalid.' * (not valid_y)
             invalid_gender_message = f'Gender is invalid.' * (not valid_g)
-            invalid_program_message = f'Program cannot be blank.' * (not valid_p)
+            invalid_program_message = f'Program "{program_code}" not found.' * (not valid_p)
             
             messagebox.showerror(
                 'Invalid Student Input(s)',
                 f'{invalid_id_message}\n{invalid_name_message}\n{invalid_year_message}\n{invalid_gender_message}\n{invalid_program_message}'.strip()
             )
 
+class ChangeProgramController:
+    """Controller for moving several students to another program at once."""
+    
+    def __init__(
+            self, 
+            ssis: SSIS, 
+            gui: ChangeProgramWindow, 
+            parent_controller: SSISController, 
+            student_ids: list[str]
+        ) -> None:
+        """
+        Initialize the ChangeProgramController.
+
+        Args:
+            ssis (SSIS): The SSIS model.
+            gui (ChangeProgramWindow): The GUI window for choosing the program.
+            parent_controller (SSISController): The parent controller.
+            student_ids (list[str]): IDs of the students to move.
+        """
+        self.ssis = ssis
+        self.gui = gui
+        self.parent_controller = parent_controller
+        self.student_ids = student_ids
+        
+        self.gui.program_combobox.config(postcommand=self.update_program_matches)
+        self.gui.program_combobox.bind('<KeyRelease>', lambda _: self.update_program_matches())
+        self.gui.change_program_button.config(command=self.change_program_button_pressed)
+    
+    def update_program_matches(self) -> None:
+        typed = self.gui.program_combobox.get().split('|')[0]
+        
+        self.gui.program_combobox.config(
+            values=[str(program) for program in self.ssis.search_programs(typed, AddStudentController.PROGRAM_MATCH_LIMIT)]
+        )
+    
+    def change_program_button_pressed(self) -> None:
+        program_code = self.gui.program_combobox.get().split('|')[0].upper().strip()
+        
+        if program_code not in self.ssis.programs:
+            messagebox.showerror('Invalid Program', f'Program "{program_code}" not found.', parent=self.gui)
+            return
+        
+        self.parent_controller.change_students(self.student_ids, program_code=program_code)
+        
+        self.gui.destroy()
+
+class DuplicatesController:
+    """Controller for reviewing and merging students that may be the same person."""
+    
+    def __init__(self, ssis: SSIS, gui: DuplicatesWindow) -> None:
+        """
+        Initialize the DuplicatesController.
+
+        Args:
+            ssis (SSIS): The SSIS model.
+            gui (DuplicatesWindow): The GUI window listing the candidate pairs.
+        """
+        self.ssis = ssis
+        self.gui = gui
+        
+        self.gui.keep_first_button.config(command=lambda: self.merge_selected(keep_first=True))
+        self.gui.keep_second_button.config(command=lambda: self.merge_selected(keep_first=False))
+        
+        self.load_candidates()
+    
+    def load_candidates(self) -> None:
+        self.gui.candidate_list.delete(*self.gui.candidate_list.get_children())
+        
+        candidates = self.ssis.find_duplicate_students()
+        
+        for candidate in candidates:
+            student = self.ssis.get_student_by_id(candidate.student_id)
+            other = self.ssis.get_student_by_id(candidate.other_student_id)
+            
+            self.gui.candidate_list.insert(
+                '',
+                index=END,
+                iid=f'{student.id} {other.id}',
+                values=(f'{candidate.score:.0%}', student.id, student.name_formatted, other.id, other.name_formatted)
+            )
+        
+        self.gui.status_label.config(text=f'{len(candidates)} possible duplicate(s)')
+    
+    def merge_selected(self, keep_first: bool) -> None:
+        if not (selection := self.gui.candidate_list.selection()):
+            return
+        
+        student_id, other_id = selection[0].split()
+        
+        if not keep_first:
+            student_id, other_id = other_id, student_id
+        
+        if messagebox.askyesno(
+            'Merge Students',
+            f'Keep student "{student_id}" and merge student "{other_id}" into it?\nStudent "{other_id}" will be deleted.',
+            parent=self.gui
+        ):
+            try:
+                self.ssis.merge_students(student_id, other_id)
+            
+            except OrphanedStudentError as error:
+                messagebox.showerror('Program Not Found', str(error), parent=self.gui)
+                return
+            
+            # Pairs involving the deleted record no longer apply
+            self.load_candidates()
+
+# Controllers of the dialogs that are kept and reused by SSISController.dialog
+Dialog = TypeVar('Dialog', bound='AddProgramController | AddStudentController')
+
 class SSISController:
+    SEARCH_DELAY_MS = 250       # Wait this long after the last keystroke before searching
+    SEARCH_PAGE_SIZE = 200      # Show at most this many matches
+    SEARCH_SCAN_CHUNK = 20000   # Test this many students per event loop tick
+    POLL_INTERVAL_MS = 2000     # Check the CSV files for outside changes this often
+    POPULATE_BATCH = 300        # Insert this many rows per event loop tick when filling the student list
+    PROMOTION_FINAL_YEAR = 4    # Final year level first offered when promoting students
+    
     def __init__(self, ssis: SSIS, gui: SSISWindow) -> None:
         self.ssis = ssis
         self.gui = gui
         
+        self.sort_column = 'id'
+        self.sort_descending = False
+        
+        self.search_var = StringVar(self.gui)
+        self.search_job: str | None = None
+        self.search_generation = 0
+        
+        self.populate_job: str | None = None
+        
+        # Message of the last failed reload from disk, until a reload succeeds
+        self.reload_error: str | None = None
+        
+        # Add and edit dialogs by controller class, built the first time they are opened
+        self.dialogs: dict[type, AddProgramController | AddStudentController] = {}
+        
+        # First key of the page shown in each list, None for the first page
+        self.student_page_start: str | None = None
+        self.program_page_start: str | None = None
+        
         self.load_programs()
         self.load_students()
         
         self.set_context_menus()
         self.set_actions()
+        self.set_sort_headings()
+        self.set_search()
+        self.set_pagers()
+        
+        self.ssis.subscribe(self.model_changed)
+        self.gui.after(SSISController.POLL_INTERVAL_MS, self.poll_files)
         
         self.gui.protocol('WM_DELETE_WINDOW', self.warning_close)
         
@@ -464,12 +688,30 @@ class SSISController:
         if messagebox.askyesno('Exit', 'Save before exit?'):
             self.save_button_pressed()
         
+        else:
+            self.ssis.discard_journals()
+        
         self.gui.destroy()
     
     def load_programs(self) -> None:
+        self.show_program_page(self.program_page_start, 'from')
+    
+    def show_program_page(self, program_code: str | None, direction: Literal['from', 'after', 'before']) -> None:
+        page_size = int(self.gui.program_pager.page_size_combobox.get())
+        programs = self.ssis.program_page(program_code, page_size, direction)
+        
+        if not programs and program_code is not None:
+            # Past either end, so stay on the nearest full page
+            programs = self.ssis.program_page(None, page_size, 'from' if direction == 'before' else 'before')
+        
+        elif direction == 'before' and len(programs) < page_size:
+            programs = self.ssis.program_page(None, page_size, 'from')
+        
+        self.program_page_start = programs[0].code if programs else None
+        
         self.gui.program_list.delete(*self.gui.program_list.get_children())
         
-        for program in sorted(self.ssis.programs.values(), key=lambda program: program.code):
+        for program in programs:
             self.gui.program_list.insert(
                 '',
                 index=END,
@@ -479,31 +721,321 @@ class SSISController:
                     program.name
                 )
             )
+        
+        self.gui.program_pager.status_label.config(text=SSISController.page_status(program.code for program in programs))
     
     def load_students(self) -> None:
+        if self.search_var.get().strip():
+            self.run_search()
+            return
+        
+        try:
+            self.show_student_page(self.student_page_start, 'from')
+        
+        except StudentNotFoundError:
+            # The first student of the page is gone and cannot be placed in a non-ID order
+            self.show_student_page(None, 'from')
+    
+    def show_student_page(self, student_id: str | None, direction: Literal['from', 'after', 'before']) -> None:
+        page_size = int(self.gui.student_pager.page_size_combobox.get())
+        
+        def fetch(student_id: str | None, direction: Literal['from', 'after', 'before']) -> list[str]:
+            students = self.ssis.student_page(student_id, page_size, direction, self.sort_column, self.sort_descending)
+            
+            return [student.id for student in students]
+        
+        student_ids = fetch(student_id, direction)
+        
+        if not student_ids and student_id is not None:
+            # Past either end, so stay on the nearest full page
+            student_ids = fetch(None, 'from' if direction == 'before' else 'before')
+        
+        elif direction == 'before' and len(student_ids) < page_size:
+            student_ids = fetch(None, 'from')
+        
+        self.student_page_start = student_ids[0] if student_ids else None
+        
+        self.populate_students(student_ids)
+        self.gui.student_pager.status_label.config(text=SSISController.page_status(student_ids))
+    
+    @staticmethod
+    def page_status(keys: Iterable[str]) -> str:
+        keys = list(keys)
+        
+        return f'{keys[0]} \u2013 {keys[-1]}' if keys else 'No records'
+    
+    def set_pagers(self) -> None:
+        student_pager = self.gui.student_pager
+        program_pager = self.gui.program_pager
+        
+        student_pager.previous_button.config(command=lambda: self.turn_student_page('before'))
+        student_pager.next_button.config(command=lambda: self.turn_student_page('after'))
+        student_pager.jump_button.config(command=self.jump_to_student)
+        student_pager.jump_entry.bind('<Return>', lambda _: self.jump_to_student())
+        student_pager.page_size_combobox.bind('<<ComboboxSelected>>', lambda _: self.load_students())
+        
+        program_pager.previous_button.config(command=lambda: self.turn_program_page('before'))
+        program_pager.next_button.config(command=lambda: self.turn_program_page('after'))
+        program_pager.jump_button.config(command=self.jump_to_program)
+        program_pager.jump_entry.bind('<Return>', lambda _: self.jump_to_program())
+        program_pager.page_size_combobox.bind('<<ComboboxSelected>>', lambda _: self.load_programs())
+    
+    def turn_student_page(self, direction: Literal['after', 'before']) -> None:
+        self.clear_search()
+        
+        # Pages are found from the student at their edge, not by counting rows
+        rows = self.gui.student_list.get_children()
+        
+        if direction == 'after' and rows:
+            self.show_student_page(rows[-1], 'after')
+        else:
+            self.show_student_page(self.student_page_start, direction)
+    
+    def jump_to_student(self) -> None:
+        student_id = self.gui.student_pager.jump_entry.get().strip()
+        
+        self.clear_search()
+        
+        try:
+            self.show_student_page(student_id or None, 'from')
+        
+        except StudentNotFoundError:
+            messagebox.showerror('Student Not Found', f'Student "{student_id}" not found.')
+    
+    def turn_program_page(self, direction: Literal['after', 'before']) -> None:
+        rows = self.gui.program_list.get_children()
+        
+        if direction == 'after' and rows:
+            self.show_program_page(rows[-1], 'after')
+        else:
+            self.show_program_page(self.program_page_start, direction)
+    
+    def jump_to_program(self) -> None:
+        self.show_program_page(self.gui.program_pager.jump_entry.get().strip().upper() or None, 'from')
+    
+    def clear_search(self) -> None:
+        # Page controls act on the whole roster, so they drop any filter without searching again
+        if self.search_var.get():
+            self.search_var.set('')
+        
+        if self.search_job is not None:
+            self.gui.after_cancel(self.search_job)
+            self.search_job = None
+        
+        self.search_generation += 1
+        self.gui.student_search_status.config(text='')
+    
+    def populate_students(self, student_ids: list[str]) -> None:
+        # Fill the list a batch per event loop tick so the window stays responsive,
+        # replacing any population still in progress
+        self.cancel_population()
         self.gui.student_list.delete(*self.gui.student_list.get_children())
         
-        for student in sorted(self.ssis.students.values(), key=lambda student: student.id):
+        self.gui.student_list_progress.config(maximum=max(len(student_ids), 1), value=0)
+        self.gui.student_list_progress.grid()
+        
+        self.populate_step(student_ids, 0)
+    
+    def populate_step(self, student_ids: list[str], start: int) -> None:
+        end = start + SSISController.POPULATE_BATCH
+        
+        self.insert_students(student_ids[start:end])
+        self.gui.student_list_progress.config(value=min(end, len(student_ids)))
+        
+        if end < len(student_ids):
+            self.populate_job = self.gui.after(1, self.populate_step, student_ids, end)
+        
+        else:
+            self.populate_job = None
+            self.gui.student_list_progress.grid_remove()
+    
+    def cancel_population(self) -> None:
+        if self.populate_job is not None:
+            self.gui.after_cancel(self.populate_job)
+            
+            self.populate_job = None
+            self.gui.student_list_progress.grid_remove()
+    
+    def show_students(self, student_ids: Iterable[str]) -> None:
+        # Replace the list with a few rows at once
+        self.cancel_population()
+        self.gui.student_list.delete(*self.gui.student_list.get_children())
+        self.insert_students(student_ids)
+    
+    def insert_students(self, student_ids: Iterable[str]) -> None:
+        for student_id in student_ids:
             self.gui.student_list.insert(
                 '',
                 index=END,
-                iid=student.id,
-                values=(
-                    student.id,
-                    student.name_formatted,
-                    student.year,
-                    student.gender,
-                    self.ssis.programs.get(student.program_code, None)
-                )
+                iid=student_id,
+                values=self.student_values(student_id)
             )
+    
+    def student_values(self, student_id: str) -> tuple:
+        student = self.ssis.students[student_id]
+        
+        return (
+            student.id,
+            student.name_formatted,
+            student.year,
+            student.gender,
+            self.ssis.programs.get(student.program_code, None)  # type: ignore
+        )
+    
+    def poll_files(self) -> None:
+        # Changes found on disk reach the views through model_changed. The next poll is
+        # scheduled whatever happens, so one bad reload does not stop watching the files
+        try:
+            self.ssis.reload_changed()
+        
+        except Exception as error:
+            # The same failure comes back on every poll until the files are fixed, so it is shown once
+            if str(error) != self.reload_error:
+                self.reload_error = str(error)
+                messagebox.showerror('Reload Failed', f'Changes to the data files could not be loaded:\n{error}')
+        
+        else:
+            self.reload_error = None
+        
+        finally:
+            self.gui.after(SSISController.POLL_INTERVAL_MS, self.poll_files)
+    
+    def model_changed(self, event: ChangeEvent) -> None:
+        # Called once per table for every change, from the dialogs or from disk.
+        # Only one page is shown, so refetching it costs the same as patching it
+        if event.table == 'programs':
+            self.load_programs()
+        
+        self.load_students()
+            
+    def set_search(self) -> None:
+        self.gui.student_search_entry.config(textvariable=self.search_var)
+        self.search_var.trace_add('write', lambda *_: self.schedule_search())
+    
+    def schedule_search(self) -> None:
+        # Restart the debounce timer on every keystroke
+        if self.search_job is not None:
+            self.gui.after_cancel(self.search_job)
+        
+        self.search_job = self.gui.after(SSISController.SEARCH_DELAY_MS, self.run_search)
+    
+    def run_search(self) -> None:
+        if self.search_job is not None:
+            self.gui.after_cancel(self.search_job)
+            self.search_job = None
+        
+        # A new generation makes any search still scanning stale
+        self.search_generation += 1
+        
+        query = self.search_var.get().strip()
+        
+        if not query:
+            self.gui.student_search_status.config(text='')
+            self.load_students()
+            return
+        
+        # A search repeated on unchanged students, e.g. after toggling the sort order back
+        if (matches := self.ssis.cached_search(
+            query, SSISController.SEARCH_PAGE_SIZE, self.sort_column, self.sort_descending
+        )) is not None:
+            self.show_search_results(query, matches)
+            return
+        
+        self.gui.student_search_status.config(text='Searching...')
+        
+        self.search_step(
+            self.search_generation, 
+            self.ssis.version('students'),
+            query, 
+            self.ssis.sorted_student_ids(self.sort_column, self.sort_descending), 
+            []
+        )
+    
+    def search_step(self, generation: int, version: int, query: str, candidates: Iterator[str], matches: list[str]) -> None:
+        if generation != self.search_generation:
+            return
+        
+        # The candidates are read from a live sort index, which a change between two
+        # chunks may have reordered, so the scan starts over on the changed students
+        if version != self.ssis.version('students'):
+            self.run_search()
+            return
+        
+        chunk = list(islice(candidates, SSISController.SEARCH_SCAN_CHUNK))
+        
+        for student_id in self.ssis.match_students(query, chunk):
+            matches.append(student_id)
+            
+            if len(matches) == SSISController.SEARCH_PAGE_SIZE:
+                break
+        
+        else:
+            if len(chunk) == SSISController.SEARCH_SCAN_CHUNK:
+                # Yield to the event loop so typing stays responsive, then keep scanning
+                self.gui.after_idle(self.search_step, generation, version, query, candidates, matches)
+                return
+        
+        self.ssis.cache_search(
+            query, SSISController.SEARCH_PAGE_SIZE, self.sort_column, self.sort_descending, matches, version
+        )
+        self.show_search_results(query, matches)
+    
+    def show_search_results(self, query: str, matches: list[str]) -> None:
+        if not matches:
+            # Nothing contains the query as typed, so fall back to similar names
+            similar = self.ssis.fuzzy_search_names(query, SSISController.SEARCH_PAGE_SIZE)
+            
+            self.show_students(student.id for student, _ in similar)
+            self.gui.student_search_status.config(text=f'No exact matches, showing {len(similar)} similar name(s)')
+            return
+        
+        self.show_students(matches)
+        
+        if len(matches) == SSISController.SEARCH_PAGE_SIZE:
+            self.gui.student_search_status.config(text=f'Showing first {len(matches)} matches')
+        else:
+            self.gui.student_search_status.config(text=f'{len(matches)} match(es)')
+    
+    def set_sort_headings(self) -> None:
+        for column in self.gui.student_list_headings:
+            self.gui.student_list.heading(column, command=lambda column=column: self.sort_students_by(column))
+        
+        self.update_sort_headings()
+    
+    def update_sort_headings(self) -> None:
+        for column, text in self.gui.student_list_headings.items():
+            if column == self.sort_column:
+                text += ' \u25bc' if self.sort_descending else ' \u25b2'
+            
+            self.gui.student_list.heading(column, text=text)
+    
+    def sort_students_by(self, column: str) -> None:
+        # Clicking the current sort column again flips the direction
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        
+        self.update_sort_headings()
+        
+        # Start over from the first page in the new order
+        self.student_page_start = None
+        self.load_students()
             
     def set_actions(self) -> None:
         self.gui.save_button.config(command=self.save_button_pressed)
         self.gui.add_student_button.config(command=self.add_student_button_pressed)
         self.gui.add_program_button.config(command=self.add_program_button_pressed)
+        self.gui.write_rosters_button.config(command=self.write_rosters_button_pressed)
+        self.gui.find_duplicates_button.config(command=lambda: DuplicatesController(self.ssis, DuplicatesWindow(self.gui)))
+        self.gui.start_term_button.config(command=self.start_term_button_pressed)
+        self.gui.promote_students_button.config(command=self.promote_students_button_pressed)
         
         self.student_menu.add_command(label='Edit Student', command=self.edit_student)
-        self.student_menu.add_command(label='Delete Student', command=self.delete_student)
+        self.student_menu.add_command(label='Delete Selected', command=self.delete_student)
+        self.student_menu.add_command(label='Change Program of Selected', command=self.change_program_of_selected)
+        self.student_menu.add_command(label='Change Year of Selected', command=self.change_year_of_selected)
         
         self.program_menu.add_command(label='Edit Program', command=self.edit_program)
         self.program_menu.add_command(label='Delete Program', command=self.delete_program)
@@ -520,11 +1052,159 @@ class SSISController:
             'Changes have been saved successfully!'
         )
     
+    def write_rosters_button_pressed(self) -> None:
+        output_dir = filedialog.askdirectory(parent=self.gui, title='Write Rosters To', mustexist=False)
+        
+        if not output_dir:
+            return
+        
+        paths = self.ssis.write_rosters(output_dir)
+        
+        messagebox.showinfo(
+            'Rosters Written',
+            f'{len(paths)} roster file(s) for {len(self.ssis.programs)} program(s) were written to "{output_dir}".'
+        )
+    
+    def start_term_button_pressed(self) -> None:
+        current_term = self.ssis.terms[-1] if self.ssis.terms else 'none'
+        
+        term = simpledialog.askstring(
+            'Start Term',
+            f'Current term: {current_term}\nName of the new term:',
+            parent=self.gui
+        )
+        
+        if term is None:
+            return
+        
+        try:
+            self.ssis.start_term(term.strip())
+        
+        except ValueError as error:
+            messagebox.showerror(
+                'Cannot Start Term',
+                str(error)
+            )
+            return
+        
+        messagebox.showinfo(
+            'Term Started',
+            f'Changes to year levels and programs are now recorded in term "{term.strip()}". Save to keep the new term.'
+        )
+    
+    def promote_students_button_pressed(self) -> None:
+        if (rules := self.ask_promotion_rules()) is None:
+            return
+        
+        default_rule, program_rules = rules
+        
+        # Show what would change before changing anything
+        try:
+            preview = self.ssis.promote_students(program_rules, default_rule, dry_run=True)
+        
+        except ValueError as error:
+            messagebox.showerror('Cannot Promote Students', str(error))
+            return
+        
+        if not preview.before:
+            messagebox.showinfo('Promote Students', 'There are no students to promote.')
+            return
+        
+        graduates_text = (
+            'Graduates are unenrolled.' if default_rule.graduates == 'unenroll' 
+            else 'Graduates stay in their final year and are not marked as graduated.'
+        )
+        
+        if not messagebox.askyesno(
+            'Promote Students',
+            f'{preview.summary()}\n\n{graduates_text} Promote every student now?'
+        ):
+            return
+        
+        try:
+            promotion = self.ssis.promote_students(program_rules, default_rule)
+        
+        except (OrphanedStudentError, ValueError) as error:
+            # Nothing was changed, the transaction rolled back
+            messagebox.showerror('Cannot Promote Students', str(error))
+            return
+        
+        if not messagebox.askyesno(
+            'Students Promoted',
+            f'{len(promotion.before)} student(s) were changed. Keep the changes?'
+        ):
+            try:
+                self.ssis.undo_promotion(promotion)
+            
+            except OrphanedStudentError as error:
+                messagebox.showerror('Cannot Undo Promotion', str(error))
+    
+    def ask_promotion_rules(self) -> tuple[PromotionRule, dict[str, PromotionRule]] | None:
+        # Programs last different numbers of years, so the final year is asked for, with exceptions per program
+        final_year = simpledialog.askinteger(
+            'Promote Students',
+            'Final year level of most programs:',
+            parent=self.gui,
+            minvalue=Student.MIN_YEAR,
+            maxvalue=Student.MAX_YEAR,
+            initialvalue=SSISController.PROMOTION_FINAL_YEAR
+        )
+        
+        if final_year is None:
+            return None
+        
+        exceptions = simpledialog.askstring(
+            'Promote Students',
+            'Programs with another final year level, e.g. "BSCE=5, BSARCH=5".\nLeave blank if there are none:',
+            parent=self.gui
+        )
+        
+        if exceptions is None:
+            return None
+        
+        program_years = {}
+        
+        for exception in filter(None, (item.strip() for item in exceptions.split(','))):
+            code, _, year = (part.strip() for part in exception.partition('='))
+            
+            if code.upper() not in self.ssis.programs or not (year.isascii() and year.isdigit()) or not Student.valid_year(int(year)):
+                messagebox.showerror(
+                    'Invalid Final Year',
+                    f'"{exception}" is not a program code and a year level from {Student.MIN_YEAR} to {Student.MAX_YEAR}.'
+                )
+                return None
+            
+            program_years[code.upper()] = int(year)
+        
+        unenroll = messagebox.askyesnocancel(
+            'Promote Students',
+            'Unenroll graduates from their programs?\n\n'
+            'Yes unenrolls them. No keeps them in their final year, not marked as graduated, '
+            'so later promotions cannot tell them apart from students still in that year.'
+        )
+        
+        if unenroll is None:
+            return None
+        
+        graduates = 'unenroll' if unenroll else 'keep'
+        
+        return (
+            PromotionRule(final_year, graduates), 
+            {code: PromotionRule(year, graduates) for code, year in program_years.items()}
+        )
+    
+    def dialog(self, controller_class: type[Dialog]) -> Dialog:
+        # Each dialog is built once and hidden when closed, so opening it again only refills its fields
+        if controller_class not in self.dialogs:
+            self.dialogs[controller_class] = controller_class(self.ssis, controller_class.WINDOW(self.gui), self)  # type: ignore
+        
+        return self.dialogs[controller_class]  # type: ignore
+    
     def add_student_button_pressed(self) -> None:
-        AddStudentController(self.ssis, AddStudentWindow(self.gui), self)
+        self.dialog(AddStudentController).open()
     
     def add_program_button_pressed(self, add_student_controller: AddStudentController | None = None) -> None:
-        AddProgramController(self.ssis, AddProgramWindow(self.gui), self, add_student_controller)
+        self.dialog(AddProgramController).open(add_student_controller)
         
     def set_context_menus(self) -> None:
         self.student_menu = Menu(self.gui.student_tab, tearoff=0)
@@ -534,7 +1214,10 @@ class SSISController:
         student_id = self.gui.student_list.identify_row(event.y)
         
         if student_id:
-            self.gui.student_list.selection_set(student_id)
+            # Right-clicking inside a multiple selection acts on the whole selection
+            if student_id not in self.gui.student_list.selection():
+                self.gui.student_list.selection_set(student_id)
+            
             self.student_menu.post(event.x_root, event.y_root)
     
     def show_program_menu(self, event: Event) -> None:
@@ -545,35 +1228,74 @@ class SSISController:
             self.program_menu.post(event.x_root, event.y_root)
     
     def edit_student(self) -> None:
-        EditStudentController(
-            self.ssis, 
-            AddStudentWindow(self.gui), 
-            self, 
-            self.gui.student_list.selection()[0]
+        self.dialog(EditStudentController).open(self.gui.student_list.selection()[0])
+    
+    def change_program_of_selected(self) -> None:
+        student_ids = list(self.gui.student_list.selection())
+        
+        ChangeProgramController(self.ssis, ChangeProgramWindow(self.gui, len(student_ids)), self, student_ids)
+    
+    def change_year_of_selected(self) -> None:
+        student_ids = list(self.gui.student_list.selection())
+        
+        year = simpledialog.askinteger(
+            'Change Year',
+            f'New year level for {len(student_ids)} student(s):',
+            parent=self.gui,
+            minvalue=Student.MIN_YEAR,
+            maxvalue=Student.MAX_YEAR
         )
+        
+        if year is not None:
+            self.change_students(student_ids, year=year)
+    
+    def change_students(self, student_ids: list[str], year: int | None = None, program_code: str | None = None) -> None:
+        # All students are replaced in one model call, then the page is refreshed once
+        students = [self.ssis.get_student_by_id(student_id) for student_id in student_ids]
+        
+        try:
+            self.ssis.update_students(
+                Student(
+                    id=student.id,
+                    name=student.name,
+                    year=year or student.year,
+                    gender=student.gender,  # type: ignore
+                    program_code=program_code or student.program_code
+                )
+                for student in students
+            )
+        
+        except OrphanedStudentError as error:
+            # Nothing was changed, the transaction rolled back
+            messagebox.showerror('Program Not Found', str(error))
+            return
+        
+        # The model's change event has already refreshed the page
+        for student_id in student_ids:
+            if self.gui.student_list.exists(student_id):
+                self.gui.student_list.selection_add(student_id)
     
     def edit_program(self) -> None:
-        EditProgramController(
-            self.ssis, 
-            AddProgramWindow(self.gui),
-            self,
-            self.gui.program_list.selection()[0]
-        )
+        self.dialog(EditProgramController).open(self.gui.program_list.selection()[0])
     
     def delete_student(self) -> None:
-        student = self.ssis.get_student_by_id(id := self.gui.student_list.selection()[0])
+        student_ids = self.gui.student_list.selection()
         
-        if messagebox.askyesno(
-            'Delete Student',
-            f'Are you sure you want to delete student "{student.id}" with:\n\tName "{student.name_formatted}",\n\tYear "{student.year}",\n\tGender "{student.gender}",\n\tProgram Code "{student.program_code}"'
-        ):
-            student = self.ssis.delete_student_by_id(id)
+        if len(student_ids) == 1:
+            student = self.ssis.get_student_by_id(student_ids[0])
             
-            self.load_students()
+            question = f'Are you sure you want to delete student "{student.id}" with:\n\tName "{student.name_formatted}",\n\tYear "{student.year}",\n\tGender "{student.gender}",\n\tProgram Code "{student.program_code}"'
+        
+        else:
+            question = f'Are you sure you want to delete these {len(student_ids)} students?\n\t' + ', '.join(student_ids[:10]) + ', ...' * (len(student_ids) > 10)
+        
+        if messagebox.askyesno('Delete Student', question):
+            # One model call and one refresh however many students are selected
+            students = self.ssis.delete_students_by_id(student_ids)
         
             messagebox.showinfo(
                 'Student Deleted Successfully',
-                f'Student "{student.id}" was deleted successfully!'
+                f'Student "{students[0].id}" was deleted successfully!' if len(students) == 1 else f'{len(students)} students were deleted successfully!'
             )
     
     def delete_program(self) -> None:
@@ -581,12 +1303,16 @@ class SSISController:
         
         if messagebox.askyesno(
             'Delete Program',
-            f'Are you sure you want to delete the program "{program}" ?'
+            f'Are you sure you want to delete the program "{program}" ?\nIts students will be unenrolled.'
         ):
-            program = self.ssis.delete_program_by_code(code)
+            try:
+                with self.ssis.transaction():
+                    self.ssis.move_program_students(code, None)
+                    program = self.ssis.delete_program_by_code(code)
             
-            self.load_programs()
-            self.load_students()
+            except OrphanedStudentError as error:
+                messagebox.showerror('Program Not Deleted', str(error))
+                return
         
             messagebox.showinfo(
                 'Program Deleted Successfully',
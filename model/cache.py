@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import sys
+
+class QueryCache:
+    """
+    Least recently used cache of query results, each tagged with the version of
+    the data it was computed from.
+
+    A result is only served while the version it was stored with is current, so
+    bumping a table's version on every change invalidates all of its results at
+    once without visiting them. Stale results are replaced when their query runs
+    again, or evicted as they age. The cache is bounded both by its number of
+    entries and by an approximate size in bytes.
+    """
+    
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int, optional): Maximum number of results kept. Defaults to 256.
+            max_bytes (int, optional): Maximum approximate size of the results kept. Defaults to 16 MiB.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        
+        # Version, result and approximate size by key, least recently used first
+        self.entries: OrderedDict[Hashable, tuple[Hashable, Any, int]] = OrderedDict()
+        self.size = 0
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    @staticmethod
+    def approximate_size(key: Hashable, result: Any) -> int:
+        """
+        Estimate the memory an entry holds.
+
+        Only the key and the result container are counted, not the records the
+        result refers to, which are shared with the tables.
+
+        Args:
+            key (Hashable): Key of the entry.
+            result (Any): Result of the query.
+
+        Returns:
+            int: Approximate size in bytes.
+        """
+        return sys.getsizeof(key) + sys.getsizeof(result)
+    
+    def get(self, key: Hashable, version: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get the result of a query, computing and storing it unless a current one is cached.
+
+        Results are shared between callers, so they should be immutable, e.g. tuples.
+
+        Args:
+            key (Hashable): Normalized query, equal for queries that always give the same result.
+            version (Hashable): Current version of the data the query reads.
+            compute (Callable[[], Any]): Runs the query.
+
+        Returns:
+            Any: Result of the query.
+        """
+        found, result = self.lookup(key, version)
+        
+        if not found:
+            result = compute()
+            self.store(key, version, result)
+        
+        return result
+    
+    def lookup(self, key: Hashable, version: Hashable) -> tuple[bool, Any]:
+        """
+        Get the cached result of a query, for queries computed piecemeal by the caller.
+
+        Args:
+            key (Hashable): Normalized query, see get.
+            version (Hashable): Current version of the data the query reads.
+
+        Returns:
+            tuple[bool, Any]: Whether a current result is cached, and the result or None.
+        """
+        entry = self.entries.get(key)
+        
+        if entry is not None and entry[0] == version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            
+            return True, entry[1]
+        
+        self.misses += 1
+        
+        return False, None
+    
+    def store(self, key: Hashable, version: Hashable, result: Any) -> None:
+        """
+        Cache the result of a query, replacing any older result of it.
+
+        Args:
+            key (Hashable): Normalized query, see get.
+            version (Hashable): Version of the data the result was computed from.
+            result (Any): Result of the query, immutable as in get.
+        """
+        if (entry := self.entries.pop(key, None)) is not None:
+            self.size -= entry[2]
+        
+        size = QueryCache.approximate_size(key, result)
+        
+        # A result larger than the whole cache would only evict everything else
+        if size <= self.max_bytes:
+            self.entries[key] = (version, result, size)
+            self.size += size
+            
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self.size -= self.entries.popitem(last=False)[1][2]
+    
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self.entries.clear()
+        self.size = 0
@@ -0,0 +1,355 @@
+from model.student import Student
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, MutableMapping, ValuesView
+from typing import Iterable, Iterator, Optional, Sequence
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+USAGE = 'Usage: python -m model.columnar [ROWS]'
+
+class StudentColumns(MutableMapping[str, Student]):
+    """
+    Compact store of students by ID, kept as one array per field.
+
+    IDs are packed into 32-bit numbers and kept sorted, and every other field is
+    a small number: years and genders directly, and name parts and program codes
+    as indexes into a table of interned strings, so a surname shared by a
+    thousand students is stored once. A Student is only built when a record is
+    read, and changing it afterwards does not change the store.
+
+    Inserting IDs in ascending order, as saved files are, appends to the
+    arrays. Other inserts and deletions shift the arrays in memory, which is
+    fast but grows with the number of students. Strings are never removed from
+    the table.
+    """
+    
+    # Columns holding indexes into the string table, in name order
+    NAME_COLUMNS = ('surnames', 'firstnames', 'middlenames', 'suffixes')
+    
+    def __init__(self, students: Iterable[Student] = ()) -> None:
+        """
+        Create a store, optionally filled with students.
+
+        Args:
+            students (Iterable[Student], optional): Students to store. Defaults to none.
+        """
+        self.ids = array('I')
+        self.years = array('B')
+        self.genders = array('B')
+        self.program_codes = array('I')
+        self.surnames = array('I')
+        self.firstnames = array('I')
+        self.middlenames = array('I')
+        self.suffixes = array('I')
+        
+        # String 0 stands for a blank or missing value
+        self.strings: list[Optional[str]] = [None]
+        self.string_numbers: dict[str, int] = {}
+        
+        for student in students:
+            self[student.id] = student
+    
+    def __columns(self) -> tuple[array, ...]:
+        """List every column, in record order."""
+        return (
+            self.ids, self.years, self.genders, self.program_codes,
+            self.surnames, self.firstnames, self.middlenames, self.suffixes
+        )
+    
+    @staticmethod
+    def id_number(student_id: str) -> int:
+        """
+        Pack a YYYY-NNNN student ID into a number that sorts the same way.
+
+        Args:
+            student_id (str): Student ID.
+
+        Returns:
+            int: Digits of the ID as one number.
+
+        Raises:
+            ValueError: If the ID is not of the form YYYY-NNNN.
+        """
+        digits = student_id[:4] + student_id[5:]
+        
+        if len(student_id) != 9 or student_id[4] != '-' or not (digits.isascii() and digits.isdigit()):
+            raise ValueError(f'{student_id!r} cannot be stored in columns, IDs must be of the form YYYY-NNNN.')
+        
+        return int(digits)
+    
+    def __intern(self, text: Optional[str]) -> int:
+        """Get the number of a string in the table, adding it if needed."""
+        if not text:
+            return 0
+        
+        if (number := self.string_numbers.get(text)) is None:
+            number = self.string_numbers[text] = len(self.strings)
+            self.strings.append(sys.intern(text))
+        
+        return number
+    
+    def __row(self, student: Student) -> tuple[int, ...]:
+        """Encode a student as one value per column."""
+        return (
+            StudentColumns.id_number(student.id),
+            student.year,
+            Student.VALID_GENDER_OPTIONS.index(student.gender),
+            self.__intern(student.program_code),
+            *(self.__intern(part) for part in student.name)
+        )
+    
+    def __position(self, student_id: str) -> tuple[int, bool]:
+        """Find where an ID is or would be stored, and whether it is there."""
+        try:
+            number = StudentColumns.id_number(student_id)
+        
+        except ValueError:
+            return 0, False
+        
+        position = bisect_left(self.ids, number)
+        
+        return position, position < len(self.ids) and self.ids[position] == number
+    
+    def student_at(self, position: int) -> Student:
+        """
+        Build the student stored at a position.
+
+        Args:
+            position (int): Zero-based position, in ID order.
+
+        Returns:
+            Student: Student stored there.
+        """
+        number = self.ids[position]
+        strings = self.strings
+        
+        # Only valid students are stored, so they are not checked again
+        return Student.trusted(
+            id=f'{number // 10000:04d}-{number % 10000:04d}',
+            name=(
+                strings[self.surnames[position]],  # type: ignore
+                strings[self.firstnames[position]],  # type: ignore
+                strings[self.middlenames[position]],
+                strings[self.suffixes[position]]
+            ),
+            year=self.years[position],
+            gender=Student.VALID_GENDER_OPTIONS[self.genders[position]],
+            program_code=strings[self.program_codes[position]]
+        )
+    
+    def __getitem__(self, student_id: str) -> Student:
+        position, found = self.__position(student_id)
+        
+        if not found:
+            raise KeyError(student_id)
+        
+        return self.student_at(position)
+    
+    def __setitem__(self, student_id: str, student: Student) -> None:
+        if student_id != student.id:
+            raise ValueError(f'Student {student.id!r} cannot be stored under ID {student_id!r}.')
+        
+        row = self.__row(student)
+        columns = self.__columns()
+        
+        # Appending is the common case when loading a file saved in ID order
+        if not self.ids or row[0] > self.ids[-1]:
+            for column, value in zip(columns, row):
+                column.append(value)
+            
+            return
+        
+        position, found = self.__position(student_id)
+        
+        for column, value in zip(columns, row):
+            if found:
+                column[position] = value
+            else:
+                column.insert(position, value)
+    
+    def __delitem__(self, student_id: str) -> None:
+        position, found = self.__position(student_id)
+        
+        if not found:
+            raise KeyError(student_id)
+        
+        for column in self.__columns():
+            del column[position]
+    
+    def __contains__(self, student_id: object) -> bool:
+        return isinstance(student_id, str) and self.__position(student_id)[1]
+    
+    def __iter__(self) -> Iterator[str]:
+        return (f'{number // 10000:04d}-{number % 10000:04d}' for number in self.ids)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def values(self) -> ValuesView[Student]:
+        return StudentColumnValues(self)
+    
+    def memory_usage(self) -> int:
+        """
+        Estimate the memory held by the store.
+
+        Returns:
+            int: Bytes used by the arrays, the string table and its strings.
+        """
+        arrays = sum(sys.getsizeof(column) for column in self.__columns())
+        strings = sys.getsizeof(self.strings) + sys.getsizeof(self.string_numbers)
+        strings += sum(sys.getsizeof(string) for string in self.strings if string)
+        
+        return arrays + strings
+
+class RowFingerprints(Mapping[str, int]):
+    """
+    Compact, read-only map from student IDs to the fingerprints of their CSV rows.
+
+    IDs are packed into numbers as in StudentColumns and kept sorted in one array,
+    next to an array of the fingerprints, so each row takes 12 bytes instead of an
+    ID string, an int and a dict slot. IDs that are not of the form YYYY-NNNN
+    cannot be packed and are left out, so their rows always look changed.
+    """
+    
+    def __init__(self, fingerprints: Mapping[str, int]) -> None:
+        """
+        Pack fingerprints.
+
+        Args:
+            fingerprints (Mapping[str, int]): Fingerprint of each row by student ID.
+        """
+        pairs = []
+        
+        for student_id, fingerprint in fingerprints.items():
+            try:
+                pairs.append((StudentColumns.id_number(student_id), fingerprint))
+            
+            except ValueError:
+                continue
+        
+        pairs.sort()
+        
+        self.ids = array('I', (number for number, _ in pairs))
+        self.fingerprints = array('q', (fingerprint for _, fingerprint in pairs))
+    
+    def __getitem__(self, student_id: str) -> int:
+        try:
+            number = StudentColumns.id_number(student_id)
+        
+        except ValueError:
+            raise KeyError(student_id) from None
+        
+        position = bisect_left(self.ids, number)
+        
+        if position == len(self.ids) or self.ids[position] != number:
+            raise KeyError(student_id)
+        
+        return self.fingerprints[position]
+    
+    def __iter__(self) -> Iterator[str]:
+        return (f'{number // 10000:04d}-{number % 10000:04d}' for number in self.ids)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class StudentColumnValues(ValuesView[Student]):
+    """Students of a StudentColumns store, built in ID order without looking each one up."""
+    
+    _mapping: StudentColumns
+    
+    def __iter__(self) -> Iterator[Student]:
+        return (self._mapping.student_at(position) for position in range(len(self._mapping)))
+
+def _sample_students(count: int) -> Iterator[Student]:
+    """Generate students with realistic repetition of names, genders and programs, in ID order."""
+    rng = random.Random(0)
+    
+    surnames = [f'SURNAME{number}' for number in range(5000)]
+    firstnames = [f'FIRSTNAME{number}' for number in range(2000)]
+    programs = [f'PROG{number}' for number in range(60)]
+    
+    for number in range(count):
+        yield Student(
+            id=f'{2000 + number // 10000:04d}-{number % 10000:04d}',
+            name=(rng.choice(surnames), rng.choice(firstnames), rng.choice(surnames), None),
+            year=rng.randint(Student.MIN_YEAR, Student.MAX_YEAR),
+            gender=rng.choice(Student.VALID_GENDER_OPTIONS),  # type: ignore
+            program_code=rng.choice(programs)
+        )
+
+def memory_report(count: int) -> dict:
+    """
+    Measure the memory per record of an SSIS loaded with each store.
+
+    The same generated students are saved to a CSV file, which is then loaded
+    by SSIS once with the dict store and once with the columnar store. Each load
+    is measured with tracemalloc, which counts every object the SSIS keeps
+    alive: the store itself, and the indexes and row fingerprints kept next to it.
+
+    Args:
+        count (int): Number of students to load.
+
+    Returns:
+        dict: Rows, bytes per record with each store and the ratio between them, ready to be written as JSON.
+    """
+    # Imported here, as the SSIS module imports this one
+    from model.ssis import SSIS
+    
+    report: dict = {'rows': count}
+    
+    with tempfile.TemporaryDirectory() as directory:
+        programs_path = os.path.join(directory, 'programs.csv')
+        students_path = os.path.join(directory, 'students.csv')
+        
+        with open(programs_path, 'w', newline='', encoding='utf-8') as programs_file:
+            writer = csv.writer(programs_file)
+            writer.writerow(SSIS.PROGRAM_FIELD_NAMES)
+            writer.writerows((f'PROG{number}', f'PROGRAM NUMBER {number:04d}') for number in range(60))
+        
+        with open(students_path, 'w', newline='', encoding='utf-8') as students_file:
+            writer = csv.writer(students_file)
+            writer.writerow(SSIS.STUDENT_FIELD_NAMES)
+            writer.writerows(
+                (student.id, *(part or '' for part in student.name), student.year, student.gender, student.program_code) 
+                for student in _sample_students(count)
+            )
+        
+        for store in ('dict', 'columnar'):
+            tracemalloc.start()
+            
+            ssis = SSIS(programs_path, students_path, store=store)  # type: ignore
+            report[f'{store}_bytes_per_record'] = round(tracemalloc.get_traced_memory()[0] / count, 1)
+            
+            tracemalloc.stop()
+            del ssis
+    
+    report['ratio'] = round(report['dict_bytes_per_record'] / report['columnar_bytes_per_record'], 1)
+    
+    return report
+
+def main(argv: Sequence[str]) -> int:
+    """
+    Print the memory report, as JSON, for a number of rows, one million by default.
+
+    Args:
+        argv (Sequence[str]): Command line arguments, see USAGE.
+
+    Returns:
+        int: Exit status.
+    """
+    if len(argv) > 1 or (argv and not argv[0].isdigit()):
+        print(USAGE, file=sys.stderr)
+        return 2
+    
+    print(json.dumps(memory_report(int(argv[0]) if argv else 1_000_000)))
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+from model.student import Student
+from model.index import TrigramIndex
+from itertools import combinations
+from typing import Iterable, NamedTuple
+
+# Soundex digit of each consonant, vowels and H, W, Y have none
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6'
+}
+
+class DuplicateCandidate(NamedTuple):
+    """Two students that may be the same person, with how similar their records are from 0 to 1."""
+    
+    score: float
+    student_id: str
+    other_student_id: str
+
+def soundex(text: str) -> str:
+    """
+    Encode a word by how it sounds, so that spelling variants share a code.
+
+    Args:
+        text (str): Word to encode. Case and characters other than letters are ignored.
+
+    Returns:
+        str: American Soundex code, e.g. "R163" for both "ROBERT" and "RUPERT", or "" for no letters.
+    """
+    letters = [letter for letter in text.upper() if 'A' <= letter <= 'Z']
+    
+    if not letters:
+        return ''
+    
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        
+        if digit and digit != previous:
+            code += digit
+            
+            if len(code) == 4:
+                break
+        
+        # H and W do not separate letters with the same digit, vowels do
+        if letter not in 'HW':
+            previous = digit
+    
+    return code.ljust(4, '0')
+
+def blocking_key(student: Student) -> tuple[str, str]:
+    """
+    Get the key of the block a student is compared within.
+
+    Args:
+        student (Student): Student to get the key of.
+
+    Returns:
+        tuple[str, str]: Soundex code of the surname and first initial.
+    """
+    surname, firstname, _, _ = student.name
+    
+    return (soundex(surname), firstname[:1].upper())
+
+def similarity(student: Student, other: Student) -> float:
+    """
+    Score how likely two student records are to describe the same person.
+
+    Args:
+        student (Student): First student.
+        other (Student): Second student.
+
+    Returns:
+        float: Dice coefficient of the trigrams of the full names, from 0 to 1,
+            scaled down by a tenth if the genders differ.
+    """
+    return _score(_name_trigrams(student), _name_trigrams(other), student.gender == other.gender)
+
+def _name_trigrams(student: Student) -> set[str]:
+    """Split the full name of a student into trigrams."""
+    return TrigramIndex.trigrams(' '.join(part for part in student.name if part))
+
+def _score(grams: set[str], other_grams: set[str], same_gender: bool) -> float:
+    """Score two names split into trigrams, see similarity."""
+    if not (grams and other_grams):
+        return 0.0
+    
+    score = 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+    
+    return score if same_gender else score * 0.9
+
+def find_duplicates(students: Iterable[Student], threshold: float = 0.8) -> list[DuplicateCandidate]:
+    """
+    Find pairs of students that are probably the same person.
+
+    Students are grouped into blocks by blocking_key in one pass and pairs are
+    only scored within a block, so the work grows with the sizes of the blocks
+    rather than with the square of the number of students. Pairs whose
+    surnames sound different or whose first initials differ are never compared.
+
+    Args:
+        students (Iterable[Student]): Students to check.
+        threshold (float, optional): Minimum similarity of a reported pair. Defaults to 0.8.
+
+    Returns:
+        list[DuplicateCandidate]: Candidate pairs, most similar first, the lower ID first in each pair.
+    """
+    blocks: dict[tuple[str, str], list[Student]] = {}
+    
+    for student in students:
+        blocks.setdefault(blocking_key(student), []).append(student)
+    
+    candidates = []
+    
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        
+        # Each name is split once per block rather than once per pair
+        members = [(student, _name_trigrams(student)) for student in sorted(block, key=lambda student: student.id)]
+        
+        for (student, grams), (other, other_grams) in combinations(members, 2):
+            if (score := _score(grams, other_grams, student.gender == other.gender)) >= threshold:
+                candidates.append(DuplicateCandidate(round(score, 4), student.id, other.id))
+    
+    candidates.sort(key=lambda candidate: (-candidate.score, candidate.student_id, candidate.other_student_id))
+    
+    return candidates
@@ -0,0 +1,246 @@
+from __future__ import annotations
+from model.student import Student
+from typing import Callable, Iterable, NamedTuple, Optional
+import json
+
+# Year level and program code of a student, the fields whose history is kept
+EnrollmentState = tuple[int, Optional[str]]
+
+class Enrollment(NamedTuple):
+    """Year level and program of a student at some point in time."""
+    
+    student_id: str
+    year: int
+    program_code: Optional[str]
+
+def enrollment_state(student: Optional[Student]) -> Optional[EnrollmentState]:
+    """
+    Get the part of a student's record whose history is kept.
+
+    Args:
+        student (Optional[Student]): Student, or None for a student that does not exist.
+
+    Returns:
+        Optional[EnrollmentState]: Year level and program code, or None if there is no student.
+    """
+    return None if student is None else (student.year, student.program_code)
+
+class EnrollmentHistory:
+    """
+    Year levels and programs of students over academic terms, kept as deltas.
+
+    Each term stores only the students whose year level or program changed
+    during it, with their state at the end of the term, or None if they were
+    deleted. Every CHECKPOINT_INTERVAL terms, the state of every student at the
+    start of the term is stored as a checkpoint, so a query replays the deltas
+    of at most that many terms instead of the whole history, and no term keeps
+    a full copy of the table otherwise.
+
+    The history is saved as JSON lines, one per started term and one per batch
+    of changes, and only the lines added since the last save are appended.
+    """
+    
+    CHECKPOINT_INTERVAL = 8
+    
+    def __init__(self) -> None:
+        self.terms: list[str] = []
+        self.term_positions: dict[str, int] = {}
+        
+        # State at the start of a term by term position, and changes during each term
+        self.checkpoints: dict[int, dict[str, EnrollmentState]] = {}
+        self.deltas: list[dict[str, Optional[EnrollmentState]]] = []
+        
+        # Lines not saved yet, in the order they happened
+        self.unsaved: list[dict] = []
+    
+    @property
+    def current_term(self) -> Optional[str]:
+        """Term changes are recorded in, or None before the first term is started."""
+        return self.terms[-1] if self.terms else None
+    
+    def start_term(self, term: str, enrollments: Callable[[], Iterable[Enrollment]]) -> None:
+        """
+        Start recording changes in a new term, after every earlier one.
+
+        Args:
+            term (str): Name of the term, e.g. "2024-2025 1st semester".
+            enrollments (Callable[[], Iterable[Enrollment]]): Lists every student as they are now.
+                Only called when the term needs a checkpoint.
+
+        Raises:
+            ValueError: If the name is blank or a term with the name was already started.
+        """
+        if not term.strip():
+            raise ValueError('Term name cannot be blank.')
+        
+        if term in self.term_positions:
+            raise ValueError(f'Term {term!r} was already started.')
+        
+        position = len(self.terms)
+        line: dict = {'term': term}
+        
+        last_checkpoint = max(self.checkpoints, default=None)
+        
+        if last_checkpoint is None or position - last_checkpoint >= EnrollmentHistory.CHECKPOINT_INTERVAL:
+            checkpoint = {enrollment.student_id: (enrollment.year, enrollment.program_code) for enrollment in enrollments()}
+            
+            self.checkpoints[position] = checkpoint
+            line['checkpoint'] = checkpoint
+        
+        self.terms.append(term)
+        self.term_positions[term] = position
+        self.deltas.append({})
+        self.unsaved.append(line)
+    
+    def record(self, student_id: str, state: Optional[EnrollmentState]) -> None:
+        """
+        Record the new state of a student in the current term. Nothing is recorded before the first term.
+
+        Args:
+            student_id (str): Student ID.
+            state (Optional[EnrollmentState]): New year level and program code, or None if the student was deleted.
+        """
+        if not self.terms:
+            return
+        
+        self.deltas[-1][student_id] = state
+        
+        # Changes made between two saves are appended as one line
+        if not self.unsaved or 'changes' not in self.unsaved[-1]:
+            self.unsaved.append({'term': self.terms[-1], 'changes': {}})
+        
+        self.unsaved[-1]['changes'][student_id] = state
+    
+    def as_of(self, term: str) -> dict[str, EnrollmentState]:
+        """
+        Rebuild the state of every student at the end of a term.
+
+        Args:
+            term (str): Name of a started term. The current term gives the state now.
+
+        Returns:
+            dict[str, EnrollmentState]: Year level and program code of each student enrolled then, by ID.
+
+        Raises:
+            KeyError: If no term has the name.
+        """
+        position = self.term_positions[term]
+        start = max(checkpoint for checkpoint in self.checkpoints if checkpoint <= position)
+        
+        states = dict(self.checkpoints[start])
+        
+        for delta in self.deltas[start:position + 1]:
+            for student_id, state in delta.items():
+                if state is None:
+                    states.pop(student_id, None)
+                else:
+                    states[student_id] = state
+        
+        return states
+    
+    def roster(self, program_code: str, term: str) -> list[Enrollment]:
+        """
+        List the students of a program at the end of a term.
+
+        Args:
+            program_code (str): Code the program had then.
+            term (str): Name of a started term.
+
+        Returns:
+            list[Enrollment]: Students of the program, in ID order.
+
+        Raises:
+            KeyError: If no term has the name.
+        """
+        return [
+            Enrollment(student_id, year, code)
+            for student_id, (year, code) in sorted(self.as_of(term).items()) if code == program_code
+        ]
+    
+    def student_history(self, student_id: str) -> list[tuple[str, Optional[Enrollment]]]:
+        """
+        List the terms in which a student's year level or program changed.
+
+        Args:
+            student_id (str): Student ID.
+
+        Returns:
+            list[tuple[str, Optional[Enrollment]]]: Each term with the student's state at its end,
+                or None if the student was deleted, oldest first. The first term lists the state the
+                history starts with, if the student was enrolled then.
+        """
+        history = []
+        
+        if self.terms and (state := self.checkpoints[0].get(student_id)) is not None:
+            history.append((self.terms[0], Enrollment(student_id, *state)))
+        
+        for term, delta in zip(self.terms, self.deltas):
+            if student_id in delta:
+                state = delta[student_id]
+                entry = (term, None if state is None else Enrollment(student_id, *state))
+                
+                # A change in the first term replaces the state it started with
+                if history and history[-1][0] == term:
+                    history[-1] = entry
+                else:
+                    history.append(entry)
+        
+        return history
+    
+    @classmethod
+    def load(cls, path: str) -> EnrollmentHistory:
+        """
+        Read a saved history. A missing file gives an empty history.
+
+        Args:
+            path (str): Path of the history file.
+
+        Returns:
+            EnrollmentHistory: History read from the file.
+        """
+        history = cls()
+        
+        try:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    
+                    except json.JSONDecodeError:
+                        break  # Only the last line can be partly written
+                    
+                    if 'changes' not in entry:
+                        position = history.term_positions[entry['term']] = len(history.terms)
+                        
+                        history.terms.append(entry['term'])
+                        history.deltas.append({})
+                        
+                        if 'checkpoint' in entry:
+                            history.checkpoints[position] = {key: tuple(state) for key, state in entry['checkpoint'].items()}  # type: ignore
+                        
+                        continue
+                    
+                    delta = history.deltas[history.term_positions[entry['term']]]
+                    
+                    for student_id, state in entry['changes'].items():
+                        delta[student_id] = None if state is None else tuple(state)
+        
+        except FileNotFoundError:
+            pass
+        
+        return history
+    
+    def save(self, path: str) -> None:
+        """
+        Append the terms and changes recorded since the last save to the history file.
+
+        Args:
+            path (str): Path of the history file, created if missing.
+        """
+        if not self.unsaved:
+            return
+        
+        with open(path, 'a', encoding='utf-8') as file:
+            file.writelines(json.dumps(line) + '\n' for line in self.unsaved)
+        
+        self.unsaved.clear()
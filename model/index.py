@@ -0,0 +1,347 @@
+from __future__ import annotations
+from bisect import bisect_left, insort
+from math import ceil
+from typing import Any, Callable, Iterator, Literal, Optional
+
+class SortIndex:
+    """
+    Sorted list of (sort key, record key) pairs kept up to date as records change.
+
+    The record key breaks ties, so the order is total and a pair can be located
+    with a binary search when it has to be removed.
+    """
+    
+    def __init__(self) -> None:
+        self.entries: list[tuple[Any, str]] = []
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def build(self, pairs: Iterator[tuple[Any, str]]) -> None:
+        """
+        Replace the contents of the index with the given pairs.
+
+        Args:
+            pairs (Iterator[tuple[Any, str]]): (sort key, record key) pairs in any order.
+        """
+        self.entries = sorted(pairs)
+    
+    def add(self, sort_key: Any, key: str) -> None:
+        """
+        Add a record to the index.
+
+        Args:
+            sort_key (Any): Sort key of the record.
+            key (str): Record key.
+        """
+        insort(self.entries, (sort_key, key))
+    
+    def remove(self, sort_key: Any, key: str) -> None:
+        """
+        Remove a record from the index.
+
+        Args:
+            sort_key (Any): Sort key the record was added with.
+            key (str): Record key.
+        """
+        position = self.position(sort_key, key)
+        
+        if position < len(self.entries) and self.entries[position] == (sort_key, key):
+            del self.entries[position]
+    
+    def position(self, sort_key: Any, key: str) -> int:
+        """
+        Find the position of a record in ascending sort order.
+
+        Args:
+            sort_key (Any): Sort key of the record.
+            key (str): Record key.
+
+        Returns:
+            int: Number of entries that sort before the record.
+        """
+        return bisect_left(self.entries, (sort_key, key))
+    
+    def keys(self, descending: bool = False) -> Iterator[str]:
+        """
+        Iterate over the record keys in sort order.
+
+        Args:
+            descending (bool, optional): Iterate from the largest sort key. Defaults to False.
+
+        Returns:
+            Iterator[str]: Record keys in sort order.
+        """
+        entries = reversed(self.entries) if descending else self.entries
+        
+        return (key for _, key in entries)
+
+class PrefixIndex(SortIndex):
+    """Sort index over text keys that can list the records whose text starts with a prefix."""
+    
+    def starting_with(self, prefix: str) -> Iterator[tuple[str, str]]:
+        """
+        Iterate over the entries whose text starts with a prefix.
+
+        Args:
+            prefix (str): Prefix to match.
+
+        Returns:
+            Iterator[tuple[str, str]]: (text, record key) pairs in text order.
+        """
+        position = bisect_left(self.entries, (prefix,))
+        
+        while position < len(self.entries) and self.entries[position][0].startswith(prefix):
+            yield self.entries[position]
+            position += 1
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to the keys of the texts containing them.
+
+    Each word is padded before it is split into trigrams, so the start and end of
+    words carry extra weight. A search only verifies keys found in the rarest
+    posting lists of the query, which is enough to find every key that can reach
+    the similarity threshold.
+    """
+    
+    def __init__(self) -> None:
+        self.postings: dict[str, set[str]] = {}
+        self.gram_counts: dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.gram_counts)
+    
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        """
+        Split a text into its distinct trigrams.
+
+        Args:
+            text (str): Text to split. Case is ignored.
+
+        Returns:
+            set[str]: Trigrams of the padded words of the text.
+        """
+        grams = set()
+        
+        for word in text.upper().split():
+            padded = f'  {word} '
+            
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        
+        return grams
+    
+    def add(self, key: str, text: str) -> None:
+        """
+        Index a text under a key.
+
+        Args:
+            key (str): Key of the text.
+            text (str): Text to index.
+        """
+        grams = TrigramIndex.trigrams(text)
+        
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+        
+        self.gram_counts[key] = len(grams)
+    
+    def remove(self, key: str, text: str) -> None:
+        """
+        Remove a text from the index.
+
+        Args:
+            key (str): Key of the text.
+            text (str): Text the key was indexed with.
+        """
+        for gram in TrigramIndex.trigrams(text):
+            posting = self.postings.get(gram)
+            
+            if posting is not None:
+                posting.discard(key)
+                
+                if not posting:
+                    del self.postings[gram]
+        
+        self.gram_counts.pop(key, None)
+    
+    def search(self, text: str, limit: int = 10, threshold: float = 0.6) -> list[tuple[str, float]]:
+        """
+        Find the keys of the texts most similar to a query.
+
+        The score is the fraction of the query's trigrams found in the indexed
+        text. Equal scores are ranked by the Dice coefficient, which prefers
+        texts of similar length to the query.
+
+        Args:
+            text (str): Query text.
+            limit (int, optional): Maximum number of results. Defaults to 10.
+            threshold (float, optional): Minimum score from 0 to 1. Defaults to 0.6.
+
+        Returns:
+            list[tuple[str, float]]: (key, score) pairs, best match first.
+        """
+        grams = sorted(TrigramIndex.trigrams(text), key=lambda gram: len(self.postings.get(gram, ())))
+        
+        if not grams:
+            return []
+        
+        # A key sharing at least min_overlap trigrams must appear in one of the
+        # len(grams) - min_overlap + 1 rarest posting lists
+        min_overlap = max(1, ceil(round(threshold * len(grams), 6)))
+        
+        candidates = set()
+        
+        for gram in grams[:len(grams) - min_overlap + 1]:
+            candidates.update(self.postings.get(gram, ()))
+        
+        postings = [self.postings.get(gram, set()) for gram in grams]
+        scored = []
+        
+        for key in candidates:
+            overlap = sum(1 for posting in postings if key in posting)
+            
+            if overlap >= min_overlap:
+                dice = 2 * overlap / (len(grams) + self.gram_counts[key])
+                scored.append((overlap / len(grams), dice, key))
+        
+        scored.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        
+        return [(key, score) for score, _, key in scored[:limit]]
+
+class IdAllocator:
+    """
+    Tracks the serial numbers in use for each admission year of YYYY-NNNN student IDs.
+    
+    Each year keeps a bitmap of its serials and the lowest serial that may be free,
+    so handing out the next free ID only moves that hint forward past used serials.
+    """
+    
+    FIRST_SERIAL = 1
+    LAST_SERIAL = 9999
+    
+    def __init__(self) -> None:
+        self.bitmaps: dict[str, bytearray] = {}
+        self.hints: dict[str, int] = {}
+    
+    def __bitmap(self, year: str) -> bytearray:
+        """Get the bitmap of a year, creating an empty one if needed."""
+        if year not in self.bitmaps:
+            self.bitmaps[year] = bytearray(IdAllocator.LAST_SERIAL // 8 + 1)
+            self.hints[year] = IdAllocator.FIRST_SERIAL
+        
+        return self.bitmaps[year]
+    
+    @staticmethod
+    def __serial(student_id: str) -> Optional[int]:
+        """Get the serial number of an ID, or None if the ID is not exactly YYYY-NNNN."""
+        if len(student_id) != 9 or not (student_id[5:].isascii() and student_id[5:].isdigit()):
+            return None
+        
+        return int(student_id[5:])
+    
+    def add(self, student_id: str) -> None:
+        """
+        Mark an ID as used. IDs not exactly in the YYYY-NNNN format are ignored.
+        
+        Args:
+            student_id (str): Student ID.
+        """
+        if (serial := IdAllocator.__serial(student_id)) is not None:
+            self.__bitmap(student_id[:4])[serial >> 3] |= 1 << (serial & 7)
+    
+    def remove(self, student_id: str) -> None:
+        """
+        Mark an ID as free. IDs not exactly in the YYYY-NNNN format are ignored.
+        
+        Args:
+            student_id (str): Student ID.
+        """
+        if (serial := IdAllocator.__serial(student_id)) is None:
+            return
+        
+        year = student_id[:4]
+        
+        self.__bitmap(year)[serial >> 3] &= ~(1 << (serial & 7)) & 0xFF
+        self.hints[year] = max(IdAllocator.FIRST_SERIAL, min(self.hints[year], serial))
+    
+    def free_ids(self, year: str) -> Iterator[str]:
+        """
+        Iterate over the free IDs of a year in ascending order.
+        
+        The IDs are not reserved; each stays free until it is marked as used.
+        
+        Args:
+            year (str): Four-digit admission year.
+        
+        Returns:
+            Iterator[str]: Free IDs of the year.
+        """
+        bitmap = self.__bitmap(year)
+        serial = self.hints[year]
+        
+        # Every serial below the first free one is used, so later searches can start there
+        while serial <= IdAllocator.LAST_SERIAL and bitmap[serial >> 3] & (1 << (serial & 7)):
+            serial += 1
+        
+        self.hints[year] = serial
+        
+        for serial in range(serial, IdAllocator.LAST_SERIAL + 1):
+            if not bitmap[serial >> 3] & (1 << (serial & 7)):
+                yield f'{year}-{serial:04d}'
+
+def keyset_range(
+    count: int,
+    key_at: Callable[[int], Any],
+    key: Any,
+    limit: int,
+    direction: Literal['from', 'after', 'before'] = 'from',
+    descending: bool = False
+) -> range:
+    """
+    Find the positions of a page of a sorted sequence relative to a key.
+    
+    The key is located with a binary search, so finding a page costs the same
+    wherever it is in the sequence. The key does not have to be in the sequence.
+
+    Args:
+        count (int): Length of the sequence.
+        key_at (Callable[[int], Any]): Reads the key at a position. Keys must be unique and ascending.
+        key (Any): Key the page is relative to, or None for the first page (the last page with 'before').
+        limit (int): Maximum length of the page.
+        direction (Literal['from', 'after', 'before'], optional): Whether the page starts at the key,
+            follows it or precedes it, in the order shown. Defaults to 'from'.
+        descending (bool, optional): Whether the page is shown from the largest key. Defaults to False.
+
+    Returns:
+        range: Positions of the page in the order shown.
+    """
+    if key is None:
+        lower = upper = count if descending != (direction == 'before') else 0
+    
+    else:
+        lower, high = 0, count
+        
+        while lower < high:
+            middle = (lower + high) // 2
+            
+            if key_at(middle) < key:
+                lower = middle + 1
+            else:
+                high = middle
+        
+        upper = lower + 1 if lower < count and key_at(lower) == key else lower
+    
+    inclusive = direction == 'from'
+    
+    # Pages run towards the end of the sequence when going forward in ascending
+    # order or backward in descending order, and towards the start otherwise
+    if (direction == 'before') == descending:
+        start = lower if inclusive else upper
+        end = min(start + limit, count)
+    else:
+        end = upper if inclusive else lower
+        start = max(end - limit, 0)
+    
+    return range(end - 1, start - 1, -1) if descending else range(start, end)
@@ -0,0 +1,312 @@
+from model.student import Student, Program
+from model.storage import COMPRESSED_SUFFIXES, open_csv
+from array import array
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from csv import reader
+from typing import Iterable, Iterator, Optional, Sequence
+import json
+import os
+import sys
+
+# Student IDs must match this exactly, as in Student.valid_id
+ID_PATTERN = Student.ID_REGEX
+
+STUDENT_FIELD_COUNT = 8
+
+USAGE = 'Usage: python -m model.integrity PROGRAMS_CSV STUDENTS_CSV [STUDENTS_CSV ...] [--workers N]'
+
+CHUNK_BYTES = 8 * 1024 * 1024
+CHUNK_LINES = 100_000
+
+# Program codes known to the worker processes, set once per worker
+_program_codes: frozenset[str] = frozenset()
+
+def _init_worker(program_codes: frozenset[str]) -> None:
+    """Store the program codes in a worker process."""
+    global _program_codes
+    _program_codes = program_codes
+
+def _check_student_lines(lines: Iterable[str]) -> tuple[list[dict], array, array, int]:
+    """
+    Check students CSV lines that do not depend on other rows.
+
+    Args:
+        lines (Iterable[str]): Lines of the students CSV file, without the header.
+
+    Returns:
+        tuple[list[dict], array, array, int]: Issues with line numbers relative to the
+            chunk, the numeric well-formed IDs and their relative line numbers for the
+            duplicate check, and the number of lines read.
+    """
+    issues = []
+    ids = array('I')
+    id_lines = array('I')
+    line_number = 0
+    
+    for line_number, row in enumerate(reader(lines), start=1):
+        if not row:
+            continue
+        
+        if len(row) != STUDENT_FIELD_COUNT:
+            issues.append({'line': line_number, 'kind': 'wrong_field_count', 'value': len(row)})
+            continue
+        
+        student_id, surname, firstname, _, _, year, gender, program_code = row
+        
+        if ID_PATTERN.fullmatch(student_id):
+            ids.append(int(student_id[:4] + student_id[5:]))
+            id_lines.append(line_number)
+        else:
+            issues.append({'line': line_number, 'kind': 'malformed_id', 'id': student_id})
+        
+        if not (surname and firstname):
+            issues.append({'line': line_number, 'kind': 'blank_name', 'id': student_id})
+        
+        # isdigit alone also accepts digits such as "²" that int cannot parse
+        if not (year.isascii() and year.isdigit() and Student.MIN_YEAR <= int(year) <= Student.MAX_YEAR):
+            issues.append({'line': line_number, 'kind': 'year_out_of_range', 'id': student_id, 'value': year})
+        
+        if gender not in Student.VALID_GENDER_OPTIONS:
+            issues.append({'line': line_number, 'kind': 'invalid_gender', 'id': student_id, 'value': gender})
+        
+        if program_code and program_code not in _program_codes:
+            issues.append({'line': line_number, 'kind': 'orphaned_program_code', 'id': student_id, 'value': program_code})
+    
+    return issues, ids, id_lines, line_number
+
+def _check_student_range(path: str, start: int, end: int) -> tuple[list[dict], array, array, int]:
+    """Check the lines of an uncompressed students CSV file between two byte offsets."""
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    
+    return _check_student_lines(data.decode().splitlines())
+
+def _byte_ranges(path: str, chunk_bytes: int) -> Iterator[tuple[int, int]]:
+    """Split an uncompressed CSV file after its header into byte ranges that end at line ends."""
+    size = os.path.getsize(path)
+    
+    with open(path, 'rb') as file:
+        file.readline()  # Skip header
+        start = file.tell()
+        
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            
+            end = min(file.tell(), size)
+            
+            yield start, end
+            
+            start = end
+
+def _line_chunks(path: str, chunk_lines: int) -> Iterator[list[str]]:
+    """Read a compressed CSV file after its header in chunks of lines."""
+    with open_csv(path) as file:
+        next(file, None)  # Skip header
+        
+        while (lines := [line for _, line in zip(range(chunk_lines), file)]):
+            yield lines
+
+def _check_programs(programs_path: str) -> tuple[list[dict], frozenset[str]]:
+    """Check the programs CSV file and collect its program codes."""
+    issues = []
+    codes = set()
+    
+    with open_csv(programs_path) as file:
+        next(file, None)  # Skip header
+        
+        for line_number, row in enumerate(reader(file), start=2):
+            if not row:
+                continue
+            
+            if len(row) != 2:
+                issues.append({'file': programs_path, 'line': line_number, 'kind': 'wrong_field_count', 'value': len(row)})
+                continue
+            
+            code, name = row
+            
+            if code in codes:
+                issues.append({'file': programs_path, 'line': line_number, 'kind': 'duplicate_program_code', 'code': code})
+            
+            if not Program.valid_code(code):
+                issues.append({'file': programs_path, 'line': line_number, 'kind': 'invalid_program_code', 'code': code})
+            
+            if not Program.valid_name(name):
+                issues.append({'file': programs_path, 'line': line_number, 'kind': 'invalid_program_name', 'code': code})
+            
+            codes.add(code)
+    
+    return issues, frozenset(codes)
+
+def iter_integrity_issues(
+    programs_path: str,
+    students_paths: str | Sequence[str],
+    workers: Optional[int] = None,
+    chunk_bytes: int = CHUNK_BYTES
+) -> Iterator[dict]:
+    """
+    Stream the integrity issues of a programs CSV file and one or more students CSV files.
+
+    The programs file is checked first and its codes are handed to a pool of worker
+    processes. Each students file is split into chunks that the workers parse and
+    check in parallel: uncompressed files by byte ranges read by the workers
+    themselves, compressed files by batches of lines. Only a few chunks are in
+    flight at a time, and IDs are checked for duplicates across all files with a
+    bitmap of every possible YYYY-NNNN ID, so memory stays bounded however large
+    the files are. Quoted fields spanning lines are not supported.
+
+    Issues are dicts with the "file", "line" and "kind" of the problem and, where
+    relevant, the "id" or "code" of the record and the offending "value". Kinds are
+    wrong_field_count, duplicate_program_code, invalid_program_code,
+    invalid_program_name, malformed_id, duplicate_id, blank_name,
+    year_out_of_range, invalid_gender and orphaned_program_code.
+
+    Args:
+        programs_path (str): Path to the programs CSV file.
+        students_paths (str | Sequence[str]): Path or paths to the students CSV files, e.g. partitions.
+        workers (Optional[int], optional): Number of worker processes, or 1 to check in this process. Defaults to None (one per CPU).
+        chunk_bytes (int, optional): Size of the byte ranges of uncompressed files. Defaults to 8 MiB.
+
+    Returns:
+        Iterator[dict]: Issues, in file and line order.
+    """
+    program_issues, program_codes = _check_programs(programs_path)
+    
+    yield from program_issues
+    
+    if isinstance(students_paths, str):
+        students_paths = [students_paths]
+    
+    workers = workers or os.cpu_count() or 1
+    seen_ids = bytearray(100_000_000 // 8)
+    
+    if workers == 1:
+        _init_worker(program_codes)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(program_codes,))
+    
+    try:
+        for path in students_paths:
+            if path.endswith(COMPRESSED_SUFFIXES):
+                tasks = ((_check_student_lines, lines) for lines in _line_chunks(path, CHUNK_LINES))
+            else:
+                tasks = ((_check_student_range, path, start, end) for start, end in _byte_ranges(path, chunk_bytes))
+            
+            pending: deque[Future] = deque()
+            base_line = 1  # Line of the header
+            
+            for task in tasks:
+                if executor is None:
+                    results = [task[0](*task[1:])]
+                else:
+                    pending.append(executor.submit(*task))
+                    
+                    # Keep a bounded number of chunks in flight
+                    results = [pending.popleft().result()] if len(pending) >= 2 * workers else []
+                
+                for issues, ids, id_lines, line_count in results:
+                    yield from _finish_chunk(path, base_line, issues, ids, id_lines, seen_ids)
+                    base_line += line_count
+            
+            while pending:
+                issues, ids, id_lines, line_count = pending.popleft().result()
+                
+                yield from _finish_chunk(path, base_line, issues, ids, id_lines, seen_ids)
+                base_line += line_count
+    
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+def _finish_chunk(
+    path: str,
+    base_line: int,
+    issues: list[dict],
+    ids: array,
+    id_lines: array,
+    seen_ids: bytearray
+) -> Iterator[dict]:
+    """Number the issues of a chunk within its file and check its IDs for duplicates."""
+    duplicates = []
+    
+    for number, line in zip(ids, id_lines):
+        if seen_ids[number >> 3] & (1 << (number & 7)):
+            duplicates.append({'line': line, 'kind': 'duplicate_id', 'id': f'{number // 10000:04d}-{number % 10000:04d}'})
+        else:
+            seen_ids[number >> 3] |= 1 << (number & 7)
+    
+    for issue in sorted(issues + duplicates, key=lambda issue: issue['line']):
+        yield {'file': path, **issue, 'line': base_line + issue['line']}
+
+def check_integrity(
+    programs_path: str,
+    students_paths: str | Sequence[str],
+    workers: Optional[int] = None,
+    max_examples: int = 100
+) -> dict:
+    """
+    Check the data files and summarize the issues found.
+
+    Args:
+        programs_path (str): Path to the programs CSV file.
+        students_paths (str | Sequence[str]): Path or paths to the students CSV files.
+        workers (Optional[int], optional): Number of worker processes. Defaults to None (one per CPU).
+        max_examples (int, optional): Number of issues to include in full. Defaults to 100.
+
+    Returns:
+        dict: Report with "ok", the count of each issue kind under "counts" and the
+            first issues under "examples", ready to be written as JSON.
+    """
+    counts: Counter[str] = Counter()
+    examples = []
+    
+    for issue in iter_integrity_issues(programs_path, students_paths, workers):
+        counts[issue['kind']] += 1
+        
+        if len(examples) < max_examples:
+            examples.append(issue)
+    
+    return {
+        'ok': not counts,
+        'counts': dict(counts),
+        'examples': examples
+    }
+
+def main(argv: Sequence[str]) -> int:
+    """
+    Write every issue of the data files as a JSON line, followed by a summary line.
+
+    Args:
+        argv (Sequence[str]): Command line arguments, see USAGE.
+
+    Returns:
+        int: Exit status, 1 if any issue was found.
+    """
+    arguments = list(argv)
+    workers = None
+    
+    if '--workers' in arguments:
+        position = arguments.index('--workers')
+        workers = int(arguments[position + 1])
+        
+        del arguments[position:position + 2]
+    
+    if len(arguments) < 2:
+        print(USAGE, file=sys.stderr)
+        return 2
+    
+    counts: Counter[str] = Counter()
+    
+    for issue in iter_integrity_issues(arguments[0], arguments[1:], workers):
+        counts[issue['kind']] += 1
+        print(json.dumps(issue))
+    
+    print(json.dumps({'summary': {'ok': not counts, 'counts': dict(counts)}}))
+    
+    return 1 if counts else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,106 @@
+from model.student import Student
+from typing import Iterable, Literal, Mapping, NamedTuple, Optional
+
+class PromotionRule(NamedTuple):
+    """
+    How the students of a program move up at the end of the school year.
+
+    Students below the final year move up one year. Students in the final year
+    or above it graduate, and graduates are kept as they are, so their year level
+    is capped at the final year, unenrolled (kept with no program) or removed.
+    Graduates are kept by default, so their enrollment history stays reportable,
+    but kept graduates are not marked as such: a later promotion cannot tell them
+    apart from students still in their final year. Unenroll graduates to keep
+    them apart.
+    """
+    
+    final_year: int = Student.MAX_YEAR
+    graduates: Literal['keep', 'unenroll', 'remove'] = 'keep'
+
+class Promotion(NamedTuple):
+    """Changes of one batch promotion, planned before anything is changed."""
+    
+    # New records of promoted and unenrolled students, and IDs of removed graduates
+    updated: list[Student]
+    removed: list[str]
+    
+    # Records of every student above as they were before the promotion
+    before: list[Student]
+    
+    # Graduates unenrolled or removed, and graduates kept as they are, per program code, or None for students in no program
+    graduated: dict[Optional[str], int]
+    kept: dict[Optional[str], int]
+    
+    def summary(self) -> str:
+        """
+        Describe the promotion for a preview.
+
+        Returns:
+            str: Number of students promoted and graduated, with the graduates per program.
+        """
+        graduate_count = sum(self.graduated.values())
+        kept_count = sum(self.kept.values())
+        
+        lines = [
+            f'{len(self.before) - graduate_count} student(s) move up one year.', 
+            f'{kept_count} student(s) in their final year stay in it, not marked as graduated.',
+            f'{graduate_count} student(s) graduate.'
+        ]
+        
+        for program_code, count in sorted(self.graduated.items(), key=lambda item: item[0] or ''):
+            lines.append(f'  {program_code or "Not enrolled"}: {count}')
+        
+        return '\n'.join(lines)
+
+def plan_promotion(
+    students: Iterable[Student],
+    rules: Optional[Mapping[str, PromotionRule]] = None,
+    default_rule: PromotionRule = PromotionRule()
+) -> Promotion:
+    """
+    Work out the changes of promoting every student, in one pass and without changing anything.
+
+    Args:
+        students (Iterable[Student]): Students to promote.
+        rules (Optional[Mapping[str, PromotionRule]], optional): Rules by program code. Defaults to None.
+        default_rule (PromotionRule, optional): Rule of the programs without one, and of students in no program.
+            Defaults to PromotionRule(), graduating after Student.MAX_YEAR and keeping graduates as they are.
+
+    Returns:
+        Promotion: Planned changes.
+
+    Raises:
+        ValueError: If the final year of a rule is not a valid year level.
+    """
+    rules = rules or {}
+    
+    for rule in (default_rule, *rules.values()):
+        if not Student.valid_year(rule.final_year):
+            raise ValueError(f'Final year must be in the range {Student.MIN_YEAR} to {Student.MAX_YEAR}.')
+    
+    updated, removed, before = [], [], []
+    graduated: dict[Optional[str], int] = {}
+    kept: dict[Optional[str], int] = {}
+    
+    for student in students:
+        rule = rules.get(student.program_code, default_rule) if student.program_code else default_rule
+        
+        if student.year < rule.final_year:
+            # The new year is within the rule's valid range, so it is not checked again
+            updated.append(Student.trusted(student.id, student.name, student.year + 1, student.gender, student.program_code))
+        
+        elif rule.graduates == 'keep' or (rule.graduates == 'unenroll' and student.program_code is None):
+            kept[student.program_code] = kept.get(student.program_code, 0) + 1
+            continue
+        
+        elif rule.graduates == 'unenroll':
+            updated.append(Student.trusted(student.id, student.name, student.year, student.gender, None))
+            graduated[student.program_code] = graduated.get(student.program_code, 0) + 1
+        
+        else:
+            removed.append(student.id)
+            graduated[student.program_code] = graduated.get(student.program_code, 0) + 1
+        
+        before.append(student)
+    
+    return Promotion(updated, removed, before, graduated, kept)
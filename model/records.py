@@ -0,0 +1,487 @@
+from model.student import Student
+from typing import Any, Iterable, Optional
+import csv
+import mmap
+import os
+import struct
+import tempfile
+
+# Packed student record: ID, surname, first name, middle name, suffix, year, gender index and program code
+Record = tuple[bytes, bytes, bytes, bytes, bytes, int, int, bytes]
+
+def _write_replacing(path: str, chunks: Iterable[bytes]) -> None:
+    """
+    Write a file beside path and move it over path in one step.
+
+    Readers that memory-mapped the old file keep reading it whole, instead of
+    reading past the end of a file truncated under them.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.writelines(chunks)
+        
+        os.replace(temp_path, path)
+    
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+class StudentRecords:
+    """
+    Fixed-width student records ordered by ID, read in place from a buffer.
+
+    The buffer starts with a header holding a magic number, the record count and
+    the width of every text field, followed by the records. Records are searched
+    and read where they are, so opening a buffer costs the same for any number
+    of records and a Student is only built for a record that is looked up.
+    """
+    
+    MAGIC = b'SSISREC1'
+    HEADER = struct.Struct('<8sI5H')
+    
+    ID_WIDTH = 9
+    ID = struct.Struct(f'{ID_WIDTH}s')
+    TEXT_FIELDS = ('surname', 'firstname', 'middlename', 'suffix', 'program_code')
+    
+    def __init__(self, buffer: Any, source: str) -> None:
+        """
+        Read the header of packed records.
+
+        Args:
+            buffer (Any): Buffer holding the records, e.g. a memory map.
+            source (str): Name of the buffer in error messages.
+
+        Raises:
+            ValueError: If the buffer does not hold student records.
+        """
+        magic, self.count, *widths = StudentRecords.HEADER.unpack_from(buffer)
+        
+        if magic != StudentRecords.MAGIC:
+            raise ValueError(f'{source!r} does not hold student records.')
+        
+        self.__buffer = buffer
+        self.record = StudentRecords.record_struct(widths)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    @staticmethod
+    def record_struct(widths: Iterable[int]) -> struct.Struct:
+        """
+        Build the layout of a record from the widths of its text fields.
+
+        Args:
+            widths (Iterable[int]): Widths of the fields in TEXT_FIELDS, in bytes.
+
+        Returns:
+            struct.Struct: ID, name parts, year, gender index and program code.
+        """
+        surname, firstname, middlename, suffix, program_code = widths
+        
+        return struct.Struct(f'<{StudentRecords.ID_WIDTH}s{surname}s{firstname}s{middlename}s{suffix}sBB{program_code}s')
+    
+    @staticmethod
+    def encode(students: Iterable[Student]) -> tuple[list[int], list[Record]]:
+        """
+        Encode students as records, ordered by ID.
+
+        Args:
+            students (Iterable[Student]): Students to encode.
+
+        Returns:
+            tuple[list[int], list[Record]]: Widths of the fields in TEXT_FIELDS, each as wide as its
+                longest value, and the records.
+        """
+        rows = sorted(
+            (
+                (
+                    student.id.encode(),
+                    *(part.encode() if part else b'' for part in student.name),
+                    student.year,
+                    Student.VALID_GENDER_OPTIONS.index(student.gender),
+                    (student.program_code or '').encode()
+                )
+                for student in students
+            ),
+            key=lambda row: row[0]
+        )
+        
+        widths = [max((len(row[column]) for row in rows), default=0) or 1 for column in (1, 2, 3, 4, 7)]
+        
+        return widths, rows  # type: ignore
+    
+    @staticmethod
+    def packed_size(widths: Iterable[int], count: int) -> int:
+        """
+        Get the size of packed records.
+
+        Args:
+            widths (Iterable[int]): Widths of the fields in TEXT_FIELDS.
+            count (int): Number of records.
+
+        Returns:
+            int: Size of the header and records in bytes.
+        """
+        return StudentRecords.HEADER.size + count * StudentRecords.record_struct(widths).size
+    
+    @staticmethod
+    def pack_into(buffer: Any, widths: list[int], rows: list[Record]) -> None:
+        """
+        Write the header and records into a buffer of at least packed_size bytes.
+
+        Args:
+            buffer (Any): Writable buffer.
+            widths (list[int]): Widths of the fields in TEXT_FIELDS, from encode.
+            rows (list[Record]): Records ordered by ID, from encode.
+        """
+        record = StudentRecords.record_struct(widths)
+        
+        StudentRecords.HEADER.pack_into(buffer, 0, StudentRecords.MAGIC, len(rows), *widths)
+        
+        for position, row in enumerate(rows):
+            record.pack_into(buffer, StudentRecords.HEADER.size + position * record.size, *row)
+    
+    def record_at(self, position: int) -> Record:
+        """
+        Read the raw fields of the record at a position, without building a Student.
+
+        Args:
+            position (int): Zero-based record position.
+
+        Returns:
+            Record: Fields of the record. Text fields are bytes padded with zero bytes.
+        """
+        return self.record.unpack_from(self.__buffer, StudentRecords.HEADER.size + position * self.record.size)  # type: ignore
+    
+    def student_id_at(self, position: int) -> str:
+        """
+        Read the ID of the record at a position without decoding the rest of it.
+
+        Args:
+            position (int): Zero-based record position.
+
+        Returns:
+            str: Student ID.
+        """
+        offset = StudentRecords.HEADER.size + position * self.record.size
+        
+        return StudentRecords.ID.unpack_from(self.__buffer, offset)[0].decode()
+    
+    def student_at(self, position: int) -> Student:
+        """
+        Build the student stored at a position.
+
+        Args:
+            position (int): Zero-based record position.
+
+        Returns:
+            Student: Student stored in the record.
+        """
+        student_id, *name, year, gender, program_code = self.record_at(position)
+        
+        surname, firstname, middlename, suffix = (part.rstrip(b'\0').decode() for part in name)
+        
+        # Records are only written from valid students, so they are not checked again
+        return Student.trusted(
+            id=student_id.decode(),
+            name=(surname, firstname, middlename or None, suffix or None),
+            year=year,
+            gender=Student.VALID_GENDER_OPTIONS[gender],
+            program_code=program_code.rstrip(b'\0').decode() or None
+        )
+    
+    def find(self, student_id: str) -> Optional[int]:
+        """
+        Binary search the records for an ID.
+
+        Args:
+            student_id (str): ID to look for.
+
+        Returns:
+            Optional[int]: Position of the record, or None if no record has the ID.
+        """
+        low, high = 0, self.count
+        
+        while low < high:
+            middle = (low + high) // 2
+            
+            if self.student_id_at(middle) < student_id:
+                low = middle + 1
+            else:
+                high = middle
+        
+        if low < self.count and self.student_id_at(low) == student_id:
+            return low
+        
+        return None
+    
+    def get(self, student_id: str) -> Optional[Student]:
+        """
+        Look up a student by ID.
+
+        Args:
+            student_id (str): ID of the student.
+
+        Returns:
+            Optional[Student]: Student with the ID, or None if there is none.
+        """
+        position = self.find(student_id)
+        
+        return None if position is None else self.student_at(position)
+
+class StudentRecordFile(StudentRecords):
+    """Read-only binary file of student records, memory mapped, see StudentRecords."""
+    
+    def __init__(self, path: str) -> None:
+        """
+        Open a record file.
+
+        Args:
+            path (str): Path to the record file.
+
+        Raises:
+            ValueError: If the file is not a student record file.
+        """
+        self.path = path
+        
+        with open(path, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        try:
+            super().__init__(self.__map, path)
+        
+        except ValueError:
+            self.__map.close()
+            raise
+    
+    def __enter__(self) -> 'StudentRecordFile':
+        return self
+    
+    def __exit__(self, *_) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Unmap the file."""
+        self.__map.close()
+    
+    @staticmethod
+    def write(path: str, students: Iterable[Student]) -> int:
+        """
+        Write students to a record file, ordered by ID.
+        
+        The file is replaced rather than rewritten, so processes that have the old
+        one open keep reading it until they reopen it.
+
+        Args:
+            path (str): Path to the record file.
+            students (Iterable[Student]): Students to write.
+
+        Returns:
+            int: Number of records written.
+        """
+        widths, rows = StudentRecords.encode(students)
+        record = StudentRecords.record_struct(widths)
+        
+        _write_replacing(path, [
+            StudentRecords.HEADER.pack(StudentRecords.MAGIC, len(rows), *widths), 
+            *(record.pack(*row) for row in rows)
+        ])
+        
+        return len(rows)
+
+class StudentOffsetIndex:
+    """
+    Sidecar file mapping student IDs to the byte offsets of their rows in a students CSV file.
+    
+    The header records the modification time and size of the CSV file the index
+    was built from, so an index left behind by an outside edit is detected and
+    rebuilt. Entries are sorted by ID and binary searched through a memory map.
+    """
+    
+    MAGIC = b'SSISIDX1'
+    HEADER = struct.Struct('<8sqqI')
+    ENTRY = struct.Struct('<9sQ')
+    
+    SUFFIX = '.idx'
+    
+    def __init__(self, csv_path: str) -> None:
+        """
+        Open the index of a CSV file, building it first if it is missing or stale.
+
+        Args:
+            csv_path (str): Path to the uncompressed students CSV file.
+        """
+        self.csv_path = csv_path
+        self.path = csv_path + StudentOffsetIndex.SUFFIX
+        
+        if not self.is_current():
+            StudentOffsetIndex.build(csv_path)
+        
+        with open(self.path, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        _, _, _, self.count = StudentOffsetIndex.HEADER.unpack_from(self.__map)
+        
+        self.__csv_file = open(csv_path, 'rb')
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def close(self) -> None:
+        """Unmap the index and close the CSV file."""
+        self.__map.close()
+        self.__csv_file.close()
+    
+    @staticmethod
+    def csv_signature(csv_path: str) -> tuple[int, int]:
+        """
+        Get the modification time and size an index of a CSV file is valid for.
+
+        Args:
+            csv_path (str): Path to the CSV file.
+
+        Returns:
+            tuple[int, int]: Modification time in nanoseconds and size in bytes.
+        """
+        stat = os.stat(csv_path)
+        
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def is_current(self) -> bool:
+        """
+        Check whether the index file exists and was built from the CSV file as it is now.
+
+        Returns:
+            bool: Whether the index can be used.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                header = file.read(StudentOffsetIndex.HEADER.size)
+        
+        except FileNotFoundError:
+            return False
+        
+        if len(header) < StudentOffsetIndex.HEADER.size:
+            return False
+        
+        magic, mtime_ns, size, _ = StudentOffsetIndex.HEADER.unpack(header)
+        
+        return magic == StudentOffsetIndex.MAGIC and (mtime_ns, size) == StudentOffsetIndex.csv_signature(self.csv_path)
+    
+    @staticmethod
+    def build(csv_path: str) -> int:
+        """
+        Write the index of a CSV file by streaming it once.
+        
+        The index file is replaced rather than rewritten, so readers that have the
+        old one mapped keep reading it until they reopen it.
+
+        Args:
+            csv_path (str): Path to the uncompressed students CSV file.
+
+        Returns:
+            int: Number of rows indexed.
+        """
+        signature = StudentOffsetIndex.csv_signature(csv_path)
+        entries = []
+        
+        with open(csv_path, 'rb') as csv_file:
+            offset = len(next(csv_file, b''))  # Skip header
+            
+            for line in csv_file:
+                if b',' in line:
+                    entries.append((line.split(b',', 1)[0], offset))
+                
+                offset += len(line)
+        
+        entries.sort()
+        
+        _write_replacing(csv_path + StudentOffsetIndex.SUFFIX, [
+            StudentOffsetIndex.HEADER.pack(StudentOffsetIndex.MAGIC, *signature, len(entries)), 
+            *(StudentOffsetIndex.ENTRY.pack(*entry) for entry in entries)
+        ])
+        
+        return len(entries)
+    
+    def student_id_at(self, position: int) -> str:
+        """
+        Read the ID of the entry at a position.
+
+        Args:
+            position (int): Zero-based entry position.
+
+        Returns:
+            str: Student ID.
+        """
+        offset = StudentOffsetIndex.HEADER.size + position * StudentOffsetIndex.ENTRY.size
+        
+        return self.__map[offset:offset + StudentRecordFile.ID_WIDTH].decode()
+    
+    def offset_of(self, student_id: str) -> Optional[int]:
+        """
+        Binary search the index for the row offset of an ID.
+
+        Args:
+            student_id (str): ID to look for.
+
+        Returns:
+            Optional[int]: Byte offset of the student's row, or None if the ID is not indexed.
+        """
+        low, high = 0, self.count
+        
+        while low < high:
+            middle = (low + high) // 2
+            
+            if self.student_id_at(middle) < student_id:
+                low = middle + 1
+            else:
+                high = middle
+        
+        if low < self.count and self.student_id_at(low) == student_id:
+            return self.__offset_at(low)
+        
+        return None
+    
+    def __offset_at(self, position: int) -> int:
+        """Read the row offset of the entry at a position."""
+        _, offset = StudentOffsetIndex.ENTRY.unpack_from(
+            self.__map, 
+            StudentOffsetIndex.HEADER.size + position * StudentOffsetIndex.ENTRY.size
+        )
+        
+        return offset
+    
+    def __read_row(self, offset: int) -> list[str]:
+        """Parse the CSV row starting at a byte offset."""
+        self.__csv_file.seek(offset)
+        
+        return next(csv.reader([self.__csv_file.readline().decode()]))
+    
+    def row_at(self, position: int) -> list[str]:
+        """
+        Read the CSV row of the entry at a position.
+
+        Args:
+            position (int): Zero-based entry position, in ID order.
+
+        Returns:
+            list[str]: Fields of the row.
+        """
+        return self.__read_row(self.__offset_at(position))
+    
+    def get_row(self, student_id: str) -> Optional[list[str]]:
+        """
+        Read the CSV row of a student straight from its offset.
+
+        Args:
+            student_id (str): ID of the student.
+
+        Returns:
+            Optional[list[str]]: Fields of the row, or None if the ID is not indexed.
+        """
+        if (offset := self.offset_of(student_id)) is None:
+            return None
+        
+        return self.__read_row(offset)
@@ -0,0 +1,170 @@
+from model.student import Student, Program
+from concurrent.futures import ProcessPoolExecutor
+from csv import writer
+from html import escape
+from typing import Collection, Iterable, Optional
+import os
+import re
+
+ROSTER_FORMATS = ('csv', 'txt', 'html')
+ROSTER_FIELD_NAMES = ('id', 'surname', 'firstname', 'middlename', 'suffix', 'year', 'gender')
+
+# Characters of a program code that are not safe in a file name, e.g. in "BSBIO(MCB)"
+UNSAFE_FILE_NAME_PATTERN = re.compile(r'[^A-Za-z0-9_-]+')
+
+# Roster of one program as sent to a worker: code, name, file name stem and one row of ROSTER_FIELD_NAMES per student
+Roster = tuple[str, str, str, list[tuple[str, ...]]]
+
+def group_by_program(programs: Collection[str], students: Iterable[Student]) -> dict[str, list[Student]]:
+    """
+    Group students by program in a single pass.
+
+    Args:
+        programs (Collection[str]): Codes of the programs to group by. Each gets a group, even if empty.
+        students (Iterable[Student]): Students to group. Students in no listed program are left out.
+
+    Returns:
+        dict[str, list[Student]]: Students of each program, in the order given.
+    """
+    groups: dict[str, list[Student]] = {code: [] for code in programs}
+    
+    for student in students:
+        if student.program_code in groups:
+            groups[student.program_code].append(student)
+    
+    return groups
+
+def roster_file_stems(program_codes: Iterable[str]) -> dict[str, str]:
+    """
+    Name the roster files of programs, without the extension.
+    
+    Characters unsafe in file names are replaced, so distinct codes such as
+    "BS/IT" and "BS:IT" can come out the same. Names are also compared without
+    case, for case-insensitive file systems. In code order, the first program
+    of a clash keeps the plain name and the others get "_2", "_3" and so on.
+
+    Args:
+        program_codes (Iterable[str]): Codes of the programs.
+
+    Returns:
+        dict[str, str]: Distinct file name stem of each program.
+    """
+    stems: dict[str, str] = {}
+    taken: set[str] = set()
+    
+    for code in sorted(program_codes):
+        stem = base = UNSAFE_FILE_NAME_PATTERN.sub('_', code)
+        number = 2
+        
+        while stem.casefold() in taken:
+            stem = f'{base}_{number}'
+            number += 1
+        
+        taken.add(stem.casefold())
+        stems[code] = stem
+    
+    return stems
+
+def _roster_row(student: Student) -> tuple[str, ...]:
+    """Flatten a student into a roster row."""
+    surname, firstname, middlename, suffix = student.name
+    
+    return (student.id, surname, firstname, middlename or '', suffix or '', str(student.year), student.gender)
+
+def _render_roster(roster: Roster, output_dir: str, formats: tuple[str, ...]) -> list[str]:
+    """Write the roster of one program in each format and return the paths written."""
+    code, name, stem, rows = roster
+    paths = []
+    
+    # By surname, first name, middle name and suffix, then ID
+    rows = sorted(rows, key=lambda row: (row[1:5], row[0]))
+    
+    for file_format in formats:
+        path = os.path.join(output_dir, f'{stem}.{file_format}')
+        
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            if file_format == 'csv':
+                csv_writer = writer(file)
+                csv_writer.writerow(ROSTER_FIELD_NAMES)
+                csv_writer.writerows(rows)
+            
+            elif file_format == 'txt':
+                widths = [max((len(row[column]) for row in rows), default=0) for column in range(len(ROSTER_FIELD_NAMES))]
+                widths = [max(width, len(field)) for width, field in zip(widths, ROSTER_FIELD_NAMES)]
+                
+                file.write(f'{code} - {name}\n{len(rows)} student(s)\n\n')
+                
+                for row in (ROSTER_FIELD_NAMES, *rows):
+                    file.write('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip() + '\n')
+            
+            else:
+                file.write(f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{escape(code)}</title></head>\n<body>\n')
+                file.write(f'<h1>{escape(code)} - {escape(name)}</h1>\n<p>{len(rows)} student(s)</p>\n<table>\n')
+                file.write('<tr>' + ''.join(f'<th>{escape(field)}</th>' for field in ROSTER_FIELD_NAMES) + '</tr>\n')
+                
+                for row in rows:
+                    file.write('<tr>' + ''.join(f'<td>{escape(value)}</td>' for value in row) + '</tr>\n')
+                
+                file.write('</table>\n</body>\n</html>\n')
+        
+        paths.append(path)
+    
+    return paths
+
+def write_rosters(
+    programs: Iterable[Program],
+    students: Iterable[Student],
+    output_dir: str,
+    formats: Iterable[str] = ROSTER_FORMATS,
+    workers: Optional[int] = None
+) -> list[str]:
+    """
+    Write one roster file per program and format to a directory.
+
+    Students are grouped by program in a single pass over the table, then the
+    rosters are rendered and written concurrently by a pool of worker processes,
+    so the time taken grows with the number of students divided by the number
+    of cores rather than with programs times students. Each roster lists the
+    program's students by name. Files are named after the program codes, see
+    roster_file_stems.
+
+    Args:
+        programs (Iterable[Program]): Programs to write rosters for.
+        students (Iterable[Student]): Students to list. Students in none of the programs are left out.
+        output_dir (str): Directory to write to, created if missing. Existing rosters are overwritten.
+        formats (Iterable[str], optional): Formats to write, from ROSTER_FORMATS. Defaults to all of them.
+        workers (Optional[int], optional): Number of worker processes, or 1 to write in this process. Defaults to None (one per CPU).
+
+    Returns:
+        list[str]: Paths of the files written, grouped by program in code order.
+
+    Raises:
+        ValueError: If a format is not one of ROSTER_FORMATS.
+    """
+    formats = tuple(formats)
+    
+    if (unknown := set(formats) - set(ROSTER_FORMATS)):
+        raise ValueError(f'Unknown roster format(s): {", ".join(sorted(unknown))}.')
+    
+    names = {program.code: program.name for program in programs}
+    groups = group_by_program(names, students)
+    stems = roster_file_stems(names)
+    
+    rosters: list[Roster] = [
+        (code, names[code], stems[code], [_roster_row(student) for student in groups[code]])
+        for code in sorted(names)
+    ]
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    workers = workers or os.cpu_count() or 1
+    
+    if workers == 1:
+        return [path for roster in rosters for path in _render_roster(roster, output_dir, formats)]
+    
+    with ProcessPoolExecutor(workers) as executor:
+        # Small rosters are sent in batches so pickling does not outweigh the work
+        chunk_size = max(1, len(rosters) // (workers * 4))
+        results = executor.map(_render_roster, rosters, [output_dir] * len(rosters), [formats] * len(rosters), chunksize=chunk_size)
+        
+        return [path for paths in results for path in paths]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+from model.student import Student
+from model.records import StudentRecords
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Optional
+import os
+
+class StudentSnapshot(StudentRecords):
+    """
+    Read-only copy of students packed into shared memory, for worker processes.
+
+    The process that publishes a snapshot packs the students once, in the
+    layout of StudentRecords. Workers attach to it by name, which maps the same
+    memory into their address space, and read records in place, so nothing is
+    copied or unpickled per worker and only the name is sent to them.
+
+    Use snapshots as context managers. Leaving the block detaches a worker and,
+    in the publishing process, also frees the shared memory.
+    """
+    
+    def __init__(self, name: str) -> None:
+        """
+        Attach to a published snapshot.
+
+        Args:
+            name (str): Name of the snapshot, see publish.
+
+        Raises:
+            FileNotFoundError: If no snapshot has the name, e.g. because it was already freed.
+        """
+        self.__memory = SharedMemory(name)
+        self.__owner = False
+        
+        try:
+            super().__init__(self.__memory.buf, name)
+        
+        except ValueError:
+            self.__memory.close()
+            raise
+    
+    @classmethod
+    def publish(cls, students: Iterable[Student]) -> StudentSnapshot:
+        """
+        Pack students into a new block of shared memory.
+
+        Args:
+            students (Iterable[Student]): Students to publish.
+
+        Returns:
+            StudentSnapshot: Snapshot owned by this process, whose name workers attach to.
+        """
+        widths, rows = StudentRecords.encode(students)
+        
+        memory = SharedMemory(create=True, size=StudentRecords.packed_size(widths, len(rows)))
+        
+        try:
+            StudentRecords.pack_into(memory.buf, widths, rows)
+            snapshot = cls(memory.name)
+        
+        finally:
+            memory.close()
+        
+        snapshot.__owner = True
+        
+        return snapshot
+    
+    @property
+    def name(self) -> str:
+        """Name workers attach to the snapshot by."""
+        return self.__memory.name
+    
+    def __enter__(self) -> StudentSnapshot:
+        return self
+    
+    def __exit__(self, *_) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Detach from the snapshot, and free it if this process published it."""
+        self.__memory.close()
+        
+        if self.__owner:
+            self.__owner = False
+            self.__memory.unlink()
+
+def enrollment_counts(snapshot: StudentSnapshot, workers: Optional[int] = None) -> dict[tuple[Optional[str], int], int]:
+    """
+    Count the students of each program and year level, split across worker processes.
+
+    Each worker is sent the name of the snapshot and a range of positions, and
+    reads its records from the shared memory.
+
+    Args:
+        snapshot (StudentSnapshot): Published snapshot of the students to count.
+        workers (Optional[int], optional): Number of worker processes, or 1 to count in this process. Defaults to None (one per CPU).
+
+    Returns:
+        dict[tuple[Optional[str], int], int]: Number of students by program code (None for none) and year level.
+    """
+    workers = workers or os.cpu_count() or 1
+    step = -(-len(snapshot) // workers) or 1
+    bounds = [(start, min(start + step, len(snapshot))) for start in range(0, len(snapshot), step)]
+    
+    if workers == 1:
+        results = [_count_enrollments(snapshot.name, start, stop) for start, stop in bounds]
+    
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_count_enrollments, [snapshot.name] * len(bounds), *zip(*bounds)))
+    
+    counts: dict[tuple[Optional[str], int], int] = {}
+    
+    for result in results:
+        for (program_code, year), count in result.items():
+            key = (program_code or None, year)
+            counts[key] = counts.get(key, 0) + count
+    
+    return counts
+
+def _count_enrollments(name: str, start: int, stop: int) -> dict[tuple[str, int], int]:
+    """Count the students of each program code and year level in a range of a snapshot, decoding each code once."""
+    counts: dict[tuple[bytes, int], int] = {}
+    
+    with StudentSnapshot(name) as snapshot:
+        for position in range(start, stop):
+            *_, year, _, program_code = snapshot.record_at(position)
+            
+            counts[program_code, year] = counts.get((program_code, year), 0) + 1
+    
+    return {(program_code.rstrip(b'\0').decode(), year): count for (program_code, year), count in counts.items()}
@@ -1,6 +1,23 @@
 from model.student import Student, Program
+from model.cache import QueryCache
+from model.index import IdAllocator, PrefixIndex, SortIndex, TrigramIndex, keyset_range
+from model.integrity import check_integrity
+from model.columnar import RowFingerprints, StudentColumns
+from model.duplicates import DuplicateCandidate, find_duplicates
+from model.history import Enrollment, EnrollmentHistory, enrollment_state
+from model.promotion import Promotion, PromotionRule, plan_promotion
+from model.records import StudentOffsetIndex, StudentRecordFile
+from model.reports import ROSTER_FORMATS, write_rosters
+from model.snapshot import StudentSnapshot, enrollment_counts
+from model.storage import COMPRESSED_SUFFIXES, external_sort, merge_sorted, open_csv
+from contextlib import contextmanager, suppress
 from csv import DictReader, DictWriter
-from typing import Collection
+from itertools import islice
+from typing import Any, Callable, Collection, Iterable, Iterator, Literal, Mapping, MutableMapping, NamedTuple
+import json
+import os
+import re
+import tempfile
 
 class DuplicateProgramError(Exception):
     """Exception raised when attempting to add a program with a duplicate code."""
@@ -26,148 +43,2078 @@ class StudentNotFoundError(Exception):
     def __init__(self, student_id: str) -> None:
         super().__init__(f'Student with ID "{student_id}" not found.')
 
+class OrphanedStudentError(Exception):
+    """Exception raised when a student would be left in a program that does not exist."""
+
+    def __init__(self, student_id: str, program_code: str) -> None:
+        super().__init__(f'Student with ID {student_id!r} is in program {program_code!r}, which does not exist.')
+
+class ReadOnlyError(Exception):
+    """Exception raised when attempting to change data opened in a read-only mode."""
+
+    def __init__(self, mode: str) -> None:
+        super().__init__(f'Data opened in {mode!r} mode cannot be changed.')
+
+class ChangeEvent(NamedTuple):
+    """Keys of the records of one table that were added, updated or removed together."""
+    
+    table: Literal['programs', 'students']
+    added: frozenset[str]
+    updated: frozenset[str]
+    removed: frozenset[str]
+
 class SSIS:
     """Simple Student Information System class."""
 
-    # Define field names for CSV files
-    STUDENT_FIELD_NAMES = ('id', 'surname', 'firstname', 'middlename', 'suffix', 'year', 'gender', 'program_code')
-    PROGRAM_FIELD_NAMES = ('code', 'name')
+    # Define field names for CSV files
+    STUDENT_FIELD_NAMES = ('id', 'surname', 'firstname', 'middlename', 'suffix', 'year', 'gender', 'program_code')
+    PROGRAM_FIELD_NAMES = ('code', 'name')
+
+    UNENROLLED = 'NOT ENROLLED'
+    
+    # Sort key extractors for the sortable student columns
+    STUDENT_SORT_KEYS: dict[str, Callable[[Student], Any]] = {
+        'id': lambda student: student.id,
+        'name': lambda student: tuple(part or '' for part in student.name),
+        'year': lambda student: student.year,
+        'gender': lambda student: student.gender,
+        'program_code': lambda student: student.program_code or ''
+    }
+    
+    PARTITION_FILE_PATTERN = re.compile(r'([0-9]{4})\.csv(?:\.gz|\.xz)?')
+    
+    # Modes that only support lookups and refuse every change
+    READ_ONLY_MODES = ('kiosk', 'lazy')
+    
+    # Appended to a table's CSV path (or partition directory) to name its journal of unsaved changes
+    JOURNAL_SUFFIX = '.journal'
+    
+    # Appended to the students CSV path (or partition directory) to name the enrollment history
+    HISTORY_SUFFIX = '.history'
+    
+    def __init__(
+        self, 
+        programs_path: str, 
+        students_path: str, 
+        mode: Literal['file', 'partitioned', 'kiosk', 'lazy'] = 'file',
+        store: Literal['dict', 'columnar'] = 'dict'
+    ) -> None:
+        """
+        Initialize the SSIS instance.
+        
+        In partitioned mode students are stored as one CSV file per admission year,
+        named after the year (optionally compressed, e.g. "2023.csv.gz"), and a
+        partition is only read once a lookup or query needs it.
+        
+        Kiosk mode is read-only and reads students from a record file written by
+        export_records. Nothing is loaded up front: get_student_by_id searches the
+        memory-mapped file and builds a Student for the record it finds.
+        
+        Lazy mode is read-only and reads students from the CSV file on demand.
+        get_student_by_id finds the row's offset in the sidecar index written when
+        saving, rebuilding the index first if the CSV file changed since, and parses
+        only that row. The CSV file must not be compressed.
+        
+        With the columnar store, loaded students are kept in a StudentColumns
+        instead of a dict of Student objects, which takes several times less memory
+        per student but builds a new Student on every read. Student IDs must then be
+        of the form YYYY-NNNN.
+        
+        Once a term is started with start_term, changes to the year level and
+        program of students are recorded in the enrollment history, which is saved
+        with the students.
+
+        Args:
+            programs_path (str): Path to the programs CSV file.
+            students_path (str): Path to the students CSV file, or to the partition directory in partitioned mode.
+                CSV paths ending in ".gz" or ".xz" are read and written compressed. In kiosk mode, path to the record file.
+            mode (Literal['file', 'partitioned', 'kiosk', 'lazy'], optional): How students are stored. Defaults to 'file'.
+            store (Literal['dict', 'columnar'], optional): How loaded students are kept in memory. Defaults to 'dict'.
+        """
+        self.programs_path = programs_path
+        self.students_path = students_path
+        self.mode = mode
+        
+        # Dictionaries to store programs and students
+        self.programs: dict[str, Program] = {}
+        self.students: MutableMapping[str, Student] = StudentColumns() if store == 'columnar' else {}
+        
+        # Record file students are looked up in, in kiosk mode
+        self.__records: StudentRecordFile | None = None
+        
+        # Row offsets students are looked up by, in lazy mode
+        self.__offsets: StudentOffsetIndex | None = None
+        
+        # Partition files by admission year, and the years loaded or changed since saving
+        self.__partitions: dict[str, str] = {}
+        self.__loaded_partitions: set[str] = set()
+        self.__dirty_partitions: set[str] = set()
+        
+        # IDs of the students added, changed or deleted since they were last saved
+        self.__unsaved_students: set[str] = set()
+        
+        # Signature and row fingerprints of each CSV file as last loaded or saved, by path
+        self.__disk_stats: dict[str, tuple[int, int]] = {}
+        self.__disk_rows: dict[str, Mapping[str, int]] = {}
+        
+        self.__listeners: list[Callable[[ChangeEvent], None]] = []
+        
+        # Prefix index over program codes and the words of program names
+        self.__program_prefixes = PrefixIndex()
+        
+        # Program codes in order, for paging through programs
+        self.__program_codes = SortIndex()
+        
+        # Sort indexes over students, built per column on first use
+        self.__sort_indexes: dict[str, SortIndex] = {}
+        
+        # Upper-case ID, name and program text per student, filled in as searches test them
+        self.__search_texts: dict[str, str] | None = None
+        
+        # Trigram index over student names, built on first fuzzy search. It takes several
+        # times the memory of the students themselves, so it is not built before it is used
+        self.__name_index: TrigramIndex | None = None
+        
+        # Serial numbers in use per admission year, filled as students are loaded
+        self.__id_allocator = IdAllocator()
+        
+        # Version of each table, bumped by every change, and query results tagged with it
+        self.__versions = {'programs': 0, 'students': 0}
+        self.__query_cache = QueryCache()
+        
+        # Records as they were before the open transaction first changed them, by table and key
+        self.__transaction_depth = 0
+        self.__before: dict[str, dict[str, Any]] = {}
+        
+        # Events of the last committed transaction
+        self.__committed: list[ChangeEvent] = []
+        
+        # Set while rows read from the CSV files are applied, which are neither journaled nor unsaved
+        self.__from_disk = False
+        
+        # Load programs, students and the year levels and programs of students per
+        # academic term, then redo the changes left unsaved
+        self.__load_programs()
+        self.__load_students()
+        self.__history = EnrollmentHistory.load(self.__history_path())
+        
+        if self.mode not in SSIS.READ_ONLY_MODES:
+            self.__replay_journals()
+    
+    @staticmethod
+    def create_csv_file(file_path: str, fieldnames: Collection[str]) -> None:
+        """
+        Create a new CSV file with the specified field names as header.
+
+        Args:
+            file_path (str): Path to the CSV file.
+            fieldnames (Collection[str]): Field names to be used as header.
+        """
+        with open_csv(file_path, 'w') as file:
+            writer = DictWriter(file, fieldnames)
+            writer.writeheader()
+    
+    def __load_programs(self) -> None:
+        """Load programs from the programs CSV file."""
+        fingerprints = self.__disk_rows[self.programs_path] = {}
+        
+        try:
+            with open_csv(self.programs_path) as prog_file:
+                self.__disk_stats[self.programs_path] = SSIS.__file_signature(os.fstat(prog_file.fileno()))
+                
+                next(prog_file)  # Skip header
+                
+                reader = DictReader(prog_file, SSIS.PROGRAM_FIELD_NAMES)
+                
+                for row in reader:
+                    if row['code'] in self.programs:
+                        raise DuplicateProgramError(row['code'])
+                    
+                    self.__insert_program(SSIS.__program_from_row(row))
+                    fingerprints[row['code']] = SSIS.__fingerprint(row, SSIS.PROGRAM_FIELD_NAMES)
+            
+        except FileNotFoundError:
+            SSIS.create_csv_file(self.programs_path, SSIS.PROGRAM_FIELD_NAMES)
+            self.__disk_stats[self.programs_path] = SSIS.__file_signature(os.stat(self.programs_path))
+    
+    def __load_students(self) -> None:
+        """Load students from the students CSV file, or prepare the lazily read storage of the other modes."""
+        if self.mode == 'partitioned':
+            os.makedirs(self.students_path, exist_ok=True)
+            self.__find_partitions()
+        
+        elif self.mode == 'kiosk':
+            self.__open_records()
+        
+        elif self.mode == 'lazy':
+            self.__open_offsets()
+        
+        else:
+            self.__load_student_file(self.students_path)
+    
+    def __load_student_file(self, path: str) -> None:
+        """Load the students of one CSV file."""
+        fingerprints: dict[str, int] = {}
+        
+        try:
+            with open_csv(path) as stud_file:
+                self.__disk_stats[path] = SSIS.__file_signature(os.fstat(stud_file.fileno()))
+                
+                next(stud_file)  # Skip header
+                
+                reader = DictReader(stud_file, SSIS.STUDENT_FIELD_NAMES, restval='')
+                
+                for row in reader:
+                    if row['id'] in self.students:
+                        raise DuplicateStudentError(row['id'])
+                    
+                    self.__insert_student(SSIS.__student_from_row(row))
+                    fingerprints[row['id']] = SSIS.__fingerprint(row, SSIS.STUDENT_FIELD_NAMES)
+            
+        except FileNotFoundError:
+            SSIS.create_csv_file(path, SSIS.STUDENT_FIELD_NAMES)
+            self.__disk_stats[path] = SSIS.__file_signature(os.stat(path))
+        
+        self.__disk_rows[path] = self.__compact_fingerprints(path, fingerprints)
+    
+    def __open_records(self) -> None:
+        """Open the record file of kiosk mode and remember its signature."""
+        if self.__records is not None:
+            self.__records.close()
+        
+        self.__records = StudentRecordFile(self.students_path)
+        self.__disk_stats[self.students_path] = SSIS.__file_signature(os.stat(self.students_path))
+    
+    def __open_offsets(self) -> None:
+        """Open the sidecar index of lazy mode, rebuilding it if stale, and remember the CSV's signature."""
+        if SSIS.__compressed(self.students_path):
+            raise ValueError(f'Lazy mode needs an uncompressed students file, not {self.students_path!r}.')
+        
+        if self.__offsets is not None:
+            self.__offsets.close()
+        
+        self.__offsets = StudentOffsetIndex(self.students_path)
+        self.__disk_stats[self.students_path] = SSIS.__file_signature(os.stat(self.students_path))
+    
+    def __current_offsets(self) -> StudentOffsetIndex:
+        """Get the row offsets, reopening them first if the CSV file was rewritten."""
+        # Offsets into a file rewritten since indexing would point at the wrong rows
+        if SSIS.__file_signature(os.stat(self.students_path)) != self.__disk_stats[self.students_path]:
+            self.__open_offsets()
+        
+        return self.__offsets  # type: ignore
+    
+    @staticmethod
+    def __compressed(path: str) -> bool:
+        """Tell whether a CSV path is read and written compressed."""
+        return path.endswith(COMPRESSED_SUFFIXES)
+    
+    def export_records(self, records_path: str) -> int:
+        """
+        Write all students to a record file for kiosk mode.
+
+        Args:
+            records_path (str): Path to the record file.
+
+        Returns:
+            int: Number of students written.
+        """
+        self.load_all_partitions()
+        
+        return StudentRecordFile.write(records_path, self.students.values())
+    
+    def check_integrity(self, workers: int | None = None) -> dict:
+        """
+        Check the programs and students files on disk, see model.integrity.check_integrity.
+        
+        Unsaved changes are not checked. In partitioned mode every partition file is checked.
+
+        Args:
+            workers (int | None, optional): Number of worker processes. Defaults to None (one per CPU).
+
+        Returns:
+            dict: Machine-readable report of the issues found.
+
+        Raises:
+            ValueError: In kiosk mode, whose record file is not a CSV file.
+        """
+        if self.mode == 'kiosk':
+            raise ValueError('Kiosk mode has no students CSV file to check.')
+        
+        if self.mode == 'partitioned':
+            self.__find_partitions()
+            students_paths = [self.__partitions[year] for year in sorted(self.__partitions)]
+        
+        else:
+            students_paths = [self.students_path]
+        
+        return check_integrity(self.programs_path, students_paths, workers)
+    
+    def write_rosters(
+        self, 
+        output_dir: str, 
+        formats: Iterable[str] = ROSTER_FORMATS, 
+        workers: int | None = None
+    ) -> list[str]:
+        """
+        Write one roster file per program and format, see model.reports.write_rosters.
+        
+        Unsaved changes are included. In kiosk and lazy modes students are streamed
+        from the file instead of being loaded.
+
+        Args:
+            output_dir (str): Directory to write to, created if missing.
+            formats (Iterable[str], optional): Formats to write, from ROSTER_FORMATS. Defaults to all of them.
+            workers (int | None, optional): Number of worker processes. Defaults to None (one per CPU).
+
+        Returns:
+            list[str]: Paths of the files written.
+        """
+        return write_rosters(self.programs.values(), self.__all_students(), output_dir, formats, workers)
+    
+    def publish_snapshot(self) -> StudentSnapshot:
+        """
+        Pack every student into shared memory for worker processes, see model.snapshot.StudentSnapshot.
+        
+        Workers attach to the snapshot by its name instead of reading the CSV files
+        or being sent the students. Later changes do not show in the snapshot.
+        Use it as a context manager, so it is freed when the job finishes.
+
+        Returns:
+            StudentSnapshot: Snapshot owned by this process.
+        """
+        return StudentSnapshot.publish(self.__all_students())
+    
+    def enrollment_counts(self, workers: int | None = None) -> dict[tuple[str | None, int], int]:
+        """
+        Count the students of each program and year level in parallel, from a shared snapshot.
+
+        Args:
+            workers (int | None, optional): Number of worker processes, or 1 to count in this process. Defaults to None (one per CPU).
+
+        Returns:
+            dict[tuple[str | None, int], int]: Number of students by program code (None for none) and year level.
+        """
+        with self.publish_snapshot() as snapshot:
+            return enrollment_counts(snapshot, workers)
+    
+    def __all_students(self) -> Iterator[Student]:
+        """Iterate over every student, whatever the mode, without loading the ones not yet loaded."""
+        if self.__records is not None:
+            records = self.__records
+            
+            return (records.student_at(position) for position in range(len(records)))
+        
+        if self.__offsets is not None:
+            return self.__stream_students(self.students_path)
+        
+        self.load_all_partitions()
+        
+        return iter(self.students.values())
+    
+    @staticmethod
+    def __stream_students(path: str) -> Iterator[Student]:
+        """Read the students of a CSV file one row at a time."""
+        with open_csv(path) as stud_file:
+            next(stud_file)  # Skip header
+            
+            for row in DictReader(stud_file, SSIS.STUDENT_FIELD_NAMES, restval=''):
+                yield SSIS.__student_from_row(row)
+    
+    def __check_writable(self) -> None:
+        """
+        Refuse a change in a read-only mode.
+
+        Raises:
+            ReadOnlyError: If the SSIS was opened in a read-only mode.
+        """
+        if self.mode in SSIS.READ_ONLY_MODES:
+            raise ReadOnlyError(self.mode)
+    
+    def __find_partitions(self) -> None:
+        """Register the partition files in the partition directory that are not known yet."""
+        for file_name in os.listdir(self.students_path):
+            if (match := SSIS.PARTITION_FILE_PATTERN.fullmatch(file_name)):
+                self.__partitions.setdefault(match[1], os.path.join(self.students_path, file_name))
+    
+    @property
+    def loaded_partitions(self) -> frozenset[str]:
+        """Admission years whose partitions are loaded. Always empty outside partitioned mode."""
+        return frozenset(self.__loaded_partitions)
+    
+    def load_partition(self, year: str) -> None:
+        """
+        Load the students admitted in a year, if not loaded yet. Does nothing outside partitioned mode.
+
+        Args:
+            year (str): Four-digit admission year, the prefix of the students' IDs.
+        """
+        if self.mode != 'partitioned' or year in self.__loaded_partitions:
+            return
+        
+        self.__loaded_partitions.add(year)
+        
+        if year in self.__partitions:
+            self.__load_student_file(self.__partitions[year])
+            self.__versions['students'] += 1
+    
+    def load_all_partitions(self) -> None:
+        """Load every partition. Queries over all students call this first."""
+        for year in sorted(self.__partitions):
+            self.load_partition(year)
+    
+    def students_admitted_in(self, year: str) -> list[Student]:
+        """
+        Get the students admitted in a year, loading only that year's partition.
+
+        Args:
+            year (str): Four-digit admission year.
+
+        Returns:
+            list[Student]: Students whose ID starts with the year, ordered by ID.
+        """
+        self.load_partition(year)
+        
+        return sorted(
+            (student for student in self.students.values() if student.id.startswith(f'{year}-')), 
+            key=lambda student: student.id
+        )
+    
+    @staticmethod
+    def partition_students_file(students_path: str, directory: str) -> None:
+        """
+        Split a students CSV file into per-year partition files for partitioned mode.
+        
+        Rows are streamed, so the file is never loaded as a whole. Rows keep their
+        order within each partition.
+
+        Args:
+            students_path (str): Path to the students CSV file.
+            directory (str): Partition directory to write to. Existing partition files are replaced.
+        """
+        os.makedirs(directory, exist_ok=True)
+        
+        files = {}
+        writers: dict[str, DictWriter] = {}
+        
+        try:
+            with open_csv(students_path) as stud_file:
+                next(stud_file)  # Skip header
+                
+                for row in DictReader(stud_file, SSIS.STUDENT_FIELD_NAMES, restval=''):
+                    if (year := row['id'][:4]) not in writers:
+                        files[year] = open_csv(os.path.join(directory, f'{year}.csv'), 'w')
+                        
+                        writers[year] = DictWriter(files[year], SSIS.STUDENT_FIELD_NAMES)
+                        writers[year].writeheader()
+                    
+                    writers[year].writerow(row)
+        
+        finally:
+            for file in files.values():
+                file.close()
+    
+    def __partition_path(self, year: str) -> str:
+        """Get the path of a year's partition file."""
+        return self.__partitions.setdefault(year, os.path.join(self.students_path, f'{year}.csv'))
+    
+    def __mark_dirty(self, student_id: str) -> None:
+        """Remember that the partition holding a student has to be saved."""
+        if self.mode == 'partitioned':
+            self.__dirty_partitions.add(student_id[:4])
+    
+    @staticmethod
+    def __program_from_row(row: dict[str, str], trusted: bool = False) -> Program:
+        """Build a program from a CSV row, skipping validation if the row was written from a valid program."""
+        if trusted:
+            return Program.trusted(row['code'], row['name'])
+        
+        return Program(
+            code=row['code'],
+            name=row['name']
+        )
+    
+    @staticmethod
+    def __student_from_row(row: dict[str, str], trusted: bool = False) -> Student:
+        """Build a student from a CSV row, skipping validation if the row was written from a valid student."""
+        if trusted:
+            return Student.trusted(
+                row['id'],
+                (row['surname'], row['firstname'], row['middlename'] or None, row['suffix'] or None),
+                int(row['year']),
+                row['gender'],
+                row['program_code'] or None
+            )
+        
+        return Student(
+            id=row['id'],
+            name=(
+                row['surname'],
+                row['firstname'],
+                row['middlename'],
+                row['suffix']
+            ),
+            year=int(row['year']),
+            gender=row['gender'],
+            program_code=row['program_code']
+        )
+    
+    @staticmethod
+    def __program_row(program: Program) -> dict[str, str]:
+        """Build the CSV row of a program."""
+        return {
+            'code': program.code,
+            'name': program.name
+        }
+    
+    @staticmethod
+    def __student_row(student: Student) -> dict[str, str]:
+        """Build the CSV row of a student."""
+        return {
+            'id': student.id,
+            'surname': student.name[0],
+            'firstname': student.name[1],
+            'middlename': student.name[2] or '',
+            'suffix': student.name[3] or '',
+            'year': str(student.year),
+            'gender': student.gender,
+            'program_code': student.program_code or ''
+        }
+    
+    @staticmethod
+    def __fingerprint(row: dict[str, str], fieldnames: Collection[str]) -> int:
+        """Hash the fields of a CSV row to detect changes to it on disk."""
+        return hash(tuple(row[field] or '' for field in fieldnames))
+    
+    def __compact_fingerprints(self, path: str, fingerprints: dict[str, int]) -> Mapping[str, int]:
+        """Pack the row fingerprints of a students file when students are stored in columns, to match their footprint."""
+        if path == self.programs_path or not isinstance(self.students, StudentColumns):
+            return fingerprints
+        
+        return RowFingerprints(fingerprints)
+    
+    @staticmethod
+    def __file_signature(stat: os.stat_result) -> tuple[int, int]:
+        """Reduce a file's status to the parts that change when it is rewritten."""
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def save_programs(self) -> None:
+        """Save programs to the programs CSV file."""
+        self.__check_writable()
+        
+        fingerprints = self.__disk_rows[self.programs_path] = {}
+        
+        with open_csv(self.programs_path, 'w') as prog_file:
+            writer = DictWriter(prog_file, SSIS.PROGRAM_FIELD_NAMES)
+            writer.writeheader()
+            
+            for program in sorted(self.programs.values(), key=lambda program: program.code):
+                writer.writerow(row := SSIS.__program_row(program))
+                fingerprints[program.code] = SSIS.__fingerprint(row, SSIS.PROGRAM_FIELD_NAMES)
+        
+        self.__disk_stats[self.programs_path] = SSIS.__file_signature(os.stat(self.programs_path))
+        self.__discard_journal('programs')
+    
+    def save_students(self, method: Literal['sort', 'external', 'merge'] = 'sort') -> None:
+        """
+        Save students to the students CSV file, or only the changed partitions in partitioned mode.
+        
+        Files are always written in ID order, which the method only changes the
+        cost of:
+        
+        - 'sort' sorts every student of a file in memory.
+        - 'external' sorts them in runs written to temporary files next to the
+          file and merges the runs, see model.storage.external_sort, so a sorted
+          copy of the whole table is never held in memory.
+        - 'merge' reads the file as last loaded or saved and merges in only the
+          students changed since, see model.storage.merge_sorted, without sorting
+          the others at all. A file that changed on disk since, or that is not in
+          ID order, is saved with 'external' instead.
+        
+        If a lazy session left a sidecar index next to the uncompressed students
+        file, the index is rewritten as well.
+
+        Args:
+            method (Literal['sort', 'external', 'merge'], optional): How files are put in ID order. Defaults to 'sort'.
+        """
+        self.__check_writable()
+        
+        if self.mode != 'partitioned':
+            self.__save_student_file(self.students_path, self.students.values(), self.__unsaved_students, method)
+            
+            # Keep the sidecar index of lazy mode in step with the file. Lazy mode cannot save
+            # and builds a missing index on opening, so only an existing one is rewritten
+            if os.path.exists(self.students_path + StudentOffsetIndex.SUFFIX):
+                StudentOffsetIndex.build(self.students_path)
+            
+            self.__unsaved_students.clear()
+            self.__history.save(self.__history_path())
+            self.__discard_journal('students')
+            return
+        
+        # Group the students of the changed partitions in a single pass
+        partitions: dict[str, list[Student]] = {year: [] for year in self.__dirty_partitions}
+        
+        for student in self.students.values():
+            if (year := student.id[:4]) in partitions:
+                partitions[year].append(student)
+        
+        for year, students in partitions.items():
+            changed_ids = {student_id for student_id in self.__unsaved_students if student_id[:4] == year}
+            
+            self.__save_student_file(self.__partition_path(year), students, changed_ids, method)
+        
+        self.__dirty_partitions.clear()
+        self.__unsaved_students.clear()
+        self.__history.save(self.__history_path())
+        self.__discard_journal('students')
+    
+    def __save_student_file(
+        self, 
+        path: str, 
+        students: Iterable[Student], 
+        changed_ids: Collection[str], 
+        method: Literal['sort', 'external', 'merge']
+    ) -> None:
+        """Write students to one CSV file, ordered by ID, see save_students for the methods."""
+        if method == 'merge' and self.__unchanged_on_disk(path):
+            try:
+                self.__merge_student_file(path, changed_ids)
+                return
+            
+            except ValueError:
+                pass  # Not in ID order, so the file is rewritten from the loaded students
+        
+        if method == 'sort':
+            rows = (SSIS.__student_row(student) for student in sorted(students, key=lambda student: student.id))
+        else:
+            rows = external_sort(
+                (SSIS.__student_row(student) for student in students), 
+                SSIS.STUDENT_FIELD_NAMES, 
+                'id', 
+                os.path.dirname(os.path.abspath(path))
+            )
+        
+        self.__disk_rows[path] = self.__compact_fingerprints(path, SSIS.__write_student_rows(path, rows))
+        self.__disk_stats[path] = SSIS.__file_signature(os.stat(path))
+    
+    def __merge_student_file(self, path: str, changed_ids: Collection[str]) -> None:
+        """Merge the changed students into a file in ID order, writing a copy that then replaces it."""
+        changes = {
+            student_id: SSIS.__student_row(self.students[student_id]) if student_id in self.students else None
+            for student_id in changed_ids
+        }
+        
+        # The copy keeps the name of the file, so it is compressed the same way
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as temp_dir:
+            temp_path = os.path.join(temp_dir, os.path.basename(path))
+            
+            with open_csv(path) as stud_file:
+                next(stud_file, None)  # Skip header
+                
+                fingerprints = SSIS.__write_student_rows(
+                    temp_path, 
+                    merge_sorted(DictReader(stud_file, SSIS.STUDENT_FIELD_NAMES, restval=''), changes, 'id')
+                )
+            
+            os.replace(temp_path, path)
+        
+        self.__disk_rows[path] = self.__compact_fingerprints(path, fingerprints)
+        self.__disk_stats[path] = SSIS.__file_signature(os.stat(path))
+    
+    @staticmethod
+    def __write_student_rows(path: str, rows: Iterable[dict[str, str]]) -> dict[str, int]:
+        """Write student rows to a CSV file in the order given and return their fingerprints by ID."""
+        fingerprints = {}
+        
+        with open_csv(path, 'w') as stud_file:
+            writer = DictWriter(stud_file, SSIS.STUDENT_FIELD_NAMES)
+            writer.writeheader()
+            
+            for row in rows:
+                writer.writerow(row)
+                fingerprints[row['id']] = SSIS.__fingerprint(row, SSIS.STUDENT_FIELD_NAMES)
+        
+        return fingerprints
+    
+    def __unchanged_on_disk(self, path: str) -> bool:
+        """Check whether a file is still as it was last loaded or saved."""
+        try:
+            return self.__disk_stats.get(path) == SSIS.__file_signature(os.stat(path))
+        
+        except FileNotFoundError:
+            return False
+    
+    def subscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """
+        Register a function to be called with every change, whether made through
+        this SSIS or applied from disk.
+
+        Args:
+            listener (Callable[[ChangeEvent], None]): Function to call.
+        """
+        self.__listeners.append(listener)
+    
+    def unsubscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """
+        Stop calling a registered listener.
+
+        Args:
+            listener (Callable[[ChangeEvent], None]): Function to stop calling.
+        """
+        self.__listeners.remove(listener)
+    
+    def reload_changed(self) -> list[ChangeEvent]:
+        """
+        Apply the rows that changed in the CSV files since they were last loaded or saved.
+        
+        A file is only read again when its modification time or size changed. It is
+        then streamed and each row is compared with the fingerprint of the row last
+        seen on disk, so unsaved edits to other rows are kept. The changes of both
+        tables are applied in one transaction, so a program renamed in both files is
+        only checked once its students have moved, and listeners get one event per
+        table. Rows that fail validation, students in a program that does not exist
+        and programs that students are still in are skipped. Applied rows are not
+        journaled, since they are already on disk.
+        
+        In partitioned mode only loaded partitions are compared; new partition files
+        are registered to be loaded when needed. In kiosk and lazy modes a replaced
+        record or CSV file is reopened, reindexing it if needed, and no changes are reported.
+
+        Returns:
+            list[ChangeEvent]: Changes applied, one per table that changed.
+        """
+        if self.mode in SSIS.READ_ONLY_MODES:
+            if SSIS.__file_signature(os.stat(self.students_path)) != self.__disk_stats[self.students_path]:
+                self.__open_records() if self.mode == 'kiosk' else self.__open_offsets()
+            
+            return []
+        
+        # New signature and row fingerprints of the files read, kept once their changes are applied
+        # so that changes failing to apply are found again by the next call
+        disk_states: dict[str, tuple[tuple[int, int], dict[str, int]]] = {}
+        
+        program_changes = self.__diff_file(self.programs_path, SSIS.PROGRAM_FIELD_NAMES, 'code', disk_states)
+        
+        if self.mode == 'partitioned':
+            self.__find_partitions()
+            student_paths = [self.__partitions[year] for year in sorted(self.__loaded_partitions) if year in self.__partitions]
+        
+        else:
+            student_paths = [self.students_path]
+        
+        changed: dict[str, dict[str, str]] = {}
+        removed: set[str] = set()
+        
+        for path in student_paths:
+            if (changes := self.__diff_file(path, SSIS.STUDENT_FIELD_NAMES, 'id', disk_states)) is not None:
+                changed.update(changes[0])
+                removed.update(changes[1])
+        
+        changed_programs, removed_programs = program_changes or ({}, set())
+        
+        if not (changed_programs or removed_programs or changed or removed):
+            self.__keep_disk_states(disk_states)
+            
+            return []
+        
+        # Rows taken from disk do not make their partitions differ from disk
+        dirty_partitions = set(self.__dirty_partitions)
+        
+        self.__from_disk = True
+        self.__committed = []
+        
+        try:
+            with self.transaction():
+                self.__apply_program_changes(changed_programs)
+                self.__apply_student_changes(changed, removed)
+                self.__remove_programs(removed_programs)
+        
+        finally:
+            self.__from_disk = False
+            self.__dirty_partitions = dirty_partitions
+        
+        self.__keep_disk_states(disk_states)
+        
+        # Students replaced from disk no longer differ from it
+        for event in self.__committed:
+            if event.table == 'students':
+                self.__unsaved_students -= event.added | event.updated | event.removed
+        
+        return self.__committed
+    
+    def __notify(self, events: Iterable[ChangeEvent]) -> None:
+        """Call every listener with each event."""
+        for event in events:
+            for listener in tuple(self.__listeners):
+                listener(event)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group changes so they are validated, journaled and reported together.
+        
+        Changes made in the block apply at once, so later steps see earlier ones,
+        but the record each first replaces is kept. When the block ends, every
+        student it added or moved to another program, and every student of a
+        program it removed, must be in an existing program or in none. If the
+        block raises or this check fails, all of its changes are rolled back and the
+        exception propagates. Otherwise the changes are appended to the journals as
+        one entry per table, and listeners get one ChangeEvent per table. If the
+        journals cannot be written, the changes are rolled back as well.
+        
+        Each mutating method runs in a transaction of its own, and a transaction
+        opened inside another joins it.
+
+        Raises:
+            ReadOnlyError: If the SSIS was opened in a read-only mode.
+            OrphanedStudentError: If a student added or moved in the block is in a program that does not exist.
+        """
+        self.__check_writable()
+        
+        if self.__transaction_depth:
+            self.__transaction_depth += 1
+            
+            try:
+                yield
+            finally:
+                self.__transaction_depth -= 1
+            
+            return
+        
+        self.__before = {'programs': {}, 'students': {}}
+        dirty_partitions = set(self.__dirty_partitions)
+        
+        self.__transaction_depth = 1
+        
+        try:
+            yield
+            self.__validate_transaction()
+            
+            # A change that cannot be journaled is rolled back, so memory never holds
+            # changes the journals and listeners do not know about
+            changes = self.__net_changes()
+            self.__journal_changes(changes)
+        
+        except BaseException:
+            self.__rollback()
+            self.__dirty_partitions = dirty_partitions
+            raise
+        
+        finally:
+            self.__transaction_depth = 0
+        
+        self.__committed = self.__commit(changes)
+        self.__notify(self.__committed)
+    
+    def version(self, table: Literal['programs', 'students']) -> int:
+        """
+        Get the version of a table, which grows with every change to it.
+        
+        Results computed from a table are still valid while its version is unchanged.
+
+        Args:
+            table (Literal['programs', 'students']): Table name.
+
+        Returns:
+            int: Current version.
+        """
+        return self.__versions[table]
+    
+    def __cached(self, table: Literal['programs', 'students'], key: tuple, compute: Callable[[], Any]) -> Any:
+        """Get the result of a query over a table from the query cache, computing it if the table changed since."""
+        # Versions only change when a transaction commits, so queries inside one see its changes uncached
+        if self.__transaction_depth:
+            return compute()
+        
+        return self.__query_cache.get(key, self.__versions[table], compute)
+    
+    def __touch(self, table: Literal['programs', 'students'], key: str) -> None:
+        """Keep the record a key has before the open transaction first changes it."""
+        before = self.__before[table]
+        
+        if key not in before:
+            before[key] = self.__table(table).get(key)
+    
+    def __table(self, table: Literal['programs', 'students']) -> dict[str, Any]:
+        """Get the records of a table by name."""
+        return self.programs if table == 'programs' else self.students
+    
+    def __validate_transaction(self) -> None:
+        """
+        Check that no student the open transaction moved to a program, or left in a
+        program it removed, is in a missing program.
+        
+        Students already in a missing program, e.g. loaded that way from the CSV
+        file, may still be written as long as their program code is kept.
+        """
+        removed_programs = {
+            program_code for program_code, program in self.__before['programs'].items() 
+            if program is not None and program_code not in self.programs
+        }
+        
+        for student_id, old_student in self.__before['students'].items():
+            student = self.students.get(student_id)
+            
+            if student is None or not student.program_code or student.program_code in self.programs:
+                continue
+            
+            if old_student is None or old_student.program_code != student.program_code:
+                raise OrphanedStudentError(student_id, student.program_code)
+        
+        # Only removing a program can strand students the transaction did not touch
+        if removed_programs:
+            self.load_all_partitions()
+            
+            for student in self.students.values():
+                if student.program_code in removed_programs:
+                    raise OrphanedStudentError(student.id, student.program_code)
+    
+    def __rollback(self) -> None:
+        """Put back every record the open transaction changed."""
+        for student_id, student in self.__before['students'].items():
+            if student_id in self.students:
+                self.__remove_student(student_id)
+            
+            if student is not None:
+                self.__insert_student(student)
+        
+        for program_code, program in self.__before['programs'].items():
+            if program_code in self.programs:
+                self.__remove_program(program_code)
+            
+            if program is not None:
+                self.__insert_program(program)
+    
+    def __net_changes(self) -> dict[str, tuple[set[str], set[str], set[str]]]:
+        """Get the keys the open transaction added, updated and removed, by table."""
+        changes = {}
+        
+        for table in ('programs', 'students'):
+            records = self.__table(table)
+            added, updated, removed = set(), set(), set()
+            
+            for key, old in self.__before[table].items():
+                new = records.get(key)
+                
+                if old is None and new is not None:
+                    added.add(key)
+                elif old is not None and new is None:
+                    removed.add(key)
+                elif old is not new and new is not None:
+                    updated.add(key)
+            
+            changes[table] = (added, updated, removed)
+        
+        return changes
+    
+    def __journal_changes(self, changes: dict[str, tuple[set[str], set[str], set[str]]]) -> None:
+        """
+        Append the net changes of the open transaction to the journals, one entry per table.
+        
+        Either every entry is written or none is: if one fails, the entries already
+        appended are cut off again, so a replay never redoes half of a transaction
+        that was rolled back. Changes applied from disk are not journaled.
+        """
+        if self.__from_disk:
+            return
+        
+        # Size of each journal before its entry was appended
+        written: list[tuple[str, int]] = []
+        
+        try:
+            for table, (added, updated, removed) in changes.items():
+                if added or updated or removed:
+                    path = self.__journal_path(table)
+                    written.append((path, os.path.getsize(path) if os.path.exists(path) else 0))
+                    
+                    records = self.__table(table)  # type: ignore
+                    self.__write_journal(table, [records[key] for key in sorted(added | updated)], sorted(removed))  # type: ignore
+        
+        except BaseException:
+            for path, size in written:
+                with suppress(OSError), open(path, 'r+b') as journal:
+                    journal.truncate(size)
+            
+            raise
+    
+    def __commit(self, changes: dict[str, tuple[set[str], set[str], set[str]]]) -> list[ChangeEvent]:
+        """Record the journaled net changes of the open transaction and describe them, one event per table."""
+        events = []
+        
+        for table in ('programs', 'students'):
+            records = self.__table(table)
+            added, updated, removed = changes[table]
+            
+            if added or updated or removed:
+                self.__versions[table] += 1
+                events.append(ChangeEvent(table, frozenset(added), frozenset(updated), frozenset(removed)))
+            
+            if table == 'students':
+                if not self.__from_disk:
+                    self.__unsaved_students |= added | updated | removed
+                
+                for key in sorted(added | updated | removed):
+                    self.__record_history(self.__before[table][key], records.get(key))
+        
+        self.__before = {}
+        
+        return events
+    
+    def __journal_path(self, table: Literal['programs', 'students']) -> str:
+        """Get the path of a table's journal."""
+        path = self.programs_path if table == 'programs' else self.students_path.rstrip('/\\')
+        
+        return path + SSIS.JOURNAL_SUFFIX
+    
+    def __write_journal(self, table: Literal['programs', 'students'], records: list[Any], removed: list[str]) -> None:
+        """Append the records written and keys removed by a transaction to a table's journal, as one JSON line."""
+        to_row = SSIS.__program_row if table == 'programs' else SSIS.__student_row
+        entry = {'upsert': [to_row(record) for record in records], 'delete': removed}
+        
+        with open(self.__journal_path(table), 'a', encoding='utf-8') as journal:
+            journal.write(json.dumps(entry) + '\n')
+            journal.flush()
+            
+            # The journal is only worth keeping if it survives a crash right after the change.
+            # This costs one flush per transaction, not per record, so bulk changes made in one
+            # transaction pay it once
+            os.fsync(journal.fileno())
+    
+    def __replay_journals(self) -> None:
+        """Redo the changes journaled since the tables were last saved, e.g. before a crash."""
+        for table in ('programs', 'students'):
+            try:
+                with open(self.__journal_path(table), encoding='utf-8') as journal:
+                    for line in journal:
+                        try:
+                            entry = json.loads(line)
+                        
+                        except json.JSONDecodeError:
+                            break  # Only the last entry can be partly written
+                        
+                        for key in entry['delete']:
+                            self.__redo(table, key, None)
+                        
+                        # Journals are only written from validated changes
+                        for row in entry['upsert']:
+                            if table == 'programs':
+                                self.__redo(table, row['code'], SSIS.__program_from_row(row, trusted=True))
+                            else:
+                                self.__redo(table, row['id'], SSIS.__student_from_row(row, trusted=True))
+            
+            except FileNotFoundError:
+                continue
+    
+    def __redo(self, table: Literal['programs', 'students'], key: str, record: Any) -> None:
+        """Replace or remove one record while replaying a journal."""
+        self.__versions[table] += 1
+        
+        if table == 'programs':
+            if key in self.programs:
+                self.__remove_program(key)
+            
+            if record is not None:
+                self.__insert_program(record)
+            
+            return
+        
+        self.load_partition(key[:4])
+        
+        old = None
+        
+        if key in self.students:
+            old = self.__remove_student(key)
+        
+        if record is not None:
+            self.__insert_student(record)
+        
+        self.__record_history(old, record)
+        self.__mark_dirty(key)
+        self.__unsaved_students.add(key)
+    
+    def __history_path(self) -> str:
+        """Get the path of the enrollment history."""
+        return self.students_path.rstrip('/\\') + SSIS.HISTORY_SUFFIX
+    
+    def __record_history(self, old: Student | None, new: Student | None) -> None:
+        """Record a student's new year level and program in the current term, if either changed."""
+        if (state := enrollment_state(new)) != enrollment_state(old):
+            self.__history.record((new or old).id, state)  # type: ignore
+    
+    @property
+    def terms(self) -> tuple[str, ...]:
+        """Academic terms started so far, oldest first. The last one is the current term."""
+        return tuple(self.__history.terms)
+    
+    def start_term(self, term: str) -> None:
+        """
+        Start a new academic term. Later changes to the year level and program of
+        students are recorded as part of it, until the next term is started.
+        
+        The first term, and every EnrollmentHistory.CHECKPOINT_INTERVAL terms after
+        it, stores the state of every student, so every partition is loaded then.
+        The new term is saved with the students.
+
+        Args:
+            term (str): Name of the term, e.g. "2024-2025 1st semester".
+
+        Raises:
+            ReadOnlyError: If the SSIS was opened in a read-only mode.
+            ValueError: If the name is blank or a term with the name was already started.
+        """
+        self.__check_writable()
+        
+        self.__history.start_term(
+            term, 
+            lambda: (Enrollment(student.id, student.year, student.program_code) for student in self.__all_students())
+        )
+    
+    def roster_as_of(self, program_code: str, term: str) -> list[Enrollment]:
+        """
+        List the students a program had at the end of a term.
+        
+        The roster is rebuilt from the nearest checkpoint before the term and the
+        changes of the terms since, not from the students as they are now.
+
+        Args:
+            program_code (str): Code the program had during the term.
+            term (str): Name of a started term. The current term gives the roster now.
+
+        Returns:
+            list[Enrollment]: Students of the program, with their year level then, in ID order.
+
+        Raises:
+            KeyError: If no term has the name.
+        """
+        return self.__history.roster(program_code, term)
+    
+    def enrollment_history(self, student_id: str) -> list[tuple[str, Enrollment | None]]:
+        """
+        List the terms in which a student's year level or program changed.
+
+        Args:
+            student_id (str): Student ID.
+
+        Returns:
+            list[tuple[str, Enrollment | None]]: Each term with the student's state at its end,
+                or None if the student was deleted, oldest first.
+        """
+        return self.__history.student_history(student_id)
+    
+    def __discard_journal(self, table: Literal['programs', 'students']) -> None:
+        """Delete a table's journal once its changes are saved or abandoned."""
+        try:
+            os.remove(self.__journal_path(table))
+        
+        except FileNotFoundError:
+            pass
+    
+    def discard_journals(self) -> None:
+        """
+        Delete the journals of unsaved changes, so they are not replayed next time.
+        
+        Call this when quitting without saving. The changes stay in memory.
+        """
+        self.__discard_journal('programs')
+        self.__discard_journal('students')
+    
+    def __diff_file(
+        self, 
+        path: str, 
+        fieldnames: Collection[str], 
+        key_field: str,
+        disk_states: dict[str, tuple[tuple[int, int], dict[str, int]]]
+    ) -> tuple[dict[str, dict[str, str]], set[str]] | None:
+        """
+        Stream a CSV file and collect the rows that differ from the last ones seen on disk.
+        
+        The signature and row fingerprints last seen are left as they are, see __keep_disk_states.
+
+        Args:
+            path (str): Path to the CSV file.
+            fieldnames (Collection[str]): Field names of the file.
+            key_field (str): Field identifying a row.
+            disk_states (dict[str, tuple[tuple[int, int], dict[str, int]]]): Gets the new signature and
+                row fingerprints of the file, by path, if it changed.
+
+        Returns:
+            tuple[dict[str, dict[str, str]], set[str]] | None: Changed rows by key and the keys
+                of removed rows, or None if the file did not change.
+        """
+        try:
+            file = open_csv(path)
+        
+        except FileNotFoundError:
+            return None
+        
+        with file:
+            signature = SSIS.__file_signature(os.fstat(file.fileno()))
+            
+            if signature == self.__disk_stats.get(path):
+                return None
+            
+            old_fingerprints = self.__disk_rows.get(path, {})
+            fingerprints: dict[str, int] = {}
+            changed = {}
+            
+            next(file, None)  # Skip header
+            
+            for row in DictReader(file, fieldnames, restval=''):
+                fingerprint = fingerprints[row[key_field]] = SSIS.__fingerprint(row, fieldnames)
+                
+                if old_fingerprints.get(row[key_field]) != fingerprint:
+                    changed[row[key_field]] = row
+        
+        disk_states[path] = (signature, fingerprints)
+        
+        # Whatever was not seen again has been removed from the file
+        return changed, {key for key in old_fingerprints if key not in fingerprints}
+    
+    def __keep_disk_states(self, disk_states: dict[str, tuple[tuple[int, int], dict[str, int]]]) -> None:
+        """Remember the signature and row fingerprints of files whose changes were applied."""
+        for path, (signature, fingerprints) in disk_states.items():
+            self.__disk_stats[path] = signature
+            self.__disk_rows[path] = self.__compact_fingerprints(path, fingerprints)
+    
+    def __apply_program_changes(self, changed: dict[str, dict[str, str]]) -> None:
+        """Apply programs added or changed on disk to the loaded programs, in the open transaction."""
+        for code, row in changed.items():
+            try:
+                program = SSIS.__program_from_row(row)
+            
+            except ValueError:
+                continue
+            
+            if code in self.programs:
+                self.update_program(code, program)
+            else:
+                self.add_program(program)
+    
+    def __apply_student_changes(self, changed: dict[str, dict[str, str]], removed: set[str]) -> None:
+        """Apply students changed on disk to the loaded students, in the open transaction."""
+        for student_id, row in changed.items():
+            try:
+                student = SSIS.__student_from_row(row)
+            
+            except ValueError:
+                continue
+            
+            if student.program_code is not None and student.program_code not in self.programs:
+                continue
+            
+            if student_id in self.students:
+                self.update_student(student)
+            else:
+                self.add_student(student)
+        
+        for student_id in removed:
+            if student_id in self.students:
+                self.delete_student_by_id(student_id)
+    
+    def __remove_programs(self, removed: set[str]) -> None:
+        """Remove programs deleted on disk, in the open transaction, except those students are still in."""
+        removed = {code for code in removed if code in self.programs}
+        
+        if removed:
+            self.load_all_partitions()
+            removed -= {student.program_code for student in self.students.values()}
+        
+        for code in removed:
+            self.delete_program_by_code(code)
+    
+    def add_program(self, program: Program) -> None:
+        """
+        Add a new program.
+
+        Args:
+            program (Program): Program to be added.
+
+        Raises:
+            DuplicateProgramError: If a program with the same code already exists.
+        """
+        self.__check_writable()
+        
+        if program.code in self.programs:
+            raise DuplicateProgramError(program.code)
+        
+        with self.transaction():
+            self.__touch('programs', program.code)
+            self.__insert_program(program)
+    
+    def __insert_program(self, program: Program) -> None:
+        """Store and index a program known not to be a duplicate."""
+        self.programs[program.code] = program
+        self.__index_program(program)
+    
+    def __remove_program(self, program_code: str) -> Program:
+        """Remove a stored program from the table and its indexes."""
+        program = self.programs.pop(program_code)
+        self.__unindex_program(program)
+        
+        return program
+    
+    def update_program(self, program_code: str, program: Program) -> Program:
+        """
+        Replace the record of an existing program, possibly under a new code.
+        
+        Students keep their program code, so a program that has students can only be
+        renamed in a transaction that also moves them.
+
+        Args:
+            program_code (str): Current code of the program.
+            program (Program): Program with the new details.
+
+        Returns:
+            Program: Program record that was replaced.
+
+        Raises:
+            ProgramNotFoundError: If no program with the current code exists.
+            DuplicateProgramError: If another program already uses the new code.
+            OrphanedStudentError: If students are left in the program under its old code.
+        """
+        self.__check_writable()
+        
+        if program_code not in self.programs:
+            raise ProgramNotFoundError(program_code)
+        
+        if program.code != program_code and program.code in self.programs:
+            raise DuplicateProgramError(program.code)
+        
+        with self.transaction():
+            self.__touch('programs', program_code)
+            self.__touch('programs', program.code)
+            
+            old_program = self.__remove_program(program_code)
+            self.__insert_program(program)
+        
+        return old_program
+    
+    def search_programs(self, prefix: str, limit: int | None = 20) -> list[Program]:
+        """
+        Find programs whose code, or any word of whose name, starts with a prefix.
+
+        Args:
+            prefix (str): Prefix to match. Case and surrounding whitespace are ignored.
+            limit (int | None, optional): Maximum number of results. Defaults to 20.
+
+        Returns:
+            list[Program]: Matching programs, ordered by the matched text.
+        """
+        prefix = prefix.upper().strip()
+        
+        # A program is listed once even when several of its words match
+        codes = dict.fromkeys(code for _, code in self.__program_prefixes.starting_with(prefix))
+        
+        return [self.programs[code] for code in islice(codes, limit)]
+    
+    def program_page(
+        self, 
+        program_code: str | None = None, 
+        limit: int = 100, 
+        direction: Literal['from', 'after', 'before'] = 'from'
+    ) -> list[Program]:
+        """
+        Fetch a page of programs ordered by code, relative to a code.
+
+        Args:
+            program_code (str | None, optional): Code the page is relative to, which need not exist.
+                Defaults to None (the first page, or the last with 'before').
+            limit (int, optional): Maximum number of programs. Defaults to 100.
+            direction (Literal['from', 'after', 'before'], optional): Whether the page starts at the code,
+                follows it or precedes it. Defaults to 'from'.
+
+        Returns:
+            list[Program]: Programs on the page, ordered by code.
+        """
+        entries = self.__program_codes.entries
+        key = None if program_code is None else (program_code, program_code)
+        
+        return [self.programs[entries[position][1]] for position in keyset_range(len(entries), entries.__getitem__, key, limit, direction)]
+    
+    def __index_program(self, program: Program) -> None:
+        """Add a program to the prefix and code indexes."""
+        for text in SSIS.__program_texts(program):
+            self.__program_prefixes.add(text, program.code)
+        
+        self.__program_codes.add(program.code, program.code)
+    
+    def __unindex_program(self, program: Program) -> None:
+        """Remove a program from the prefix and code indexes."""
+        for text in SSIS.__program_texts(program):
+            self.__program_prefixes.remove(text, program.code)
+        
+        self.__program_codes.remove(program.code, program.code)
+    
+    @staticmethod
+    def __program_texts(program: Program) -> set[str]:
+        """List the texts a program can be found by."""
+        return {program.code.upper(), program.name.upper(), *program.name.upper().split()}
+    
+    def add_student(self, student: Student) -> None:
+        """
+        Add a new student.
+
+        Args:
+            student (Student): Student to be added.
+
+        Raises:
+            DuplicateStudentError: If a student with the same ID already exists.
+            OrphanedStudentError: If the student's program does not exist.
+        """
+        self.__check_writable()
+        self.load_partition(student.id[:4])
+        
+        if student.id in self.students:
+            raise DuplicateStudentError(student.id)
+        
+        with self.transaction():
+            self.__touch('students', student.id)
+            self.__insert_student(student)
+            self.__mark_dirty(student.id)
+    
+    def __insert_student(self, student: Student) -> None:
+        """Store and index a student known not to be a duplicate."""
+        self.students[student.id] = student
+        self.__index_student(student)
+    
+    def __remove_student(self, student_id: str) -> Student:
+        """Remove a stored student from the table and its indexes."""
+        student = self.students.pop(student_id)
+        self.__unindex_student(student)
+        
+        return student
+    
+    def update_student(self, student: Student) -> Student:
+        """
+        Replace the record of an existing student.
+
+        Args:
+            student (Student): Student with the new details, identified by its ID.
+
+        Returns:
+            Student: Student record that was replaced.
+
+        Raises:
+            StudentNotFoundError: If no student with the same ID exists.
+            OrphanedStudentError: If the student's new program does not exist.
+        """
+        self.__check_writable()
+        self.load_partition(student.id[:4])
+        
+        if student.id not in self.students:
+            raise StudentNotFoundError(student.id)
+        
+        with self.transaction():
+            self.__touch('students', student.id)
+            
+            old_student = self.__remove_student(student.id)
+            self.__insert_student(student)
+            self.__mark_dirty(student.id)
+        
+        return old_student
+    
+    def update_students(self, students: Iterable[Student]) -> list[Student]:
+        """
+        Replace the records of several existing students at once.
+        
+        The students are replaced in one transaction, so either all of them are
+        updated or none is, and listeners are notified once.
+
+        Args:
+            students (Iterable[Student]): Students with the new details, identified by their IDs.
+
+        Returns:
+            list[Student]: Student records that were replaced, in the same order.
+
+        Raises:
+            StudentNotFoundError: If no student exists for one of the IDs.
+            OrphanedStudentError: If the new program of one of the students does not exist.
+        """
+        with self.transaction():
+            return [self.update_student(student) for student in students]
+    
+    def move_program_students(self, program_code: str, new_program_code: str | None) -> list[Student]:
+        """
+        Move every student of a program to another program, or unenroll them.
+        
+        Used together with renaming or deleting the program in one transaction.
+
+        Args:
+            program_code (str): Code of the program the students are in.
+            new_program_code (str | None): Code of the program to move them to, or None to unenroll them.
 
-    UNENROLLED = 'NOT ENROLLED'
+        Returns:
+            list[Student]: Student records that were replaced.
+
+        Raises:
+            OrphanedStudentError: If the new program does not exist.
+        """
+        self.load_all_partitions()
+        
+        return self.update_students(
+            Student(
+                id=student.id,
+                name=student.name,
+                year=student.year,
+                gender=student.gender,  # type: ignore
+                program_code=new_program_code
+            )
+            for student in list(self.students.values()) if student.program_code == program_code
+        )
     
-    def __init__(self, programs_path: str, students_path: str) -> None:
+    def promote_students(
+        self,
+        rules: Mapping[str, PromotionRule] | None = None,
+        default_rule: PromotionRule = PromotionRule(),
+        dry_run: bool = False
+    ) -> Promotion:
         """
-        Initialize the SSIS instance.
+        Move every student up one year level at the end of the school year.
+        
+        Students in the final year of their program graduate instead, see
+        PromotionRule. The changes are worked out in one pass over the students
+        and written in one transaction, so they are journaled and reported
+        together, and saved by the next save_students.
 
         Args:
-            programs_path (str): Path to the programs CSV file.
-            students_path (str): Path to the students CSV file.
+            rules (Mapping[str, PromotionRule] | None, optional): Rules by program code. Defaults to None.
+            default_rule (PromotionRule, optional): Rule of the programs without one, and of students in no program.
+                Defaults to PromotionRule(), graduating after Student.MAX_YEAR and keeping graduates as they are.
+            dry_run (bool, optional): Only work out the changes, for a preview. Defaults to False.
+
+        Returns:
+            Promotion: Changes made, or that would be made on a dry run. Pass it to undo_promotion to revert them.
+
+        Raises:
+            ReadOnlyError: If the SSIS was opened in a read-only mode.
+            ValueError: If the final year of a rule is not a valid year level.
         """
-        self.programs_path = programs_path
-        self.students_path = students_path
+        self.__check_writable()
         
-        # Dictionaries to store programs and students
-        self.programs: dict[str, Program] = {}
-        self.students: dict[str, Student] = {}
+        promotion = plan_promotion(self.__all_students(), rules, default_rule)
         
-        # Load programs and students from CSV files
-        self.__load_programs()
-        self.__load_students()
+        if not dry_run:
+            with self.transaction():
+                self.__replace_students(promotion.updated, promotion.removed)
+        
+        return promotion
     
-    @staticmethod
-    def create_csv_file(file_path: str, fieldnames: Collection[str]) -> None:
+    def undo_promotion(self, promotion: Promotion) -> None:
         """
-        Create a new CSV file with the specified field names as header.
+        Put back the students changed by promote_students as they were before it,
+        in one transaction. Changes made to those students since are lost.
 
         Args:
-            file_path (str): Path to the CSV file.
-            fieldnames (Collection[str]): Field names to be used as header.
+            promotion (Promotion): Promotion to undo.
+
+        Raises:
+            ReadOnlyError: If the SSIS was opened in a read-only mode.
+            OrphanedStudentError: If the program of a student was deleted since.
         """
-        with open(file_path, 'w', newline='') as file:
-            writer = DictWriter(file, fieldnames)
-            writer.writeheader()
+        self.__check_writable()
+        
+        for year in {student.id[:4] for student in promotion.before}:
+            self.load_partition(year)
+        
+        with self.transaction():
+            self.__replace_students(promotion.before, ())
     
-    def __load_programs(self) -> None:
-        """Load programs from the programs CSV file."""
-        try:
-            with open(self.programs_path, 'r') as prog_file:
-                next(prog_file)  # Skip header
+    def __replace_students(self, students: Iterable[Student], removed_ids: Iterable[str]) -> None:
+        """
+        Write and remove many students in the open transaction.
+        
+        Built sort indexes are kept and only updated for the columns whose sort key
+        changed, e.g. only the year index when students move up a year, and the
+        name index is only updated for students whose name changed.
+        """
+        for student in students:
+            self.__touch('students', student.id)
+            self.__mark_dirty(student.id)
+            
+            old_student = self.students.get(student.id)
+            
+            if old_student is None or old_student.name != student.name:
+                if old_student is not None:
+                    self.__remove_student(student.id)
                 
-                reader = DictReader(prog_file, SSIS.PROGRAM_FIELD_NAMES)
+                self.__insert_student(student)
+                continue
+            
+            for column, index in self.__sort_indexes.items():
+                old_key = SSIS.STUDENT_SORT_KEYS[column](old_student)
+                new_key = SSIS.STUDENT_SORT_KEYS[column](student)
                 
-                for row in reader:
-                    self.add_program(Program(
-                        code=row['code'],
-                        name=row['name']
-                    ))
+                if old_key != new_key:
+                    index.remove(old_key, student.id)
+                    index.add(new_key, student.id)
             
-        except FileNotFoundError:
-            SSIS.create_csv_file(self.programs_path, SSIS.PROGRAM_FIELD_NAMES)
+            self.students[student.id] = student
+            
+            if self.__search_texts is not None:
+                self.__search_texts[student.id] = SSIS.__search_text(student)
+        
+        for student_id in removed_ids:
+            self.__touch('students', student_id)
+            self.__mark_dirty(student_id)
+            self.__remove_student(student_id)
     
-    def __load_students(self) -> None:
-        """Load students from the students CSV file."""
-        try:
-            with open(self.students_path, 'r') as stud_file:
-                next(stud_file)  # Skip header
-                
-                reader = DictReader(stud_file, SSIS.STUDENT_FIELD_NAMES, restval='')
+    def sorted_student_ids(self, column: str = 'id', descending: bool = False) -> Iterator[str]:
+        """
+        Iterate over student IDs ordered by a column.
+        
+        The sort index of a column is built the first time it is requested and
+        kept up to date by later mutations, so re-sorting does not recompute keys.
+
+        Args:
+            column (str, optional): Column to sort by, one of STUDENT_SORT_KEYS. Defaults to 'id'.
+            descending (bool, optional): Sort from the largest value. Defaults to False.
+
+        Returns:
+            Iterator[str]: Student IDs in sort order, ties broken by ID.
+
+        Raises:
+            KeyError: If the column is not sortable.
+        """
+        return self.__sort_index(column).keys(descending)
+    
+    def student_position(self, student_id: str, column: str = 'id', descending: bool = False) -> int:
+        """
+        Find where a student appears when students are ordered by a column.
+
+        Args:
+            student_id (str): ID of the student.
+            column (str, optional): Column the students are ordered by. Defaults to 'id'.
+            descending (bool, optional): Whether the order is descending. Defaults to False.
+
+        Returns:
+            int: Zero-based position of the student.
+
+        Raises:
+            StudentNotFoundError: If no student with the specified ID is found.
+        """
+        self.load_partition(student_id[:4])
+        
+        if student_id not in self.students:
+            raise StudentNotFoundError(student_id)
+        
+        index = self.__sort_index(column)
+        position = index.position(SSIS.STUDENT_SORT_KEYS[column](self.students[student_id]), student_id)
+        
+        return len(index) - 1 - position if descending else position
+    
+    def student_page(
+        self, 
+        student_id: str | None = None, 
+        limit: int = 100, 
+        direction: Literal['from', 'after', 'before'] = 'from', 
+        column: str = 'id', 
+        descending: bool = False
+    ) -> list[Student]:
+        """
+        Fetch a page of students ordered by a column, relative to a student.
+        
+        Pages are keyed by the (sort key, ID) of the student they are relative to
+        and located with a binary search over the column's sort index, so turning a
+        page costs the same anywhere in the roster and only the students on the page
+        are returned. In kiosk and lazy modes the page is read straight from the
+        file, which is ordered by ID.
+
+        Args:
+            student_id (str | None, optional): ID the page is relative to. When ordering by ID it need not exist.
+                Defaults to None (the first page, or the last with 'before').
+            limit (int, optional): Maximum number of students. Defaults to 100.
+            direction (Literal['from', 'after', 'before'], optional): Whether the page starts at the student,
+                follows it or precedes it, in the order shown. Defaults to 'from'.
+            column (str, optional): Column to order by, one of STUDENT_SORT_KEYS. Defaults to 'id'.
+            descending (bool, optional): Order from the largest value. Defaults to False.
+
+        Returns:
+            list[Student]: Students on the page, in the order shown.
+
+        Raises:
+            KeyError: If the column is not sortable.
+            ValueError: If ordering by another column than ID in kiosk or lazy mode.
+            StudentNotFoundError: If ordering by another column than ID and no student has the ID.
+        """
+        if self.__records is not None or self.__offsets is not None:
+            if column != 'id':
+                raise ValueError(f'Students can only be paged by ID in {self.mode!r} mode.')
+            
+            if self.__records is not None:
+                records = self.__records
+                positions = keyset_range(len(records), records.student_id_at, student_id, limit, direction, descending)
                 
-                for row in reader:
-                    self.add_student(Student(
-                        id=row['id'],
-                        name=(
-                            row['surname'],
-                            row['firstname'],
-                            row['middlename'],
-                            row['suffix']
-                        ),
-                        year=int(row['year']),
-                        gender=row['gender'],
-                        program_code=row['program_code']
-                    ))
+                return [records.student_at(position) for position in positions]
             
-        except FileNotFoundError:
-            SSIS.create_csv_file(self.students_path, SSIS.STUDENT_FIELD_NAMES)
+            offsets = self.__current_offsets()
+            positions = keyset_range(len(offsets), offsets.student_id_at, student_id, limit, direction, descending)
+            
+            return [SSIS.__student_from_row(dict(zip(SSIS.STUDENT_FIELD_NAMES, offsets.row_at(position)))) for position in positions]
+        
+        index = self.__sort_index(column)
+        key = None
+        
+        if student_id is not None:
+            if column == 'id':
+                key = (student_id, student_id)
+            
+            elif student_id in self.students:
+                key = (SSIS.STUDENT_SORT_KEYS[column](self.students[student_id]), student_id)
+            
+            else:
+                raise StudentNotFoundError(student_id)
+        
+        entries = index.entries
+        positions = keyset_range(len(entries), entries.__getitem__, key, limit, direction, descending)
+        
+        return [self.students[entries[position][1]] for position in positions]
     
-    def save_programs(self) -> None:
-        """Save programs to the programs CSV file."""
-        with open(self.programs_path, 'w', newline='') as prog_file:
-            writer = DictWriter(prog_file, SSIS.PROGRAM_FIELD_NAMES)
-            writer.writeheader()
+    def __sort_index(self, column: str) -> SortIndex:
+        """Get the sort index of a column, building it on first use."""
+        self.load_all_partitions()
+        
+        if column not in self.__sort_indexes:
+            sort_key = SSIS.STUDENT_SORT_KEYS[column]
             
-            for program in sorted(self.programs.values(), key=lambda program: program.code):
-                writer.writerow({
-                    'code': program.code,
-                    'name': program.name
-                })
-    
-    def save_students(self) -> None:
-        """Save students to the students CSV file."""
-        with open(self.students_path, 'w', newline='') as stud_file:
-            writer = DictWriter(stud_file, SSIS.STUDENT_FIELD_NAMES)
-            writer.writeheader()
+            index = SortIndex()
+            index.build((sort_key(student), student.id) for student in self.students.values())
             
-            for student in sorted(self.students.values(), key=lambda student: student.id):
-                writer.writerow({
-                    'id': student.id,
-                    'surname': student.name[0],
-                    'firstname': student.name[1],
-                    'middlename': student.name[2],
-                    'suffix': student.name[3],
-                    'year': student.year,
-                    'gender': student.gender,
-                    'program_code': student.program_code
-                })
+            self.__sort_indexes[column] = index
+        
+        return self.__sort_indexes[column]
     
-    def add_program(self, program: Program) -> None:
+    def next_student_id(self, year: str) -> str:
         """
-        Add a new program.
+        Get the lowest free student ID of an admission year.
+        
+        The ID is not reserved; it stays free until a student is added with it.
 
         Args:
-            program (Program): Program to be added.
+            year (str): Four-digit admission year.
+
+        Returns:
+            str: Free student ID in the YYYY-NNNN format.
 
         Raises:
-            DuplicateProgramError: If a program with the same code already exists.
+            ValueError: If the year is not four digits or has no free IDs left.
         """
-        if program.code in self.programs:
-            raise DuplicateProgramError(program.code)
+        return self.allocate_student_ids(year, 1)[0]
+    
+    def allocate_student_ids(self, year: str, count: int) -> list[str]:
+        """
+        Get the lowest free student IDs of an admission year, e.g. for a cohort import.
         
-        self.programs[program.code] = program
+        The IDs are not reserved; each stays free until a student is added with it.
+
+        Args:
+            year (str): Four-digit admission year.
+            count (int): Number of IDs to hand out.
+
+        Returns:
+            list[str]: Free student IDs in ascending order.
+
+        Raises:
+            ValueError: If the year is not four digits or has fewer than count free IDs left.
+        """
+        self.__check_writable()
+        
+        if not (len(year) == 4 and year.isascii() and year.isdigit()):
+            raise ValueError(f'{year!r} is not a four-digit year.')
+        
+        self.load_partition(year)
+        
+        student_ids = list(islice(self.__id_allocator.free_ids(year), count))
+        
+        if len(student_ids) < count:
+            raise ValueError(f'Only {len(student_ids)} student ID(s) left for year {year}.')
+        
+        return student_ids
     
-    def add_student(self, student: Student) -> None:
+    def match_students(self, query: str, student_ids: Iterable[str]) -> Iterator[str]:
         """
-        Add a new student.
+        Filter student IDs by a search query.
+        
+        Every whitespace-separated term of the query must appear in the student's
+        ID, formatted name or program code. Matching is case-insensitive. The text
+        searched for each student is built the first time the student is tested,
+        so a search scanned in chunks spreads that work over its chunks. IDs of
+        students that no longer exist are skipped.
 
         Args:
-            student (Student): Student to be added.
+            query (str): Search query.
+            student_ids (Iterable[str]): IDs of the students to test, in the order to yield them.
+
+        Returns:
+            Iterator[str]: IDs of the matching students.
+        """
+        self.load_all_partitions()
+        
+        if self.__search_texts is None:
+            self.__search_texts = {}
+        
+        terms = query.upper().split()
+        search_texts = self.__search_texts
+        
+        for student_id in student_ids:
+            if (search_text := search_texts.get(student_id)) is None:
+                if (student := self.students.get(student_id)) is None:
+                    continue
+                
+                search_text = search_texts[student_id] = SSIS.__search_text(student)
+            
+            if all(term in search_text for term in terms):
+                yield student_id
+    
+    def search_students(
+        self, 
+        query: str, 
+        limit: int | None = None, 
+        column: str = 'id', 
+        descending: bool = False
+    ) -> list[str]:
+        """
+        Search students by ID, name and program code.
+
+        Args:
+            query (str): Search query, see match_students.
+            limit (int | None, optional): Maximum number of results. Defaults to None (no limit).
+            column (str, optional): Column to order the results by. Defaults to 'id'.
+            descending (bool, optional): Order from the largest value. Defaults to False.
+
+        Returns:
+            list[str]: IDs of the matching students in sort order.
+        """
+        # Loading partitions changes the version, so it is done before reading it
+        self.load_all_partitions()
+        
+        key = SSIS.__search_key(query, limit, column, descending)
+        
+        def search() -> tuple[str, ...]:
+            return tuple(islice(self.match_students(' '.join(key[1]), self.sorted_student_ids(column, descending)), limit))
+        
+        return list(self.__cached('students', key, search))
+    
+    def cached_search(self, query: str, limit: int | None = None, column: str = 'id', descending: bool = False) -> list[str] | None:
+        """
+        Get the result of a search from the query cache without running it.
+        
+        For callers that scan in chunks with match_students, which store the
+        result with cache_search once the scan is complete.
+
+        Args:
+            query (str): Search query, see match_students.
+            limit (int | None, optional): Maximum number of results. Defaults to None (no limit).
+            column (str, optional): Column the results are ordered by. Defaults to 'id'.
+            descending (bool, optional): Order from the largest value. Defaults to False.
+
+        Returns:
+            list[str] | None: IDs of the matching students in sort order, or None if not cached for the current students.
+        """
+        self.load_all_partitions()
+        
+        if self.__transaction_depth:
+            return None
+        
+        found, result = self.__query_cache.lookup(
+            SSIS.__search_key(query, limit, column, descending), self.__versions['students']
+        )
+        
+        return list(result) if found else None
+    
+    def cache_search(
+        self, 
+        query: str, 
+        limit: int | None, 
+        column: str, 
+        descending: bool, 
+        student_ids: Iterable[str], 
+        version: int
+    ) -> None:
+        """
+        Cache the result of a search scanned by the caller, as search_students would have.
+
+        Args:
+            query (str): Search query, see match_students.
+            limit (int | None): Maximum number of results the scan stopped at, or None.
+            column (str): Column the results are ordered by.
+            descending (bool): Whether they are ordered from the largest value.
+            student_ids (Iterable[str]): IDs of the matching students in sort order.
+            version (int): Version of the students table the whole scan read, see version.
+        """
+        # A result scanned across a change would be tagged with a version it does not match
+        if self.__transaction_depth or version != self.__versions['students']:
+            return
+        
+        self.__query_cache.store(SSIS.__search_key(query, limit, column, descending), version, tuple(student_ids))
+    
+    @staticmethod
+    def __search_key(query: str, limit: int | None, column: str, descending: bool) -> tuple:
+        """Build the query cache key of a search."""
+        # The order and repetition of terms do not change which students match
+        terms = tuple(sorted(set(query.upper().split())))
+        
+        return ('search', terms, limit, column, descending)
+    
+    def query_students(
+        self, 
+        program_code: str | None = None, 
+        year: int | None = None, 
+        column: str = 'id', 
+        descending: bool = False
+    ) -> tuple[str, ...]:
+        """
+        List the students of a program, a year level or both.
+        
+        Results are cached until the students table changes, so a repeated query
+        is answered without scanning the students again.
+
+        Args:
+            program_code (str | None, optional): Code of the program, SSIS.UNENROLLED for students in none, 
+                or None for any. Defaults to None.
+            year (int | None, optional): Year level, or None for any. Defaults to None.
+            column (str, optional): Column to order the results by. Defaults to 'id'.
+            descending (bool, optional): Order from the largest value. Defaults to False.
+
+        Returns:
+            tuple[str, ...]: IDs of the matching students in sort order.
+        """
+        if program_code == SSIS.UNENROLLED:
+            program_code = ''
+        
+        self.load_all_partitions()
+        
+        def query() -> tuple[str, ...]:
+            student_ids = self.sorted_student_ids(column, descending)
+            
+            if program_code is None and year is None:
+                return tuple(student_ids)
+            
+            students = self.students
+            
+            return tuple(
+                student_id for student_id in student_ids 
+                if (program_code is None or (students[student_id].program_code or '') == program_code)
+                and (year is None or students[student_id].year == year)
+            )
+        
+        return self.__cached('students', ('query', program_code, year, column, descending), query)
+    
+    def fuzzy_search_names(self, query: str, limit: int = 10, threshold: float = 0.6) -> list[tuple[Student, float]]:
+        """
+        Search students by approximate name.
+        
+        Names are compared by their character trigrams, so misspellings such as
+        "CAPILA" still find "CAPILLA".
+
+        Args:
+            query (str): Name or part of a name to look for.
+            limit (int, optional): Maximum number of results. Defaults to 10.
+            threshold (float, optional): Minimum fraction of the query's trigrams a name must share. Defaults to 0.6.
+
+        Returns:
+            list[tuple[Student, float]]: (student, score) pairs, best match first.
+        """
+        self.load_all_partitions()
+        
+        if self.__name_index is None:
+            self.__name_index = TrigramIndex()
+            
+            for student in self.students.values():
+                self.__name_index.add(student.id, SSIS.__name_text(student))
+        
+        return [
+            (self.students[student_id], score) 
+            for student_id, score in self.__name_index.search(query, limit, threshold)
+        ]
+    
+    def find_duplicate_students(self, threshold: float = 0.8) -> list[DuplicateCandidate]:
+        """
+        Find pairs of students that are probably the same person enrolled twice, see model.duplicates.find_duplicates.
+
+        Args:
+            threshold (float, optional): Minimum similarity of a reported pair, from 0 to 1. Defaults to 0.8.
+
+        Returns:
+            list[DuplicateCandidate]: Candidate pairs, most similar first.
+        """
+        return find_duplicates(self.__all_students(), threshold)
+    
+    def merge_students(self, student_id: str, duplicate_id: str) -> Student:
+        """
+        Merge a duplicate record of a person into the record that is kept.
+        
+        Blank middle name, suffix and program of the kept record are filled from the
+        duplicate, then the duplicate is deleted, in one transaction.
+
+        Args:
+            student_id (str): ID of the record to keep.
+            duplicate_id (str): ID of the record to merge and delete.
+
+        Returns:
+            Student: Merged record.
 
         Raises:
-            DuplicateStudentError: If a student with the same ID already exists.
+            ValueError: If both IDs are the same.
+            StudentNotFoundError: If either student does not exist.
         """
-        if student.id in self.students:
-            raise DuplicateStudentError(student.id)
+        if student_id == duplicate_id:
+            raise ValueError('A student cannot be merged with itself.')
         
-        self.students[student.id] = student
+        student = self.get_student_by_id(student_id)
+        duplicate = self.get_student_by_id(duplicate_id)
+        
+        surname, firstname, middlename, suffix = student.name
+        
+        merged = Student(
+            id=student.id,
+            name=(surname, firstname, middlename or duplicate.name[2], suffix or duplicate.name[3]),
+            year=student.year,
+            gender=student.gender,  # type: ignore
+            program_code=student.program_code or duplicate.program_code
+        )
+        
+        with self.transaction():
+            self.update_student(merged)
+            self.delete_student_by_id(duplicate_id)
+        
+        return merged
+    
+    @staticmethod
+    def __name_text(student: Student) -> str:
+        """Join the parts of a student's name for the name index."""
+        return ' '.join(part for part in student.name if part)
+    
+    @staticmethod
+    def __search_text(student: Student) -> str:
+        """Build the text a student is searched by."""
+        return f'{student.id}\t{student.name_formatted}\t{student.program_code or ""}'.upper()
+    
+    def __index_student(self, student: Student) -> None:
+        """Add a student to the built sort, search and name indexes and the ID allocator."""
+        for column, index in self.__sort_indexes.items():
+            index.add(SSIS.STUDENT_SORT_KEYS[column](student), student.id)
+        
+        if self.__search_texts is not None:
+            self.__search_texts[student.id] = SSIS.__search_text(student)
+        
+        if self.__name_index is not None:
+            self.__name_index.add(student.id, SSIS.__name_text(student))
+        
+        self.__id_allocator.add(student.id)
+    
+    def __unindex_student(self, student: Student) -> None:
+        """Remove a student from the built sort, search and name indexes and the ID allocator."""
+        for column, index in self.__sort_indexes.items():
+            index.remove(SSIS.STUDENT_SORT_KEYS[column](student), student.id)
+        
+        if self.__search_texts is not None:
+            self.__search_texts.pop(student.id, None)
+        
+        if self.__name_index is not None:
+            self.__name_index.remove(student.id, SSIS.__name_text(student))
+        
+        self.__id_allocator.remove(student.id)
         
     def get_program_by_code(self, program_code: str) -> Program:
         """
@@ -204,6 +2151,20 @@ class SSIS:
         if not Student.valid_id(student_id):
             raise ValueError(f'ID must follow the format {Student.VALID_ID_PATTERN}')
         
+        if self.__records is not None:
+            if (student := self.__records.get(student_id)) is None:
+                raise StudentNotFoundError(student_id)
+            
+            return student
+        
+        if self.__offsets is not None:
+            if (row := self.__current_offsets().get_row(student_id)) is None:
+                raise StudentNotFoundError(student_id)
+            
+            return SSIS.__student_from_row(dict(zip(SSIS.STUDENT_FIELD_NAMES, row)))
+        
+        self.load_partition(student_id[:4])
+        
         if student_id not in self.students:
             raise StudentNotFoundError(student_id)
         
@@ -221,11 +2182,17 @@ class SSIS:
 
         Raises:
             ProgramNotFoundError: If no program with the specified code is found.
+            OrphanedStudentError: If students are still in the program.
         """
+        self.__check_writable()
+        
         if program_code not in self.programs:
             raise ProgramNotFoundError(program_code)
         
-        return self.programs.pop(program_code)
+        with self.transaction():
+            self.__touch('programs', program_code)
+            
+            return self.__remove_program(program_code)
     
     def delete_student_by_id(self, student_id: str) -> Student:
         """
@@ -241,10 +2208,39 @@ class SSIS:
             ValueError: If the student ID does not match the valid pattern.
             StudentNotFoundError: If no student with the specified ID is found.
         """
+        self.__check_writable()
+        
         if not Student.valid_id(student_id):
             raise ValueError(f'ID must follow the format {Student.VALID_ID_PATTERN}')
         
+        self.load_partition(student_id[:4])
+        
         if student_id not in self.students:
             raise StudentNotFoundError(student_id)
         
-        return self.students.pop(student_id)
+        with self.transaction():
+            self.__touch('students', student_id)
+            self.__mark_dirty(student_id)
+            
+            return self.__remove_student(student_id)
+    
+    def delete_students_by_id(self, student_ids: Iterable[str]) -> list[Student]:
+        """
+        Delete several students at once.
+        
+        The students are deleted in one transaction, so either all of them are
+        deleted or none is, and listeners are notified once.
+
+        Args:
+            student_ids (Iterable[str]): IDs of the students to delete.
+
+        Returns:
+            list[Student]: Students that were deleted, in the same order.
+
+        Raises:
+            ValueError: If a student ID does not match the valid pattern.
+            StudentNotFoundError: If no student exists for one of the IDs.
+        """
+        with self.transaction():
+            # An ID listed twice is deleted once
+            return [self.delete_student_by_id(student_id) for student_id in dict.fromkeys(student_ids)]
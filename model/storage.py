@@ -0,0 +1,133 @@
+from csv import DictReader, DictWriter
+from heapq import merge
+from operator import itemgetter
+from typing import Iterable, Iterator, Literal, Mapping, Optional, Sequence, TextIO
+import gzip
+import lzma
+import os
+import tempfile
+
+# Suffixes of the compressed file formats that are read and written transparently
+COMPRESSED_SUFFIXES = ('.gz', '.xz')
+
+# Rows sorted in memory at once by external_sort, before they are written out as a run
+SORT_RUN_SIZE = 100_000
+
+def open_csv(path: str, mode: Literal['r', 'w'] = 'r') -> TextIO:
+    """
+    Open a CSV file for streaming text I/O, compressed according to its suffix.
+
+    Paths ending in ".gz" are read and written with gzip and paths ending in ".xz"
+    with lzma, one block at a time, so a compressed file is never expanded to disk
+    or held in memory as a whole. Other paths are opened as plain text.
+
+    Args:
+        path (str): Path to the CSV file.
+        mode (Literal['r', 'w'], optional): Open for reading or writing. Defaults to 'r'.
+
+    Returns:
+        TextIO: Text stream suitable for csv readers and writers.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', compresslevel=6, newline='')  # type: ignore
+    
+    if path.endswith('.xz'):
+        return lzma.open(path, f'{mode}t', newline='')  # type: ignore
+    
+    return open(path, mode, newline='')
+
+def external_sort(
+    rows: Iterable[dict[str, str]],
+    fieldnames: Sequence[str],
+    key_field: str,
+    directory: Optional[str] = None,
+    run_size: Optional[int] = None
+) -> Iterator[dict[str, str]]:
+    """
+    Sort CSV rows by a field without holding more than one run of them in memory.
+    
+    Rows are read in runs of run_size, and each run is sorted and written to a
+    temporary CSV file. The runs are then merged in a single k-way pass, reading
+    one row of each run at a time. If every row fits in one run, it is sorted in
+    memory and nothing is written. The temporary files are deleted once the
+    sorted rows have been read or the iterator is closed.
+
+    Args:
+        rows (Iterable[dict[str, str]]): Rows to sort.
+        fieldnames (Sequence[str]): Fields of the rows.
+        key_field (str): Field to sort by, compared as text.
+        directory (Optional[str], optional): Directory of the temporary files. Defaults to None (the system's).
+        run_size (Optional[int], optional): Rows per run. Defaults to None (SORT_RUN_SIZE).
+
+    Returns:
+        Iterator[dict[str, str]]: The rows in ascending order of the key.
+    """
+    key = itemgetter(key_field)
+    run_size = run_size or SORT_RUN_SIZE
+    rows = iter(rows)
+    
+    run = sorted((row for _, row in zip(range(run_size), rows)), key=key)
+    
+    if len(run) < run_size:
+        yield from run
+        return
+    
+    with tempfile.TemporaryDirectory(dir=directory) as run_dir:
+        run_paths = []
+        
+        while run:
+            run_paths.append(path := os.path.join(run_dir, f'{len(run_paths)}.csv'))
+            
+            with open(path, 'w', newline='', encoding='utf-8') as run_file:
+                DictWriter(run_file, fieldnames).writerows(run)
+            
+            run = sorted((row for _, row in zip(range(run_size), rows)), key=key)
+        
+        run_files = [open(path, newline='', encoding='utf-8') for path in run_paths]
+        
+        try:
+            yield from merge(*(DictReader(run_file, fieldnames, restval='') for run_file in run_files), key=key)
+        
+        finally:
+            for run_file in run_files:
+                run_file.close()
+
+def merge_sorted(
+    rows: Iterable[dict[str, str]],
+    changes: Mapping[str, Optional[dict[str, str]]],
+    key_field: str
+) -> Iterator[dict[str, str]]:
+    """
+    Apply changes to CSV rows sorted by a field, keeping them sorted, in one streaming pass.
+    
+    Only the changes are sorted in memory, so a sorted file of any size can be
+    updated by reading it and writing the result to another file.
+
+    Args:
+        rows (Iterable[dict[str, str]]): Rows in ascending order of the key, e.g. read from a file.
+        changes (Mapping[str, Optional[dict[str, str]]]): New row of each key added or changed, or None for a removed key.
+        key_field (str): Field the rows are sorted by, compared as text.
+
+    Returns:
+        Iterator[dict[str, str]]: The changed rows in ascending order of the key.
+
+    Raises:
+        ValueError: If the rows turn out not to be in ascending order of the key, once the first row out of order is read.
+    """
+    key = itemgetter(key_field)
+    new_rows = sorted((row for row in changes.values() if row is not None), key=key)
+    
+    return merge(_unchanged_rows(rows, changes, key_field), new_rows, key=key)
+
+def _unchanged_rows(rows: Iterable[dict[str, str]], changes: Mapping[str, object], key_field: str) -> Iterator[dict[str, str]]:
+    """Skip the rows whose key changed, checking that the keys ascend."""
+    previous = None
+    
+    for row in rows:
+        if previous is not None and row[key_field] <= previous:
+            raise ValueError(f'Rows are not in ascending order of {key_field!r}: {row[key_field]!r} follows {previous!r}.')
+        
+        previous = row[key_field]
+        
+        if previous not in changes:
+            yield row
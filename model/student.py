@@ -9,6 +9,11 @@ class Student:
     VALID_ID_PATTERN = r'[0-9]{4}-[0-9]{4}'
     VALID_GENDER_OPTIONS = ('MALE', 'FEMALE', 'OTHER')
     
+    # Compiled once and matched against the whole ID, so "2019-12345" is rejected
+    ID_REGEX = re.compile(VALID_ID_PATTERN)
+    
+    __slots__ = ('__id', '__name', '__year', '__gender', '__program_code')
+    
     def __init__(
         self, 
         id: str, 
@@ -17,14 +22,51 @@ class Student:
         gender: Literal['MALE', 'FEMALE', 'OTHER'], 
         program_code: Optional[str] = None
     ) -> None:
-        if not Student.valid_id(id):
+        if not Student.ID_REGEX.fullmatch(id):
             raise ValueError(f'{id!r} does not match the valid pattern {Student.VALID_ID_PATTERN!r}')
         
+        # Same checks as the setters, without going through the properties
         self.__id = id
-        self.name = name
-        self.year = year
-        self.gender = gender
-        self.program_code = program_code
+        self.__name = Student.__checked_name(name)
+        self.__year = Student.__checked_year(year)
+        self.__gender = Student.__checked_gender(gender)
+        self.__program_code = Student.__checked_program_code(program_code)
+    
+    @classmethod
+    def trusted(
+        cls,
+        id: str,
+        name: tuple[str, str, Optional[str], Optional[str]],
+        year: int,
+        gender: str,
+        program_code: Optional[str] = None
+    ) -> Student:
+        """
+        Build a student from values that were already validated, without checking them again.
+
+        Only for records this program wrote itself from valid students, such as
+        record files, columnar stores and journals. Input from users or from CSV
+        files that may have been edited must go through the constructor.
+
+        Args:
+            id (str): Student ID.
+            name (tuple[str, str, Optional[str], Optional[str]]): Surname, first name, middle name and suffix, blanks as None.
+            year (int): Year level.
+            gender (str): One of VALID_GENDER_OPTIONS.
+            program_code (Optional[str], optional): Program code, or None if not enrolled. Defaults to None.
+
+        Returns:
+            Student: Student with the given values.
+        """
+        student = object.__new__(cls)
+        
+        student.__id = id
+        student.__name = name
+        student.__year = year
+        student.__gender = gender
+        student.__program_code = program_code
+        
+        return student
     
     @property
     def id(self) -> str:
@@ -57,39 +99,54 @@ class Student:
     
     @name.setter
     def name(self, name: tuple[str, str, Optional[str], Optional[str]]) -> None:
+        self.__name = Student.__checked_name(name)
+    
+    @year.setter
+    def year(self, year: int) -> None:
+        self.__year = Student.__checked_year(year)
+    
+    @gender.setter
+    def gender(self, gender: Literal['MALE', 'FEMALE', 'OTHER']) -> None:
+        self.__gender = Student.__checked_gender(gender)
+    
+    @program_code.setter
+    def program_code(self, program_code: Optional[str]) -> None:
+        self.__program_code = Student.__checked_program_code(program_code)
+    
+    @staticmethod
+    def __checked_name(name: tuple[str, str, Optional[str], Optional[str]]) -> tuple[str, str, Optional[str], Optional[str]]:
         if not (v_name := Student.valid_name(name)):
             raise ValueError(f'{name} is not a valid name.')
         
-        self.__name = v_name
+        return v_name
     
-    @year.setter
-    def year(self, year: int) -> None:
+    @staticmethod
+    def __checked_year(year: int) -> int:
         if not Student.valid_year(year):
             raise ValueError(f'Year must be in the range {Student.MIN_YEAR} to {Student.MAX_YEAR}.')
         
-        self.__year = year
+        return year
     
-    @gender.setter
-    def gender(self, gender: Literal['MALE', 'FEMALE', 'OTHER']) -> None:
+    @staticmethod
+    def __checked_gender(gender: str) -> str:
         if not (v_gender := Student.valid_gender(gender)):
             raise ValueError(f'Invalid gender {gender!r} value entered.')
         
-        self.__gender = v_gender
+        return v_gender
     
-    @program_code.setter
-    def program_code(self, program_code: Optional[str]) -> None:
+    @staticmethod
+    def __checked_program_code(program_code: Optional[str]) -> Optional[str]:
         if not program_code:
-            self.__program_code = None
-            return
+            return None
         
         if not Program.valid_code(program_code):
             raise ValueError(f'{program_code!r} is not a valid program code.')
         
-        self.__program_code = program_code
+        return program_code
         
     @staticmethod
     def valid_id(id: str) -> Optional[str]:
-        if re.match(Student.VALID_ID_PATTERN, id):
+        if Student.ID_REGEX.fullmatch(id):
             return id
         
         return None
@@ -127,10 +184,33 @@ class Student:
         return f'Student(id={self.__id!r}, name={self.__name}, year={self.__year}, gender={self.__gender!r}, program_code={self.__program_code!r})'
 
 class Program:
+    __slots__ = ('__code', '__name')
+    
     def __init__(self, code: str, name: str) -> None:
         self.code = code
         self.name = name
     
+    @classmethod
+    def trusted(cls, code: str, name: str) -> Program:
+        """
+        Build a program from values that were already validated, without checking them again.
+
+        Only for records this program wrote itself, see Student.trusted.
+
+        Args:
+            code (str): Program code.
+            name (str): Program name.
+
+        Returns:
+            Program: Program with the given values.
+        """
+        program = object.__new__(cls)
+        
+        program.__code = code
+        program.__name = name
+        
+        return program
+    
     @property
     def code(self) -> str:
         return self.__code
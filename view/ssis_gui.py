@@ -1,12 +1,87 @@
 from __future__ import annotations  # Allows forward references in type annotations
-from tkinter import Tk, Toplevel
-from tkinter.ttk import Notebook, Treeview, Combobox, Style, Button, Label, Entry, Frame, Scrollbar
+from tkinter import Tk, Toplevel, Misc, END
+from tkinter.ttk import Notebook, Treeview, Combobox, Style, Button, Label, Entry, Frame, Scrollbar, Progressbar
 
 FONT_NORMAL = ('', 10)
 FONT_BOLD = ('', 10, 'bold')
 FONT_ITALIC = ('', 10, 'italic')
 
-class AddProgramWindow(Toplevel):
+class PageControls(Frame):
+    '''Class representing the page navigation bar under a list.'''
+    
+    PAGE_SIZES = (50, 100, 200, 500, 1000)
+    
+    def __init__(self, master: Frame, jump_text: str) -> None:
+        super().__init__(master)
+        
+        self.previous_button = Button(self, text='< Previous')
+        self.next_button = Button(self, text='Next >')
+        
+        self.page_size_label = Label(self, text='Page Size')
+        self.page_size_combobox = Combobox(self, font=FONT_NORMAL, state='readonly', width=6, values=PageControls.PAGE_SIZES)
+        self.page_size_combobox.set(200)
+        
+        self.jump_label = Label(self, text=jump_text)
+        self.jump_entry = Entry(self, font=FONT_NORMAL, width=14)
+        self.jump_button = Button(self, text='Go')
+        
+        self.status_label = Label(self, text='', font=FONT_ITALIC)
+        
+        self.columnconfigure(6, weight=1)
+        
+        self.previous_button.grid(row=0, column=0, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.next_button.grid(row=0, column=1, rowspan=1, columnspan=1, sticky='w', padx=(0, 14))
+        self.page_size_label.grid(row=0, column=2, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.page_size_combobox.grid(row=0, column=3, rowspan=1, columnspan=1, sticky='w', padx=(0, 14))
+        self.jump_label.grid(row=0, column=4, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.jump_entry.grid(row=0, column=5, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.jump_button.grid(row=0, column=6, rowspan=1, columnspan=1, sticky='w')
+        self.status_label.grid(row=0, column=7, rowspan=1, columnspan=1, sticky='e', padx=(7, 0))
+
+class DialogWindow(Toplevel):
+    '''Class representing a dialog that is built once, then hidden when closed and shown again when reopened.'''
+    
+    def __init__(self, master: SSISWindow) -> None:
+        super().__init__(master)
+        
+        # Built hidden, shown by show()
+        self.withdraw()
+        
+        # Window that had the grab before this one was shown, given it back when hidden
+        self.previous_grab: Misc | None = None
+        
+        self.protocol('WM_DELETE_WINDOW', self.hide)
+    
+    def show(self) -> None:
+        '''Show the window above the others and keep input to it until it is hidden.'''
+        self.previous_grab = self.grab_current()
+        
+        self.deiconify()
+        self.lift()
+        self.grab_set()
+        self.focus_set()
+    
+    def hide(self) -> None:
+        '''Hide the window, keeping its widgets for the next time it is shown.'''
+        self.grab_release()
+        self.withdraw()
+        
+        if self.previous_grab is not None and self.previous_grab is not self and self.previous_grab.winfo_viewable():
+            self.previous_grab.grab_set()
+        
+        self.previous_grab = None
+    
+    @staticmethod
+    def clear_entry(entry: Entry) -> None:
+        '''Empty an entry field without running its validation, which only accepts typed characters.'''
+        validate = str(entry.cget('validate'))
+        state = str(entry.cget('state'))
+        
+        entry.config(validate='none', state='normal')
+        entry.delete(0, END)
+        entry.config(validate=validate, state=state)
+
+class AddProgramWindow(DialogWindow):
     '''Class representing the window for adding a program.'''
 
     def __init__(self, master: SSISWindow) -> None:
@@ -21,8 +96,11 @@ class AddProgramWindow(Toplevel):
         self._set_layout()
         
         self.resizable(False, False)
-        
-        self.grab_set()
+    
+    def clear(self) -> None:
+        '''Empty the entry fields.'''
+        self.clear_entry(self.program_code_entry)
+        self.clear_entry(self.program_name_entry)
     
     def _set_labels(self) -> None:
         '''Create labels.'''
@@ -65,11 +143,11 @@ class AddProgramWindow(Toplevel):
         self.style.configure('TLabel', font=FONT_BOLD)
         self.style.configure('TButton', font=FONT_BOLD)
 
-class AddStudentWindow(Toplevel):
+class AddStudentWindow(DialogWindow):
     '''Class representing the window for adding a student.'''
 
     def __init__(self, master: SSISWindow) -> None:
-        super().__init__(master=master)
+        super().__init__(master)
         
         self.title('Add Student')
         
@@ -80,8 +158,21 @@ class AddStudentWindow(Toplevel):
         self._set_layout()
         
         self.resizable(False, False)
-        
-        self.grab_set()
+    
+    def clear(self) -> None:
+        '''Empty the entry fields and comboboxes.'''
+        for entry in (
+            self.id_entry, 
+            self.year_entry, 
+            self.surname_entry, 
+            self.firstname_entry, 
+            self.middlename_entry, 
+            self.suffix_entry
+        ):
+            self.clear_entry(entry)
+        
+        self.gender_combobox.set('')
+        self.program_combobox.set('')
         
     def _set_labels(self) -> None:
         '''Create labels.'''
@@ -155,6 +246,73 @@ class AddStudentWindow(Toplevel):
         self.style.configure('AddStudent.TButton', font=FONT_BOLD)
         self.style.configure('AddProgram.TButton', font=FONT_ITALIC)
 
+class ChangeProgramWindow(Toplevel):
+    '''Class representing the window for moving the selected students to another program.'''
+
+    def __init__(self, master: SSISWindow, student_count: int) -> None:
+        super().__init__(master)
+        
+        self.title('Change Program')
+        
+        self.program_label = Label(self, text=f'New Program for {student_count} Student(s)')
+        self.program_combobox = Combobox(self, font=FONT_NORMAL, width=40)
+        self.change_program_button = Button(self, text='Change Program')
+        
+        self.columnconfigure(0, weight=1)
+        
+        self.program_label.grid(row=0, column=0, rowspan=1, columnspan=1, sticky='w', padx=15, pady=(15, 5))
+        self.program_combobox.grid(row=1, column=0, rowspan=1, columnspan=1, sticky='nsew', padx=15)
+        self.change_program_button.grid(row=2, column=0, rowspan=1, columnspan=1, sticky='e', padx=15, pady=15)
+        
+        self.option_add('*TCombobox*Listbox*Font', FONT_NORMAL)
+        
+        self.resizable(False, False)
+        
+        self.grab_set()
+
+class DuplicatesWindow(Toplevel):
+    '''Class representing the window listing students that may be the same person.'''
+
+    def __init__(self, master: SSISWindow) -> None:
+        super().__init__(master)
+        
+        self.title('Possible Duplicate Students')
+        
+        self.candidate_list = Treeview(
+            self,
+            columns=('score', 'id', 'name', 'other_id', 'other_name'),
+            show='headings',
+            selectmode='browse'
+        )
+        
+        for column, text in (
+            ('score', 'Similarity'), 
+            ('id', 'ID'), 
+            ('name', 'Name'), 
+            ('other_id', 'Other ID'), 
+            ('other_name', 'Other Name')
+        ):
+            self.candidate_list.heading(column=column, text=text)
+            self.candidate_list.column(column, anchor='center')
+        
+        self.candidate_list_scrollbar = Scrollbar(self, orient='vertical', command=self.candidate_list.yview)
+        self.candidate_list.config(yscrollcommand=self.candidate_list_scrollbar.set)
+        
+        self.status_label = Label(self, text='', font=FONT_ITALIC)
+        self.keep_first_button = Button(self, text='Keep ID, Merge Other')
+        self.keep_second_button = Button(self, text='Keep Other, Merge ID')
+        
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        
+        self.candidate_list.grid(row=0, column=0, rowspan=1, columnspan=3, sticky='nsew', padx=(15, 0), pady=(15, 0))
+        self.candidate_list_scrollbar.grid(row=0, column=3, rowspan=1, columnspan=1, sticky='nsw', padx=(0, 15), pady=(15, 0))
+        self.status_label.grid(row=1, column=0, rowspan=1, columnspan=1, sticky='w', padx=15, pady=15)
+        self.keep_first_button.grid(row=1, column=1, rowspan=1, columnspan=1, sticky='e', padx=(0, 7), pady=15)
+        self.keep_second_button.grid(row=1, column=2, rowspan=1, columnspan=2, sticky='e', padx=(0, 15), pady=15)
+        
+        self.grab_set()
+
 class SSISWindow(Tk):
     '''Class representing the main window of the Student Information System.'''
 
@@ -172,6 +330,11 @@ class SSISWindow(Tk):
         self.save_button = Button(self, text='Save Changes')
         self.add_student_button = Button(self, text='Add Student')
         self.add_program_button = Button(self, text='Add Program')
+        self.tools_frame = Frame(self)
+        self.write_rosters_button = Button(self.tools_frame, text='Write Rosters')
+        self.find_duplicates_button = Button(self.tools_frame, text='Find Duplicates')
+        self.start_term_button = Button(self.tools_frame, text='Start Term')
+        self.promote_students_button = Button(self.tools_frame, text='Promote Students')
     
     def _init_notebook(self) -> None:
         '''Initialize notebook.'''
@@ -181,24 +344,38 @@ class SSISWindow(Tk):
         '''Initialize tabs.'''
         self.student_tab = Frame(self.notebook)
         
+        self.student_search_frame = Frame(self.student_tab)
+        self.student_search_label = Label(self.student_search_frame, text='Search')
+        self.student_search_entry = Entry(self.student_search_frame, font=FONT_NORMAL)
+        self.student_search_status = Label(self.student_search_frame, text='', font=FONT_ITALIC)
+        
         self.student_list = Treeview(
             self.student_tab, 
             columns=('id', 'name', 'year', 'gender', 'program_code'), 
             show='headings', 
-            selectmode='browse'
+            selectmode='extended'
         )
         
-        self.student_list.heading(column='id', text='ID')
-        self.student_list.heading(column='name', text='Name')
-        self.student_list.heading(column='year', text='Year')
-        self.student_list.heading(column='gender', text='Gender')
-        self.student_list.heading(column='program_code', text='Program')
+        self.student_list_headings = {
+            'id': 'ID',
+            'name': 'Name',
+            'year': 'Year',
+            'gender': 'Gender',
+            'program_code': 'Program'
+        }
+        
+        for column, text in self.student_list_headings.items():
+            self.student_list.heading(column=column, text=text)
         
         self.student_list_scrollbar = Scrollbar(
             self.student_tab, 
             orient='vertical', 
             command=self.student_list.yview
         )
+        
+        self.student_list_progress = Progressbar(self.student_tab, orient='horizontal', mode='determinate')
+        
+        self.student_pager = PageControls(self.student_tab, 'Go to ID')
              
         self.program_tab = Frame(self.notebook)
         
@@ -218,6 +395,8 @@ class SSISWindow(Tk):
             command=self.program_list.yview
         )
         
+        self.program_pager = PageControls(self.program_tab, 'Go to Code')
+        
         self.notebook.add(self.student_tab, state='normal', text='Students')
         self.notebook.add(self.program_tab, state='normal', text='Programs')
 
@@ -237,6 +416,11 @@ class SSISWindow(Tk):
         
         self.notebook.grid(row=0, column=0, rowspan=1, columnspan=4, sticky='nsew', padx=0, pady=0)
         self.save_button.grid(row=1, column=0, rowspan=1, columnspan=1, sticky='ew', padx=(14, 7), pady=(7, 14))
+        self.tools_frame.grid(row=1, column=1, rowspan=1, columnspan=1, sticky='w', padx=(7, 7), pady=(7, 14))
+        self.write_rosters_button.grid(row=0, column=0, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.find_duplicates_button.grid(row=0, column=1, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.start_term_button.grid(row=0, column=2, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.promote_students_button.grid(row=0, column=3, rowspan=1, columnspan=1, sticky='w')
         self.add_student_button.grid(row=1, column=2, rowspan=1, columnspan=1, sticky='ew', padx=(7, 7), pady=(7, 14))
         self.add_program_button.grid(row=1, column=3, rowspan=1, columnspan=1, sticky='ew', padx=(7, 14), pady=(7, 14))
         
@@ -246,12 +430,30 @@ class SSISWindow(Tk):
             
             tab.rowconfigure(0, weight=1)
         
-        self.student_list.grid(row=0, column=0, rowspan=1, columnspan=1, sticky='nsew', padx=(14, 0), pady=(14, 0))
-        self.student_list_scrollbar.grid(row=0, column=1, rowspan=1, columnspan=1, sticky='nsw', padx=(0, 0), pady=(14, 0))
+        self.student_tab.rowconfigure(0, weight=0)
+        self.student_tab.rowconfigure(1, weight=1)
+        
+        self.student_search_frame.columnconfigure(1, weight=1)
+        
+        self.student_search_frame.grid(row=0, column=0, rowspan=1, columnspan=2, sticky='ew', padx=14, pady=(14, 0))
+        self.student_search_label.grid(row=0, column=0, rowspan=1, columnspan=1, sticky='w', padx=(0, 7))
+        self.student_search_entry.grid(row=0, column=1, rowspan=1, columnspan=1, sticky='ew')
+        self.student_search_status.grid(row=0, column=2, rowspan=1, columnspan=1, sticky='e', padx=(7, 0))
+        
+        self.student_list.grid(row=1, column=0, rowspan=1, columnspan=1, sticky='nsew', padx=(14, 0), pady=(7, 0))
+        self.student_list_scrollbar.grid(row=1, column=1, rowspan=1, columnspan=1, sticky='nsw', padx=(0, 0), pady=(7, 0))
+        
+        # Shown by the controller only while the student list is being filled
+        self.student_list_progress.grid(row=2, column=0, rowspan=1, columnspan=2, sticky='ew', padx=(14, 0), pady=(7, 0))
+        self.student_list_progress.grid_remove()
+        
+        self.student_pager.grid(row=3, column=0, rowspan=1, columnspan=2, sticky='ew', padx=14, pady=(7, 0))
         
         self.program_list.grid(row=0, column=0, rowspan=1, columnspan=1, sticky='nsew', padx=(14, 0), pady=(14, 0))
         self.program_list_scrollbar.grid(row=0, column=1, rowspan=1, columnspan=1, sticky='nsw', padx=(0, 0), pady=(14, 0))
         
+        self.program_pager.grid(row=1, column=0, rowspan=1, columnspan=2, sticky='ew', padx=14, pady=(7, 0))
+        
         for list in (self.program_list, self.student_list):
             for column in list['columns']:
                 list.column(column, anchor='center')